@@ -0,0 +1,92 @@
+# Benchmark: clause search latency with 100k+ clauses indexed
+#
+# Stores generated contracts in a scratch document store, indexes the clauses
+# extract_clauses finds in them, then times searches (free text, clause type
+# and party filters) against the full index.
+#
+# Usage (from the backend directory):
+#     python benchmarks/bench_clause_search.py [--clauses 100000] [--repeat 50]
+#
+# Exits with status 1 if any query's p99 exceeds --max-p99-ms.
+import argparse
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+SCRATCH_DIR = tempfile.mkdtemp(prefix="lawmind-clauses-")
+os.environ.setdefault("DOCUMENT_STORE_DIR", os.path.join(SCRATCH_DIR, "default-store"))
+
+import corpus
+from services import cerebras_service
+from services.clause_index import ClauseIndex
+from services.document_store import DocumentStore
+
+OWNER = "bench"
+QUERIES = [
+    ("liability", {"query": "liability"}),
+    ("uncapped liability damages", {"query": "uncapped liability damages"}),
+    ("rare term", {"query": "workmanlike"}),
+    ("type only", {"clause_type": "governing_law"}),
+    ("type + query", {"query": "delaware laws", "clause_type": "governing_law"}),
+    ("party + query", {"query": "terminate notice", "party": "northwind"}),
+    ("deep page", {"query": "agreement", "offset": 1000}),
+]
+
+
+def build_index(target_clauses: int, document_size: int) -> tuple:
+    store = DocumentStore(os.path.join(SCRATCH_DIR, "store"), max_bytes=1 << 40, max_age_seconds=1e9)
+    index = ClauseIndex(store)
+    clauses = documents = 0
+    started = time.perf_counter()
+    while clauses < target_clauses:
+        text = corpus.generate_contract(document_size, seed=documents)
+        extraction = cerebras_service.extract_all_clauses_sync(text)
+        document = store.put(OWNER, text, f"contract-{documents}.txt")
+        index.index_extraction(OWNER, document["id"], extraction)
+        clauses += len(extraction["clauses"])
+        documents += 1
+    return store, index, documents, clauses, time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Clause search benchmark")
+    parser.add_argument("--clauses", type=int, default=100000, help="clauses to index")
+    parser.add_argument("--document-size", type=int, default=6000, help="characters per generated contract")
+    parser.add_argument("--repeat", type=int, default=50, help="runs per query")
+    parser.add_argument("--max-p99-ms", type=float, default=300.0)
+    args = parser.parse_args()
+
+    store, index, documents, clauses, seconds = build_index(args.clauses, args.document_size)
+    print(f"Indexed {clauses} clauses from {documents} documents in {seconds:.1f}s "
+          f"({clauses / seconds:.0f} clauses/s)")
+
+    failed = False
+    for name, query in QUERIES:
+        samples = []
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            results = index.search(OWNER, **query)
+            samples.append(time.perf_counter() - start)
+        samples.sort()
+        p50 = statistics.median(samples) * 1000
+        p99 = samples[min(len(samples) - 1, int(0.99 * len(samples)))] * 1000
+        failed = failed or p99 > args.max_p99_ms
+        print(f"{name:<28} p50 {p50:>8.2f}ms  p99 {p99:>8.2f}ms  ({len(results)} results)")
+
+    store.db.close()
+    if failed:
+        print(f"Some queries exceeded the {args.max_p99_ms}ms p99 limit")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    finally:
+        shutil.rmtree(SCRATCH_DIR, ignore_errors=True)
@@ -0,0 +1,157 @@
+# Benchmark: cold start of the backend
+#
+# 1. Imports the app (`python -X importtime -c "import main"`) in fresh
+#    interpreters and reports the import time, with the interpreter's own
+#    start-up subtracted, and the modules and packages it is spent in.
+# 2. Starts uvicorn and measures the time until the first response to /,
+#    the latency of the first and second request to a lazily loaded router,
+#    and, with WARM_UP=true, the time until /ready reports the process ready.
+#
+# Usage (from the backend directory):
+#     python benchmarks/bench_cold_start.py [--repeat 5] [--top 15]
+#
+# Exits with status 1 if importing the app takes longer than --max-import-ms,
+# or imports any module that should only load on first use (LAZY_MODULES).
+import argparse
+import os
+import shutil
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Must not be imported by `import main`: routers, document parsers, HTTP client
+LAZY_MODULES = ("routes.", "pypdf", "httpx")
+
+
+def scratch_env(data_dir: str, **extra) -> dict:
+    return dict(
+        os.environ,
+        USER_DB_PATH=os.path.join(data_dir, "users.sqlite3"),
+        DOCUMENT_STORE_DIR=os.path.join(data_dir, "documents"),
+        JOB_DB_PATH=os.path.join(data_dir, "jobs.sqlite3"),
+        RESULT_CACHE_PATH="",
+        LOG_LEVEL="WARNING",
+        **extra,
+    )
+
+
+def import_profile(code: str, env: dict) -> dict:
+    """
+    module -> (self microseconds, cumulative microseconds) from -X importtime.
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=BACKEND_DIR, env=env, capture_output=True, text=True, check=True,
+    )
+    profile = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        profile[name.strip()] = (int(self_us), int(cumulative_us))
+    return profile
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def wait_for(client: httpx.Client, path: str, deadline: float) -> float:
+    while time.perf_counter() < deadline:
+        try:
+            if client.get(path).status_code == 200:
+                return time.perf_counter()
+        except httpx.TransportError:
+            pass
+        time.sleep(0.005)
+    raise RuntimeError(f"{path} did not answer in time")
+
+
+def serve_once(env: dict, warm_up: bool) -> dict:
+    port = free_port()
+    env = dict(env, WARM_UP="true" if warm_up else "false")
+    started = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", str(port), "--log-level", "warning"],
+        cwd=BACKEND_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        with httpx.Client(base_url=f"http://127.0.0.1:{port}", timeout=30) as client:
+            result = {"first_response": wait_for(client, "/", started + 60) - started}
+            if warm_up:
+                result["ready"] = wait_for(client, "/ready", started + 60) - started
+            else:
+                # Each request to a router's prefix; the first also imports it
+                for key in ("first_lazy_request", "second_lazy_request"):
+                    start = time.perf_counter()
+                    client.get("/documents/")
+                    result[key] = time.perf_counter() - start
+        return result
+    finally:
+        process.terminate()
+        process.wait(timeout=30)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cold start benchmark")
+    parser.add_argument("--repeat", type=int, default=5, help="fresh interpreters / servers per measurement")
+    parser.add_argument("--top", type=int, default=15, help="modules and packages listed")
+    parser.add_argument("--max-import-ms", type=float, default=500.0)
+    args = parser.parse_args()
+
+    data_dir = tempfile.mkdtemp(prefix="lawmind-cold-")
+    try:
+        env = scratch_env(data_dir)
+        baseline = statistics.median(import_profile("pass", env).get("site", (0, 0))[1] for _ in range(args.repeat))
+        profiles = [import_profile("import main", env) for _ in range(args.repeat)]
+        import_ms = statistics.median(profile["main"][1] for profile in profiles) / 1000
+        print(f"import main: {import_ms:.1f}ms median of {args.repeat} "
+              f"(interpreter start-up imports, not counted: {baseline / 1000:.1f}ms)")
+
+        profile = profiles[len(profiles) // 2]
+        print(f"\nSlowest modules (cumulative, including what they import):")
+        for name, (_, cumulative) in sorted(profile.items(), key=lambda item: -item[1][1])[:args.top]:
+            print(f"  {name:<44} {cumulative / 1000:8.1f}ms")
+        packages = {}
+        for name, (self_us, _) in profile.items():
+            packages[name.split(".")[0]] = packages.get(name.split(".")[0], 0) + self_us
+        print(f"\nTime by top-level package (own import time of its modules):")
+        for name, self_us in sorted(packages.items(), key=lambda item: -item[1])[:args.top]:
+            print(f"  {name:<44} {self_us / 1000:8.1f}ms")
+
+        eager = sorted(name for name in profile if name.startswith(LAZY_MODULES))
+        runs = {warm_up: [serve_once(env, warm_up) for _ in range(args.repeat)] for warm_up in (False, True)}
+        print("\nServing (median of runs, from process start):")
+        for warm_up, key, label in (
+            (False, "first_response", "first response to /"),
+            (False, "first_lazy_request", "first /documents/ request (imports the router)"),
+            (False, "second_lazy_request", "second /documents/ request"),
+            (True, "first_response", "first response to / with WARM_UP"),
+            (True, "ready", "/ready with WARM_UP"),
+        ):
+            print(f"  {label:<48} {statistics.median(run[key] for run in runs[warm_up]) * 1000:8.1f}ms")
+    finally:
+        shutil.rmtree(data_dir, ignore_errors=True)
+
+    failed = False
+    if import_ms > args.max_import_ms:
+        print(f"Importing the app took {import_ms:.1f}ms, over the {args.max_import_ms}ms limit")
+        failed = True
+    if eager:
+        print(f"Imported at startup but should load on first use: {', '.join(eager)}")
+        failed = True
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+# Benchmark: services sharing one DocumentFeatures vs each service given the raw text
+#
+# Runs the full analysis pipeline (extraction, summary and insights, as the
+# streaming comprehensive analysis does) on multi-megabyte contracts.
+#
+# Usage (from the backend directory):
+#     python benchmarks/bench_document_features.py [--sizes-mb 1 4 10] [--repeat 3]
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import corpus
+from services import cerebras_service, llama_service
+from services.document_features import DocumentFeatures
+
+
+async def pipeline(document):
+    extraction = cerebras_service.extract_clauses_sync(document)
+    summary = await llama_service.summarize_and_score(document)
+    insights = await cerebras_service.analyze_contract(document)
+    return extraction, summary, insights
+
+
+async def per_service(text: str):
+    # Every service derives what it needs from the raw text on its own
+    return await pipeline(text)
+
+
+async def shared(text: str):
+    return await pipeline(DocumentFeatures(text))
+
+
+def best_of(function, text: str, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = asyncio.run(function(text))
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes-mb", type=float, nargs="+", default=[1, 4, 10])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'size':>8} {'per-service':>14} {'shared':>12} {'saving':>8}")
+    for size_mb in args.sizes_mb:
+        text = corpus.generate_contract(int(size_mb * 1024 * 1024))
+        separate_seconds, separate_result = best_of(per_service, text, args.repeat)
+        shared_seconds, shared_result = best_of(shared, text, args.repeat)
+        assert separate_result == shared_result, "shared features changed the output"
+        saving = 1 - shared_seconds / separate_seconds
+        print(f"{size_mb:>6.1f}MB {separate_seconds * 1000:>12.1f}ms {shared_seconds * 1000:>10.1f}ms {saving:>7.1%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+# Benchmark: entity scanner vs the old backtracking party/date regexes on adversarial input
+#
+# Usage (from the backend directory):
+#     python benchmarks/bench_entity_scanner.py [--max-kb 1024] [--fuzz 200]
+#
+# Exits with status 1 if the scanner's time grows clearly faster than the
+# input (more than --max-growth times per doubling) or if fuzzing raises.
+import argparse
+import os
+import random
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services import entity_scanner
+
+# The party/date patterns the scanner replaced, kept here for comparison
+LEGACY_PARTY_PATTERNS = [
+    r'(?:between|by and between)\s+([^,]+?),?\s+(?:a\s+[^\s]+?\s+corporation\s+)?\(\s*["\']?[Pp]arty\s*[Aa]["\']?\s*\)\s*,?\s+and\s+([^,]+?),?\s+(?:a\s+[^\s]+?\s+corporation\s+)?\(\s*["\']?[Pp]arty\s*[Bb]["\']?\s*\)',
+    r'(?:between|by and between)\s+([^,]+?)\s*,?\s+and\s+([^,]+?)(?:\s*\n|\.\s|\s*\(?\s*["\']?[Pp]arty)',
+    r'([^,]+?)\s*\(\s*["\']?[Dd]isclosing\s*[Pp]arty["\']?\s*\)\s+and\s+([^,]+?)\s*\(\s*["\']?[Rr]eceiving\s*[Pp]arty["\']?\s*\)',
+    r'([^,]+?)\s*\(\s*["\']?[Cc]lient["\']?\s*\)\s+and\s+([^,]+?)\s*\(\s*["\']?[Ss]ervice\s*[Pp]rovider["\']?\s*\)',
+]
+LEGACY_SIMPLE_PATTERNS = [
+    r'(?:between|by and between)\s+([^,]+?)\s+and\s+([^,]+?)(?:\s*\n|\.|\s*\(?\s*party)',
+    r'([^,]+?)\s+and\s+([^,]+?)\s+as\s+of',
+]
+LEGACY_DATE_PATTERN = r'\b(?:January|February|March|April|May|June|July|August|September|October|November|December)\s+\d{1,2},?\s+\d{4}'
+
+
+def legacy_scan(text: str):
+    for pattern in LEGACY_PARTY_PATTERNS:
+        if re.findall(pattern, text, re.IGNORECASE | re.DOTALL):
+            break
+    else:
+        for pattern in LEGACY_SIMPLE_PATTERNS:
+            if re.findall(pattern, text, re.IGNORECASE):
+                break
+    re.findall(LEGACY_DATE_PATTERN, text, re.IGNORECASE)
+
+
+def scanner_scan(text: str):
+    entity_scanner.scan_parties(text)
+    entity_scanner.scan_dates(text)
+
+
+def _repeat_to(unit: str, size: int) -> str:
+    return (unit * (size // len(unit) + 1))[:size]
+
+
+# Inputs shaped to make lazy [^,]+? groups and unbounded \s+ runs backtrack
+ADVERSARIAL = {
+    "comma-free words": lambda size: _repeat_to("the party shall deliver goods ", size),
+    "between, no and": lambda size: "between " + _repeat_to("acme ", size),
+    "repeated between": lambda size: _repeat_to("between acme corp ", size),
+    "and without as of": lambda size: _repeat_to("alpha and beta ", size),
+    "dangling labels": lambda size: _repeat_to("x (Client) and y ", size),
+    "month then spaces": lambda size: _repeat_to("January" + " " * 40, size),
+    "whitespace only": lambda size: " " * size,
+}
+
+FUZZ_FRAGMENTS = [
+    "between ", "by and between ", " and ", ", ", "(", ")", '("Party A")', "(Party B)",
+    "(Client)", "(Service Provider)", "(Disclosing Party)", "(Receiving Party)", " as of ",
+    "January ", "1", "31", ", ", "2025", "-", "\n", "\n\n", ". ", "a Delaware corporation ",
+    "Acme Corp", "Beta LLC", "  ", '"', "’", "day of ", "st ",
+]
+
+
+def timed(function, text: str, repeat: int = 1) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function(text)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def growth_table(name: str, function, make, sizes: list, budget: float, repeat: int = 1) -> list:
+    """
+    Time `function` on inputs of increasing size; stop once one run exceeds
+    `budget` seconds (the legacy regexes reach it very quickly).
+    """
+    timings = []
+    for size in sizes:
+        seconds = timed(function, make(size), repeat)
+        timings.append((size, seconds))
+        if seconds > budget:
+            break
+    cells = "  ".join(f"{size // 1024:>5}KB {seconds * 1000:>9.2f}ms" for size, seconds in timings)
+    print(f"  {name:<8} {cells}")
+    return timings
+
+
+def worst_growth(timings: list) -> float:
+    # Ratio of successive timings for doubling input sizes, ignoring runs
+    # too short to measure reliably
+    ratios = [
+        later / max(earlier, 1e-4)
+        for (_, earlier), (_, later) in zip(timings, timings[1:])
+        if later > 0.005
+    ]
+    return max(ratios, default=1.0)
+
+
+def fuzz(cases: int, size: int, seed: int = 7):
+    rng = random.Random(seed)
+    slowest = 0.0
+    for _ in range(cases):
+        text = "".join(rng.choice(FUZZ_FRAGMENTS) for _ in range(size // 8))
+        slowest = max(slowest, timed(scanner_scan, text))
+    return slowest
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--max-kb", type=int, default=1024)
+    parser.add_argument("--fuzz", type=int, default=200, help="number of random documents")
+    parser.add_argument("--legacy-budget", type=float, default=2.0,
+                        help="stop timing the legacy regexes past this many seconds")
+    parser.add_argument("--max-growth", type=float, default=3.0,
+                        help="largest allowed time ratio when the input doubles")
+    args = parser.parse_args()
+
+    sizes = []
+    size = 1024
+    while size <= args.max_kb * 1024:
+        sizes.append(size)
+        size *= 2
+
+    failures = []
+    for name, make in ADVERSARIAL.items():
+        print(f"{name}:")
+        growth_table("legacy", legacy_scan, make, sizes, args.legacy_budget)
+        timings = growth_table("scanner", scanner_scan, make, sizes, float("inf"), repeat=3)
+        growth = worst_growth(timings)
+        if growth > args.max_growth:
+            failures.append(f"{name}: scanner time grew {growth:.1f}x when the input doubled")
+
+    slowest = fuzz(args.fuzz, 16 * 1024)
+    print(f"fuzz: {args.fuzz} random 16KB documents, slowest {slowest * 1000:.2f}ms")
+
+    for failure in failures:
+        print(f"FAIL {failure}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
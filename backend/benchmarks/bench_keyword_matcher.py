@@ -0,0 +1,143 @@
+# Benchmark: keyword matcher vs the code it replaced, on 1 MB documents
+#
+# Times clause typing and the summary keyword checks against the legacy
+# loops they replaced (first-match any() per section, one lower() per
+# summary keyword), then, separately, scan()'s every-hit-with-offsets pass
+# against str.find per keyword, with each automaton backend.
+#
+# Usage (from the backend directory):
+#     python benchmarks/bench_keyword_matcher.py [--size-mb 1] [--repeat 5]
+#
+# Exits with status 1 if the matcher is more than 10% slower than the legacy code.
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services import cerebras_service, keyword_matcher
+
+# Mostly ordinary contract vocabulary with a sprinkling of clause keywords
+SAMPLE_WORDS = (
+    "the parties hereto agree that each party shall use reasonable efforts to perform its "
+    "obligations under this agreement in accordance with the schedule and the statement of "
+    "work provided that notice is given in writing to the address set out above and that "
+    "any assignment amendment or waiver is signed by an authorized officer of both parties "
+    "confidential payment terminate liability warranty jurisdiction dispute duration"
+).split()
+
+# Extra dictionary entries used to show how each approach scales with dictionary size
+EXTRA_KEYWORDS = {
+    f"extra_{index}": [f"clause{index}x", f"provision{index}y", f"covenant{index}z"]
+    for index in range(60)
+}
+
+
+def generate_document(size_bytes: int, seed: int = 42) -> str:
+    rng = random.Random(seed)
+    words = []
+    length = 0
+    while length < size_bytes:
+        word = rng.choice(SAMPLE_WORDS)
+        words.append(word)
+        length += len(word) + 1
+        if rng.random() < 0.01:
+            words.append("\n\n")
+    return " ".join(words)[:size_bytes]
+
+
+def legacy_summary_checks(text: str) -> list:
+    # The pre-matcher summarize_and_score: one lower() and one scan per keyword
+    return [
+        group for group, keywords in keyword_matcher.SUMMARY_KEYWORDS.items()
+        if any(keyword in text.lower() for keyword in keywords)
+    ]
+
+
+def legacy_type(section: str) -> str:
+    # The pre-matcher extract_clauses loop, verbatim: the first type with any keyword wins
+    section_lower = section.lower()
+    for ctype, keywords in keyword_matcher.CLAUSE_KEYWORDS.items():
+        if any(keyword in section_lower for keyword in keywords):
+            return ctype
+    return None
+
+
+def legacy_pipeline(text: str, sections: list) -> tuple:
+    return [legacy_type(section) for section in sections], legacy_summary_checks(text)
+
+
+def matcher_pipeline(text: str, sections: list) -> tuple:
+    types = [keyword_matcher.clause_matcher.first_group(section.lower()) for section in sections]
+    return types, keyword_matcher.summary_matcher.present(text.lower())
+
+
+def find_all(text_lower: str, keyword_groups: dict) -> dict:
+    # Every hit with str.find per keyword, the same counts and offsets scan() returns
+    hits = {}
+    for group, keywords in keyword_groups.items():
+        offsets = []
+        for keyword in keywords:
+            index = text_lower.find(keyword)
+            while index != -1:
+                offsets.append(index)
+                index = text_lower.find(keyword, index + 1)
+        if offsets:
+            hits[group] = {"count": len(offsets), "offsets": sorted(offsets)}
+    return hits
+
+
+def best_of(function, text: str, repeat: int, *args) -> float:
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        function(text, *args)
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--size-mb", type=float, default=1.0)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    text = generate_document(int(args.size_mb * 1024 * 1024))
+    print(f"document size:    {len(text) / 1024 / 1024:.2f} MB")
+
+    # Typing and summary checks, against the code the matcher replaced
+    sections = cerebras_service.split_sections(text)
+    assert legacy_pipeline(text, sections) == matcher_pipeline(text, sections), "matcher and legacy code disagree"
+    legacy = best_of(legacy_pipeline, text, args.repeat, sections)
+    matcher = best_of(matcher_pipeline, text, args.repeat, sections)
+    print("\nclause typing and summary keywords")
+    print(f"  {'legacy code':<30}{legacy * 1000:.1f} ms")
+    print(f"  {'keyword matcher':<30}{matcher * 1000:.1f} ms ({legacy / matcher:.2f}x)")
+    failed = matcher > legacy * 1.1
+
+    # Every hit with its offset, which the legacy code never computed
+    text_lower = text.lower()
+    extended_groups = dict(keyword_matcher.CLAUSE_KEYWORDS, **EXTRA_KEYWORDS)
+    for name, groups in (("clause dictionary", keyword_matcher.CLAUSE_KEYWORDS),
+                         (f"{len(extended_groups)}-type dictionary", extended_groups)):
+        print(f"\nall hits and offsets, {name}")
+        finds = best_of(find_all, text_lower, args.repeat, groups)
+        print(f"  {'str.find per keyword':<30}{finds * 1000:.1f} ms")
+        backends = [("pure-Python automaton", True)]
+        if keyword_matcher.ahocorasick is not None:
+            backends.insert(0, ("pyahocorasick", False))
+        for backend, pure_python in backends:
+            matcher = keyword_matcher.KeywordMatcher(groups, pure_python=pure_python)
+            assert matcher.scan(text_lower) == find_all(text_lower, groups), f"{backend} disagrees with str.find"
+            scan = best_of(lambda value: matcher.scan(value), text_lower, args.repeat)
+            print(f"  {'scan(), ' + backend:<30}{scan * 1000:.1f} ms ({finds / scan:.2f}x)")
+
+    if failed:
+        print("\nThe keyword matcher is slower than the code it replaced")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+# Benchmark: long-document mode (chunked map-reduce)
+#
+# Extracts the clauses of generated contracts with a known number of
+# numbered clauses, below and above LONGDOC_THRESHOLD, and checks that
+# every clause comes back exactly once, including clauses repeated word for
+# word. Also scores a contract whose risk keywords are far apart, cut just
+# below and just above the threshold, which must get the same risk score.
+#
+# Usage (from the backend directory):
+#     python benchmarks/bench_long_document.py [--clauses 100,300,450]
+#
+# Exits with status 1 if a long document does not return one clause per
+# section, or the risk score changes at the threshold.
+import argparse
+import asyncio
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import corpus
+from config import Config
+from services import longdoc_service
+
+# Sections without any of the scorer's keywords
+NEUTRAL_SENTENCE = "Any notice under this Agreement shall be in writing and delivered to the address set out above."
+
+
+def numbered_contract(clauses: int, seed: int = 0) -> str:
+    """
+    A preamble and `clauses` numbered clauses of one or two sentences;
+    about one in ten repeats an earlier clause word for word.
+    """
+    rng = random.Random(seed)
+    name, counterparty = corpus.PARTIES[0]
+    lines = [f"This Agreement is made between {name} and {counterparty} on January 1, 2024.", ""]
+    bodies = []
+    for number in range(1, clauses + 1):
+        if bodies and rng.random() < 0.1:
+            body = rng.choice(bodies)
+        else:
+            body = " ".join(rng.sample(corpus.SENTENCES, rng.randint(1, 2)))
+            bodies.append(body)
+        lines.append(f"{number}. {body}")
+    return "\n".join(lines)
+
+
+def spread_keywords_contract(size: int) -> str:
+    """
+    A liability clause first and a confidentiality clause last, with
+    neutral clauses in between: no chunk of a long document sees both.
+    """
+    lines = ["1. In no event shall either party be liable beyond its liability cap."]
+    while sum(len(line) + 1 for line in lines) < size:
+        lines.append(f"{len(lines) + 1}. {NEUTRAL_SENTENCE}")
+    lines.append(f"{len(lines) + 1}. The Recipient shall keep all Confidential Information secret.")
+    return "\n".join(lines)
+
+
+async def run(args) -> bool:
+    failed = False
+    print(f"{'clauses':>8} {'chars':>8} {'long':>5} {'returned':>9} {'seconds':>8}")
+    for count in map(int, args.clauses.split(",")):
+        text = numbered_contract(count, seed=count)
+        start = time.perf_counter()
+        extraction = await longdoc_service.extract_clauses(text)
+        seconds = time.perf_counter() - start
+        returned = len(extraction["clauses"])
+        long = longdoc_service.is_long_document(text)
+        print(f"{count:>8} {len(text):>8} {str(long):>5} {returned:>9} {seconds:>8.3f}")
+        # One clause per numbered section, plus the preamble
+        expected = min(count + 1, Config.LONGDOC_MAX_CLAUSES)
+        if long and returned != expected:
+            print(f"  expected {expected} clauses")
+            failed = True
+
+    threshold = Config.LONGDOC_THRESHOLD
+    below = await longdoc_service.summarize_and_score(spread_keywords_contract(threshold - 200))
+    above = await longdoc_service.summarize_and_score(spread_keywords_contract(threshold + 200))
+    print(f"risk score just below the threshold {below['risk_score']}, just above {above['risk_score']}")
+    if below["risk_score"] != above["risk_score"]:
+        print("  the risk score changes at LONGDOC_THRESHOLD")
+        failed = True
+    return failed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Long-document mode benchmark")
+    parser.add_argument("--clauses", default="100,300,450", help="comma-separated clause counts")
+    args = parser.parse_args()
+    if asyncio.run(run(args)):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
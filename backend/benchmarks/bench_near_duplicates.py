@@ -0,0 +1,93 @@
+# Benchmark: near-duplicate clause detection (MinHash/LSH)
+#
+# Builds boilerplate clauses from the benchmark corpus sentences and indexes
+# them, then looks up (a) variants of indexed clauses with party names,
+# numbers and dates changed and (b) clauses assembled from other sentences.
+# For each lookup the exact Jaccard similarity of the shingle sets says
+# whether a match was right: reports the hit rate, how many matches were
+# below the threshold in truth, how many true near duplicates were missed,
+# and the time to sign and look up a clause, at several thresholds.
+#
+# Usage (from the backend directory):
+#     python benchmarks/bench_near_duplicates.py [--clauses 2000]
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import corpus
+from services import near_duplicates
+
+NAMES = ["Acme Corp", "Beta LLC", "Northwind Traders", "Contoso Ltd", "Fabrikam Inc", "Initech"]
+
+
+def make_clause(rng: random.Random) -> str:
+    sentences = rng.sample(corpus.SENTENCES, rng.randint(2, 4))
+    return f"{rng.choice(NAMES)} and {rng.choice(NAMES)} agree as follows. " + " ".join(sentences)
+
+
+def make_variant(clause: str, rng: random.Random) -> str:
+    # Boilerplate reused in another contract: other parties, numbers and dates
+    for name in NAMES:
+        clause = clause.replace(name, rng.choice(NAMES))
+    for old, new in (("thirty (30)", "sixty (60)"), ("forty-five (45)", "thirty (30)"), ("Delaware", "New York")):
+        if rng.random() < 0.5:
+            clause = clause.replace(old, new)
+    return clause
+
+
+def jaccard(first: set, second: set) -> float:
+    return len(first & second) / len(first | second) if first | second else 0.0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Near-duplicate clause detection benchmark")
+    parser.add_argument("--clauses", type=int, default=2000, help="clauses indexed, and looked up per kind")
+    parser.add_argument("--thresholds", default="0.7,0.8,0.9", help="comma-separated similarity thresholds")
+    args = parser.parse_args()
+
+    rng = random.Random(7)
+    indexed = [make_clause(rng) for _ in range(args.clauses)]
+    queries = [make_variant(rng.choice(indexed), rng) for _ in range(args.clauses)]
+    queries += [make_clause(rng) for _ in range(args.clauses)]
+
+    start = time.perf_counter()
+    indexed_signatures = [near_duplicates.signature(clause) for clause in indexed]
+    query_signatures = [near_duplicates.signature(clause) for clause in queries]
+    sign_ms = (time.perf_counter() - start) * 1000 / (len(indexed) + len(queries))
+    print(f"{len(indexed)} clauses indexed, {len(queries)} lookups; signature {sign_ms:.2f}ms per clause")
+
+    # Exact similarity of each query to its closest indexed clause
+    indexed_shingles = [near_duplicates.shingles(clause) for clause in indexed]
+    query_shingles = [near_duplicates.shingles(clause) for clause in queries]
+    best_jaccard = [max(jaccard(query, clause) for clause in indexed_shingles) for query in query_shingles]
+
+    for threshold in (float(value) for value in args.thresholds.split(",")):
+        index = near_duplicates.NearDuplicateIndex(threshold=threshold, max_entries=len(indexed))
+        for position, clause_signature in enumerate(indexed_signatures):
+            index.add(clause_signature, position)
+        timings = []
+        wrong = missed = 0
+        for query, clause_signature, truth in zip(query_shingles, query_signatures, best_jaccard):
+            start = time.perf_counter()
+            match = index.lookup(clause_signature)
+            timings.append(time.perf_counter() - start)
+            if match is not None and jaccard(query, indexed_shingles[match[0]]) < threshold - 0.05:
+                wrong += 1
+            elif match is None and truth >= threshold + 0.05:
+                missed += 1
+        stats = index.stats()
+        print(
+            f"threshold {threshold:.2f}  hit rate {stats['hit_rate']:.3f}  "
+            f"matches >0.05 below threshold {wrong}  near duplicates >0.05 above threshold missed {missed}  "
+            f"candidates {stats['average_candidates']:.1f}  lookup p50 {statistics.median(timings) * 1000:.3f}ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+# Benchmark: PDF page cache
+#
+# Parses generated PDFs of several sizes (1) without the page cache, (2)
+# with an empty cache, which adds hashing and storing the pages, (3) again,
+# as a re-upload of the same file, and (4) as a revision with a few pages
+# edited, which re-parses only those. Every cached parse must return the
+# same text as the uncached one.
+#
+# Usage (from the backend directory):
+#     python benchmarks/bench_pdf_cache.py [--pages 10,100,500] [--changed 3]
+#
+# Exits with status 1 if any text differs, or a re-upload takes longer than
+# --max-reupload-ms.
+import argparse
+import os
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import corpus
+from services import pdf_cache, pdf_service
+
+
+def timed(pdf: bytes, repeat: int) -> tuple:
+    seconds = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = pdf_service.extract_pdf(pdf)
+        seconds.append(time.perf_counter() - start)
+    return statistics.median(seconds) * 1000, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="PDF page cache benchmark")
+    parser.add_argument("--pages", default="10,100,500", help="comma-separated page counts")
+    parser.add_argument("--changed", type=int, default=3, help="pages edited in the revision")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--max-reupload-ms", type=float, default=50.0)
+    args = parser.parse_args()
+
+    cache_dir = tempfile.mkdtemp(prefix="lawmind-pdf-cache-")
+    failed = False
+    print(f"{'pages':>6} {'uncached':>10} {'first':>10} {'re-upload':>10} {'revision':>10}  reused")
+    try:
+        for page_count in map(int, args.pages.split(",")):
+            pages = corpus.generate_pdf_pages(page_count)
+            pdf = corpus.make_pdf(pages)
+            rng = random.Random(page_count)
+            for index in rng.sample(range(page_count), min(args.changed, page_count)):
+                pages[index] = pages[index].replace("shall", "must", 1) + "\nAmended by agreement of the parties."
+            revision = corpus.make_pdf(pages)
+
+            pdf_cache.pdf_page_cache = None
+            uncached_ms, uncached = timed(pdf, args.repeat)
+            _, revised = timed(revision, 1)
+
+            # A fresh cache per measurement of the first parse, so each one misses
+            first = []
+            for run in range(args.repeat):
+                pdf_cache.pdf_page_cache = pdf_cache.PdfPageCache(
+                    os.path.join(cache_dir, f"{page_count}-{run}.sqlite3"), 1 << 30
+                )
+                first.append(timed(pdf, 1)[0])
+            reupload_ms, reuploaded = timed(pdf, args.repeat)
+            revision_ms, revision_result = timed(revision, 1)
+
+            print(f"{page_count:>6} {uncached_ms:>8.1f}ms {statistics.median(first):>8.1f}ms "
+                  f"{reupload_ms:>8.1f}ms {revision_ms:>8.1f}ms  "
+                  f"{revision_result['cached_pages']}/{page_count} revision pages")
+            if reuploaded["text"] != uncached["text"] or revision_result["text"] != revised["text"]:
+                print(f"  cached text differs from the uncached parse for {page_count} pages")
+                failed = True
+            if reupload_ms > args.max_reupload_ms:
+                print(f"  re-upload took {reupload_ms:.1f}ms, over the {args.max_reupload_ms}ms limit")
+                failed = True
+    finally:
+        pdf_service.shutdown_pool()
+        shutil.rmtree(cache_dir, ignore_errors=True)
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
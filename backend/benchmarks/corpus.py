@@ -0,0 +1,178 @@
+# Generated benchmark corpus: contract-like text of any size, multi-page PDFs and Word documents
+import random
+import zipfile
+from io import BytesIO
+from xml.sax.saxutils import escape
+
+PARTIES = [
+    ("TechCorp Solutions Inc.", "John Smith"),
+    ("Acme Holdings LLC", "Beta Logistics Ltd."),
+    ("Northwind Traders", "Contoso Consulting Group"),
+]
+
+SECTION_TITLES = [
+    "CONFIDENTIALITY", "TERM AND TERMINATION", "PAYMENT TERMS", "LIMITATION OF LIABILITY",
+    "WARRANTIES", "INTELLECTUAL PROPERTY", "GOVERNING LAW", "ASSIGNMENT", "NOTICES",
+    "FORCE MAJEURE", "DISPUTE RESOLUTION", "ENTIRE AGREEMENT",
+]
+
+SENTENCES = [
+    "The Recipient shall hold all Confidential Information in strict confidence and shall not disclose it to any third party.",
+    "Either party may terminate this Agreement upon thirty (30) days written notice to the other party.",
+    "All invoices are payable within forty-five (45) days of receipt, and late payment shall accrue interest.",
+    "In no event shall either party be liable for indirect, incidental or consequential damages.",
+    "The Company warrants that the services will be performed in a professional and workmanlike manner.",
+    "All intellectual property developed under this Agreement shall remain the sole property of the Company.",
+    "This Agreement shall be governed by the laws of the State of Delaware without regard to conflict of laws.",
+    "Neither party may assign this Agreement without the prior written consent of the other party.",
+    "Any notice under this Agreement shall be in writing and delivered to the address set out above.",
+    "The obligations in this section survive the expiration or termination of this Agreement.",
+    "The parties shall first attempt to resolve any dispute through good faith negotiation.",
+    "Payment of fees is subject to the indemnification and warranty provisions of this Agreement.",
+]
+
+MONTHS = ["January", "March", "June", "September", "December"]
+
+
+def generate_contract(size: int, seed: int = 0) -> str:
+    """
+    A contract of about `size` characters: a preamble naming two parties and
+    dates, then numbered sections of boilerplate sentences.
+    """
+    rng = random.Random(seed)
+    first, second = PARTIES[seed % len(PARTIES)]
+    parts = [
+        "NON-DISCLOSURE AND SERVICES AGREEMENT\n\n"
+        f"This Agreement is entered into as of {rng.choice(MONTHS)} {rng.randint(1, 28)}, 2025, "
+        f"by and between {first}, a Delaware corporation (\"Company\"), and {second} (\"Recipient\").\n"
+    ]
+    length = len(parts[0])
+    number = 1
+    while length < size:
+        section = [f"\n{number}. {rng.choice(SECTION_TITLES)}\n"]
+        for _ in range(rng.randint(2, 6)):
+            section.append(rng.choice(SENTENCES) + " ")
+        if rng.random() < 0.1:
+            section.append(f"This section expires on {rng.choice(MONTHS)} {rng.randint(1, 28)}, {rng.randint(2026, 2030)}. ")
+        section.append("\n")
+        chunk = "".join(section)
+        parts.append(chunk)
+        length += len(chunk)
+        number += 1
+    return "".join(parts)[:size]
+
+
+def _escape(line: str) -> str:
+    return line.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def make_pdf(pages: list) -> bytes:
+    """
+    A minimal valid PDF with one text page per entry of `pages`
+    (Helvetica, one text line per input line, latin-1 only).
+    """
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        None,  # page tree, filled in below
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    kids = []
+    for page in pages:
+        lines = " ".join(f"({_escape(line)}) Tj T*" for line in page.split("\n"))
+        stream = f"BT /F1 10 Tf 50 750 Td 12 TL {lines} ET".encode("latin-1", errors="replace")
+        page_number = len(objects) + 1
+        kids.append(f"{page_number} 0 R")
+        objects.append(
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+            f"/Resources << /Font << /F1 3 0 R >> >> /Contents {page_number + 1} 0 R >>".encode()
+        )
+        objects.append(b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream")
+    objects[1] = f"<< /Type /Pages /Kids [{' '.join(kids)}] /Count {len(pages)} >>".encode()
+
+    output = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(output))
+        output += f"{number} 0 obj\n".encode() + body + b"\nendobj\n"
+    xref = len(output)
+    output += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode()
+    for offset in offsets:
+        output += f"{offset:010d} 00000 n \n".encode()
+    output += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode()
+    return bytes(output)
+
+
+def generate_pdf_pages(page_count: int, chars_per_page: int = 3000, seed: int = 0) -> list:
+    """
+    The text of `page_count` pages of contract text for make_pdf, about
+    `chars_per_page` each.
+    """
+    text = generate_contract(page_count * chars_per_page, seed)
+    pages = []
+    for start in range(0, len(text), chars_per_page):
+        # Keep lines short enough to fit the page width
+        page = text[start:start + chars_per_page]
+        lines = []
+        for paragraph in page.split("\n"):
+            while len(paragraph) > 90:
+                lines.append(paragraph[:90])
+                paragraph = paragraph[90:]
+            lines.append(paragraph)
+        pages.append("\n".join(lines))
+    return pages[:page_count]
+
+
+def generate_pdf(page_count: int, chars_per_page: int = 3000, seed: int = 0) -> bytes:
+    """
+    A `page_count`-page PDF of contract text, about `chars_per_page` per page.
+    """
+    return make_pdf(generate_pdf_pages(page_count, chars_per_page, seed))
+
+
+_DOCX_CONTENT_TYPES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+    '<Default Extension="xml" ContentType="application/xml"/>'
+    '<Override PartName="/word/document.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.wordprocessingml.document.main+xml"/>'
+    '</Types>'
+)
+_DOCX_RELATIONSHIPS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+    'Target="word/document.xml"/>'
+    '</Relationships>'
+)
+
+
+def make_docx(paragraphs: list) -> bytes:
+    """
+    A minimal valid .docx with one paragraph (of one run) per entry of
+    `paragraphs`.
+    """
+    body = "".join(
+        f'<w:p><w:r><w:t xml:space="preserve">{escape(paragraph)}</w:t></w:r></w:p>' for paragraph in paragraphs
+    )
+    document = (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<w:document xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main">'
+        f'<w:body>{body}<w:sectPr/></w:body></w:document>'
+    )
+    output = BytesIO()
+    with zipfile.ZipFile(output, "w", zipfile.ZIP_DEFLATED) as archive:
+        archive.writestr("[Content_Types].xml", _DOCX_CONTENT_TYPES)
+        archive.writestr("_rels/.rels", _DOCX_RELATIONSHIPS)
+        archive.writestr("word/document.xml", document)
+    return output.getvalue()
+
+
+def generate_docx(size: int, seed: int = 0) -> bytes:
+    """
+    A .docx holding about `size` characters of contract text, one paragraph
+    per line.
+    """
+    return make_docx(generate_contract(size, seed).split("\n"))
+
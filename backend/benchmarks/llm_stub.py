@@ -0,0 +1,69 @@
+# Local OpenAI-compatible chat completions stub for exercising the LLM client
+#
+# Usage (from the backend directory):
+#     uvicorn benchmarks.llm_stub:app --port 9000
+# then point the backend at it:
+#     LLM_ENABLED=True LLAMA_BASE_URL=http://127.0.0.1:9000/v1 \
+#     CEREBRAS_BASE_URL=http://127.0.0.1:9000/v1 python main.py
+#
+# LLM_STUB_DELAY (seconds) simulates model latency.
+import asyncio
+import json
+import os
+import re
+import time
+from fastapi import FastAPI
+
+app = FastAPI(title="LawMind LLM stub")
+
+DELAY = float(os.getenv("LLM_STUB_DELAY", "0"))
+
+# Counters so clients can check how many calls they made
+stats = {"requests": 0}
+
+
+def _reply_for(prompt: str) -> str:
+    packed = re.search(r"JSON array of (\d+) objects", prompt)
+    if packed:
+        # Batched prompt from services/llm_batcher: one result per numbered clause
+        wants_risk = '"risk_level"' in prompt
+        return json.dumps([
+            {"index": index, "result": {"risk_level": "Low", "justification": "Stub justification."}
+             if wants_risk else f"Stub summary of clause {index}."}
+            for index in range(int(packed.group(1)))
+        ])
+    if '"risk_score"' in prompt:
+        return json.dumps({
+            "summary": "Stub summary of the document.",
+            "risk_score": 42,
+            "risk_level": "Medium-Low",
+            "key_points": ["Stub key point"],
+            "recommendations": ["Stub recommendation"],
+        })
+    if '"risk_level"' in prompt:
+        return json.dumps({"risk_level": "Low", "justification": "Stub justification."})
+    return f"Stub response to a {len(prompt)}-character prompt."
+
+
+@app.post("/v1/chat/completions")
+async def chat_completions(request: dict):
+    stats["requests"] += 1
+    if DELAY:
+        await asyncio.sleep(DELAY)
+    prompt = request["messages"][-1]["content"]
+    return {
+        "id": f"stub-{stats['requests']}",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": request.get("model", "stub"),
+        "choices": [{
+            "index": 0,
+            "message": {"role": "assistant", "content": _reply_for(prompt)},
+            "finish_reason": "stop",
+        }],
+    }
+
+
+@app.get("/stats")
+async def get_stats():
+    return stats
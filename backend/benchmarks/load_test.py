@@ -0,0 +1,204 @@
+# Load test: throughput of the multi-process server as workers are added
+#
+# Starts `gunicorn -c gunicorn.conf.py main:app` with 1, 2, 4, ... workers (up
+# to the cores available), each time against a fresh data directory, and
+# drives it with concurrent clause extraction requests for --duration
+# seconds. Every request sends a distinct document, so the result cache never
+# answers and each request costs a full extraction. Reports requests/s,
+# p50/p99 latency and the scaling efficiency (speed-up over one worker,
+# divided by the worker count; 1.0 is linear).
+#
+# Usage (from the backend directory):
+#     python benchmarks/load_test.py
+#     python benchmarks/load_test.py --workers 1,2,4,8 --duration 20 --size 50KB
+#
+# Exits with status 1 if the efficiency at the largest worker count falls
+# below --min-efficiency. On a single core there is nothing to scale across,
+# so only the one-worker run happens.
+import argparse
+import asyncio
+import os
+import shutil
+import signal
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import corpus
+from services.cpu_quota import available_cpus
+
+KB = 1024
+USERNAME = "load-test"
+PASSWORD = "load-test-password"
+
+
+def parse_size(value: str) -> int:
+    value = value.strip().upper()
+    if value.endswith("KB"):
+        return int(float(value[:-2]) * KB)
+    return int(value)
+
+
+def percentile(samples: list, fraction: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_server(workers: int, port: int, data_dir: str) -> subprocess.Popen:
+    env = dict(
+        os.environ,
+        BIND=f"127.0.0.1:{port}",
+        WEB_CONCURRENCY=str(workers),
+        USER_DB_PATH=os.path.join(data_dir, "users.sqlite3"),
+        DOCUMENT_STORE_DIR=os.path.join(data_dir, "documents"),
+        JOB_DB_PATH=os.path.join(data_dir, "jobs.sqlite3"),
+        RESULT_CACHE_PATH=os.path.join(data_dir, "results.sqlite3"),
+        PDF_CACHE_PATH=os.path.join(data_dir, "pdf_cache.sqlite3"),
+        METRICS_DIR=os.path.join(data_dir, "metrics"),
+    )
+    return subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py", "main:app"],
+        cwd=BACKEND_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+
+
+def stop_server(process: subprocess.Popen):
+    process.send_signal(signal.SIGTERM)
+    try:
+        process.wait(timeout=30)
+    except subprocess.TimeoutExpired:
+        process.kill()
+        process.wait()
+
+
+async def wait_until_ready(client: httpx.AsyncClient, process: subprocess.Popen, timeout: float = 60):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"Server exited with status {process.returncode}")
+        try:
+            if (await client.get("/")).status_code == 200:
+                return
+        except httpx.TransportError:
+            pass
+        await asyncio.sleep(0.2)
+    raise RuntimeError("Server did not start in time")
+
+
+async def login(client: httpx.AsyncClient) -> str:
+    await client.post("/auth/signup", json={"username": USERNAME, "email": "load@example.com", "password": PASSWORD})
+    response = await client.post("/auth/login", data={"username": USERNAME, "password": PASSWORD})
+    response.raise_for_status()
+    return response.json()["access_token"]
+
+
+async def drive(base_url: str, process: subprocess.Popen, document: str, concurrency: int, duration: float) -> dict:
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, timeout=120, limits=limits) as client:
+        await wait_until_ready(client, process)
+        headers = {"Authorization": f"Bearer {await login(client)}"}
+        latencies = []
+        errors = 0
+        counter = 0
+
+        async def client_loop(deadline: float):
+            nonlocal errors, counter
+            while time.monotonic() < deadline:
+                counter += 1
+                # A distinct document per request, so the result cache never answers
+                text = f"{document}\nReference {counter}."
+                start = time.perf_counter()
+                response = await client.post("/extract/", json={"text": text}, headers=headers)
+                if response.status_code == 200:
+                    latencies.append(time.perf_counter() - start)
+                else:
+                    errors += 1
+
+        # Warm every worker up before measuring
+        await asyncio.gather(*(client_loop(time.monotonic() + 1) for _ in range(concurrency)))
+        latencies.clear()
+        errors = 0
+
+        started = time.monotonic()
+        await asyncio.gather(*(client_loop(started + duration) for _ in range(concurrency)))
+        elapsed = time.monotonic() - started
+
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "rps": len(latencies) / elapsed,
+        "p50_ms": statistics.median(latencies) * 1000 if latencies else 0.0,
+        "p99_ms": percentile(latencies, 0.99) * 1000 if latencies else 0.0,
+    }
+
+
+def run(workers: int, document: str, concurrency: int, duration: float) -> dict:
+    data_dir = tempfile.mkdtemp(prefix="lawmind-load-")
+    port = free_port()
+    process = start_server(workers, port, data_dir)
+    try:
+        return asyncio.run(drive(f"http://127.0.0.1:{port}", process, document, concurrency, duration))
+    finally:
+        stop_server(process)
+        shutil.rmtree(data_dir, ignore_errors=True)
+
+
+def main():
+    cpus = available_cpus()
+    default_workers = [1]
+    while default_workers[-1] * 2 <= cpus:
+        default_workers.append(default_workers[-1] * 2)
+    if default_workers[-1] != cpus:
+        default_workers.append(cpus)
+
+    parser = argparse.ArgumentParser(description="Multi-worker throughput scaling test")
+    parser.add_argument("--workers", default=",".join(map(str, default_workers)),
+                        help="comma-separated worker counts to run")
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds measured per worker count")
+    parser.add_argument("--concurrency", type=int, default=0, help="requests in flight (default 8 per worker)")
+    parser.add_argument("--size", default="20KB", help="size of each document sent")
+    parser.add_argument("--min-efficiency", type=float, default=0.7,
+                        help="fail if the largest run's scaling efficiency is below this")
+    args = parser.parse_args()
+
+    worker_counts = [int(value) for value in args.workers.split(",")]
+    document = corpus.generate_contract(parse_size(args.size))
+    print(f"{cpus} CPUs available; {parse_size(args.size)} byte documents, {args.duration:.0f}s per run")
+
+    single = None
+    efficiency = None
+    for workers in worker_counts:
+        concurrency = args.concurrency or 8 * workers
+        result = run(workers, document, concurrency, args.duration)
+        if single is None:
+            single = result["rps"] / workers
+        efficiency = result["rps"] / (single * workers) if single else 0.0
+        print(
+            f"workers {workers:>3}  concurrency {concurrency:>4}  {result['rps']:>9.1f} req/s  "
+            f"p50 {result['p50_ms']:>8.1f}ms  p99 {result['p99_ms']:>8.1f}ms  "
+            f"efficiency {efficiency:>5.2f}  ({result['requests']} ok, {result['errors']} errors)",
+            flush=True,
+        )
+
+    if len(worker_counts) > 1 and efficiency < args.min_efficiency:
+        print(f"Scaling efficiency {efficiency:.2f} is below {args.min_efficiency}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,298 @@
+# Benchmark suite for the extraction, scoring, parsing and auth hot paths
+#
+# Runs everything in-process (no server needed) over a generated corpus from
+# 1 KB to 10 MB of text plus multi-page PDFs, and records for each case the
+# throughput, p50/p99 latency and peak traced memory.
+#
+# Usage (from the backend directory):
+#     python benchmarks/run_suite.py                      # compare with baseline.json
+#     python benchmarks/run_suite.py --update-baseline    # record a new baseline
+#     python benchmarks/run_suite.py --filter extract --max-size 1MB
+#
+# Exits with status 1 when any metric is worse than the baseline by more than
+# --tolerance (--p99-tolerance for p99; timings also need to be at least --min-delta-ms worse, so
+# sub-millisecond noise does not fail the run). Baselines are machine
+# specific: record one on the machine that runs the comparison.
+#
+# Peak memory is measured with tracemalloc in a separate run, so it covers
+# Python allocations in this process only (not the PDF worker processes).
+import argparse
+import asyncio
+import io
+import json
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Keep the users and documents the benchmarks create out of the real data directory
+SCRATCH_DIR = tempfile.mkdtemp(prefix="lawmind-bench-")
+os.environ.setdefault("USER_DB_PATH", os.path.join(SCRATCH_DIR, "users.sqlite3"))
+os.environ.setdefault("DOCUMENT_STORE_DIR", os.path.join(SCRATCH_DIR, "documents"))
+# Time the PDF parser, not page cache hits on the repeated uploads
+os.environ.setdefault("PDF_CACHE_PATH", "")
+
+from fastapi import UploadFile
+
+import corpus
+from routes import upload
+from services import auth_service, cerebras_service, llama_service
+from services.log_service import log_service
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+
+KB = 1024
+MB = 1024 * KB
+TEXT_SIZES = [1 * KB, 10 * KB, 100 * KB, 1 * MB, 10 * MB]
+PDF_PAGES = [10, 100, 500]
+PDF_CHARS_PER_PAGE = 3000
+DOCX_CONTENT_TYPE = "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
+
+# Lower is better for these metrics, higher is better for throughput
+TIMING_METRICS = ("p50_ms", "p99_ms")
+MEMORY_METRIC = "peak_mem_kb"
+THROUGHPUT_METRIC = "throughput"
+
+
+def size_label(size: int) -> str:
+    return f"{size // MB}MB" if size >= MB else f"{size // KB}KB"
+
+
+def parse_size(value: str) -> int:
+    value = value.strip().upper()
+    for suffix, factor in (("MB", MB), ("KB", KB)):
+        if value.endswith(suffix):
+            return int(float(value[:-len(suffix)]) * factor)
+    return int(value)
+
+
+class Case:
+    """
+    One benchmark: `make()` builds the input once, `run(input)` is timed.
+    Throughput is `units` per second, where units are MB of input for the
+    document cases and calls for the auth cases.
+    """
+
+    def __init__(self, name: str, size: int, make, run, units: float, unit_name: str):
+        self.name = name
+        self.size = size
+        self.make = make
+        self.run = run
+        self.units = units
+        self.unit_name = unit_name
+
+
+def _upload_file(content: bytes, content_type: str, filename: str) -> UploadFile:
+    return UploadFile(filename, file=io.BytesIO(content), content_type=content_type)
+
+
+def build_cases(loop, max_size: int) -> list:
+    user = auth_service.UserInDB(username="bench", email="bench@example.com", hashed_password="x")
+
+    def run_async(coroutine_function):
+        return lambda value: loop.run_until_complete(coroutine_function(value))
+
+    async def upload_text(content):
+        return await upload.upload_file(_upload_file(content, "text/plain", "contract.txt"), False, user)
+
+    async def upload_pdf(content):
+        return await upload.upload_file(_upload_file(content, "application/pdf", "contract.pdf"), False, user)
+
+    async def upload_docx(content):
+        return await upload.upload_file(_upload_file(content, DOCX_CONTENT_TYPE, "contract.docx"), False, user)
+
+    cases = []
+    for size in TEXT_SIZES:
+        if size > max_size:
+            continue
+        label = size_label(size)
+        make_text = lambda size=size: corpus.generate_contract(size)
+        make_bytes = lambda size=size: corpus.generate_contract(size).encode("utf-8")
+        cases.append(Case(f"extract_clauses[{label}]", size, make_text,
+                          run_async(cerebras_service.extract_clauses), size / MB, "MB/s"))
+        cases.append(Case(f"summarize_and_score[{label}]", size, make_text,
+                          run_async(llama_service.summarize_and_score), size / MB, "MB/s"))
+        cases.append(Case(f"upload_text[{label}]", size, make_bytes,
+                          run_async(upload_text), size / MB, "MB/s"))
+        cases.append(Case(f"upload_docx[{label}]", size, lambda size=size: corpus.generate_docx(size),
+                          run_async(upload_docx), size / MB, "MB/s"))
+
+    for pages in PDF_PAGES:
+        size = pages * PDF_CHARS_PER_PAGE
+        if size > max_size:
+            continue
+        cases.append(Case(f"upload_pdf[{pages}pages]", size,
+                          lambda pages=pages: corpus.generate_pdf(pages, PDF_CHARS_PER_PAGE),
+                          run_async(upload_pdf), size / MB, "MB/s"))
+
+    cases.extend(auth_cases(loop))
+    return cases
+
+
+def auth_cases(loop) -> list:
+    username = "bench-suite-user"
+    # Same record shape signup stores
+    auth_service.users_db.add({
+        "username": username,
+        "email": "bench@example.com",
+        "hashed_password": auth_service.get_password_hash("bench"),
+    })
+    token = auth_service.create_access_token({"sub": username})
+
+    def cached(value):
+        return loop.run_until_complete(auth_service.get_current_user(value))
+
+    def cold(value):
+        # Every call verifies the JWT again
+        auth_service.token_cache.clear()
+        return loop.run_until_complete(auth_service.get_current_user(value))
+
+    return [
+        Case("get_current_user[cached]", 0, lambda: token, cached, 1, "calls/s"),
+        Case("get_current_user[cold]", 0, lambda: token, cold, 1, "calls/s"),
+    ]
+
+
+def percentile(samples: list, fraction: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def measure(case: Case, min_seconds: float, min_iterations: int, max_iterations: int) -> dict:
+    value = case.make()
+    case.run(value)  # warm-up
+
+    samples = []
+    started = time.perf_counter()
+    while len(samples) < max_iterations and (
+        len(samples) < min_iterations or time.perf_counter() - started < min_seconds
+    ):
+        start = time.perf_counter()
+        case.run(value)
+        samples.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    baseline_memory = tracemalloc.get_traced_memory()[0]
+    case.run(value)
+    peak_memory = tracemalloc.get_traced_memory()[1] - baseline_memory
+    tracemalloc.stop()
+
+    return {
+        "size_bytes": case.size,
+        "iterations": len(samples),
+        "p50_ms": round(statistics.median(samples) * 1000, 3),
+        "p99_ms": round(percentile(samples, 0.99) * 1000, 3),
+        THROUGHPUT_METRIC: round(case.units / statistics.mean(samples), 3),
+        "throughput_unit": case.unit_name,
+        MEMORY_METRIC: round(max(peak_memory, 0) / KB, 1),
+    }
+
+
+def compare(results: dict, baseline: dict, tolerance: float, p99_tolerance: float, min_delta_ms: float) -> list:
+    """
+    Regressions against the baseline, as human-readable lines.
+    """
+    regressions = []
+    for name, current in results.items():
+        previous = baseline.get(name)
+        if previous is None:
+            continue
+        for metric in TIMING_METRICS:
+            allowed = p99_tolerance if metric == "p99_ms" else tolerance
+            limit = previous[metric] * (1 + allowed)
+            if current[metric] > limit and current[metric] - previous[metric] > min_delta_ms:
+                regressions.append(f"{name}: {metric} {current[metric]} > {previous[metric]} (+{allowed:.0%})")
+        if current[THROUGHPUT_METRIC] < previous[THROUGHPUT_METRIC] / (1 + tolerance):
+            # Only meaningful when the latency moved too
+            if current["p50_ms"] - previous["p50_ms"] > min_delta_ms:
+                regressions.append(
+                    f"{name}: throughput {current[THROUGHPUT_METRIC]} < {previous[THROUGHPUT_METRIC]} "
+                    f"{current['throughput_unit']} (-{tolerance:.0%})"
+                )
+        if current[MEMORY_METRIC] > previous[MEMORY_METRIC] * (1 + tolerance) + 64:
+            regressions.append(f"{name}: {MEMORY_METRIC} {current[MEMORY_METRIC]} > {previous[MEMORY_METRIC]} (+{tolerance:.0%})")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="In-process benchmark suite")
+    parser.add_argument("--filter", default="", help="only run cases whose name contains this")
+    parser.add_argument("--max-size", default="10MB", help="skip inputs larger than this (e.g. 1MB)")
+    parser.add_argument("--min-seconds", type=float, default=1.0, help="time spent per case")
+    parser.add_argument("--min-iterations", type=int, default=5)
+    parser.add_argument("--max-iterations", type=int, default=2000)
+    parser.add_argument("--tolerance", type=float, default=0.3, help="allowed relative regression")
+    parser.add_argument("--p99-tolerance", type=float, default=1.0,
+                        help="allowed relative p99 regression (tail latency is noisier)")
+    parser.add_argument("--min-delta-ms", type=float, default=1.0, help="ignore timing changes smaller than this")
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--update-baseline", action="store_true", help="write the results as the new baseline")
+    parser.add_argument("--output", help="also write the results to this JSON file")
+    args = parser.parse_args()
+
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    cases = [case for case in build_cases(loop, parse_size(args.max_size)) if args.filter in case.name]
+
+    results = {}
+    with open(os.devnull, "w") as devnull:
+        # What the services log is still formatted and written, so its cost
+        # is measured, but to os.devnull rather than the terminal
+        log_stream = log_service.stream
+        log_service.redirect(devnull)
+        try:
+            for case in cases:
+                result = measure(case, args.min_seconds, args.min_iterations, args.max_iterations)
+                results[case.name] = result
+                print(
+                    f"{case.name:<32} p50 {result['p50_ms']:>10.3f}ms  p99 {result['p99_ms']:>10.3f}ms  "
+                    f"{result[THROUGHPUT_METRIC]:>12.3f} {result['throughput_unit']:<8} "
+                    f"peak {result[MEMORY_METRIC]:>10.1f}KB  ({result['iterations']} runs)",
+                    flush=True,
+                )
+        finally:
+            log_service.redirect(log_stream)
+
+    from services import pdf_service
+    pdf_service.shutdown_pool()
+    loop.close()
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+
+    if args.update_baseline:
+        baseline = {}
+        if os.path.exists(args.baseline):
+            with open(args.baseline) as f:
+                baseline = json.load(f)
+        baseline.update(results)
+        with open(args.baseline, "w") as f:
+            json.dump(baseline, f, indent=2, sort_keys=True)
+            f.write("\n")
+        print(f"Baseline written to {args.baseline}")
+        return
+
+    if not os.path.exists(args.baseline):
+        print(f"No baseline at {args.baseline}; run with --update-baseline to record one")
+        return
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    regressions = compare(results, baseline, args.tolerance, args.p99_tolerance, args.min_delta_ms)
+    for regression in regressions:
+        print(f"REGRESSION {regression}")
+    if regressions:
+        sys.exit(1)
+    print("No regressions against the baseline")
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    finally:
+        shutil.rmtree(SCRATCH_DIR, ignore_errors=True)
@@ -1,16 +1,8 @@
 # clause_extractor.py
-import PyPDF2
-from docx import Document
+from services import docx_service, pdf_service
 
 def extract_text_from_pdf(file_path):
-    text = ""
-    with open(file_path, "rb") as f:
-        reader = PyPDF2.PdfReader(f)
-        for page in reader.pages:
-            text += page.extract_text() or ""
-    return text
+    return pdf_service.extract_pdf(file_path)["text"]
 
 def extract_text_from_docx(file_path):
-    doc = Document(file_path)
-    text = "\n".join([p.text for p in doc.paragraphs])
-    return text
+    return docx_service.extract_docx(file_path)["text"]
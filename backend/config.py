@@ -6,6 +6,111 @@ load_dotenv()
 
 class Config:
     CEREBRAS_API_KEY = os.getenv("CEREBRAS_API_KEY", "")
-    LLAMA_API_KEY = os.getenv("LLAMA_API_KEY", "")
+    LLAMA_API_KEY = os.getenv("LLAMA_API_KEY", os.getenv("TOGETHER_API_KEY", ""))
     SECRET_KEY = os.getenv("SECRET_KEY", "fallback-secret-key")
-    DEBUG = os.getenv("DEBUG", "False").lower() == "true"
\ No newline at end of file
+    DEBUG = os.getenv("DEBUG", "False").lower() == "true"
+
+    # PDF extraction
+    PDF_WORKERS = int(os.getenv("PDF_WORKERS", str(os.cpu_count() or 1)))
+    PDF_PAGES_PER_CHUNK = int(os.getenv("PDF_PAGES_PER_CHUNK", "25"))
+    # Parsed page text on local disk, reused across uploads (empty path disables it)
+    PDF_CACHE_PATH = os.getenv("PDF_CACHE_PATH", "data/pdf_cache.sqlite3")
+    PDF_CACHE_MAX_BYTES = int(os.getenv("PDF_CACHE_MAX_BYTES", str(256 * 1024 * 1024)))
+
+    # Analysis result cache (RESULT_CACHE_PATH enables the on-disk tier)
+    PIPELINE_VERSION = os.getenv("PIPELINE_VERSION", "2")
+    RESULT_CACHE_MAX_ENTRIES = int(os.getenv("RESULT_CACHE_MAX_ENTRIES", "512"))
+    RESULT_CACHE_MAX_BYTES = int(os.getenv("RESULT_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+    RESULT_CACHE_TTL_SECONDS = float(os.getenv("RESULT_CACHE_TTL_SECONDS", "3600"))
+    RESULT_CACHE_PATH = os.getenv("RESULT_CACHE_PATH", "")
+    # Size limit of the on-disk tier (its values, shared by the result and clause caches)
+    RESULT_CACHE_DISK_MAX_BYTES = int(os.getenv("RESULT_CACHE_DISK_MAX_BYTES", str(512 * 1024 * 1024)))
+
+
+    # LLM providers (OpenAI-compatible chat completions APIs)
+    LLM_ENABLED = os.getenv("LLM_ENABLED", "False").lower() == "true"
+    LLAMA_BASE_URL = os.getenv("LLAMA_BASE_URL", "https://api.together.xyz/v1")
+    LLAMA_MODEL = os.getenv("LLAMA_MODEL", "meta-llama/Meta-Llama-3.1-8B-Instruct-Turbo")
+    CEREBRAS_BASE_URL = os.getenv("CEREBRAS_BASE_URL", "https://api.cerebras.ai/v1")
+    CEREBRAS_MODEL = os.getenv("CEREBRAS_MODEL", "llama3.1-8b")
+    LLM_HTTP2 = os.getenv("LLM_HTTP2", "True").lower() == "true"
+    LLM_MAX_CONNECTIONS = int(os.getenv("LLM_MAX_CONNECTIONS", "20"))
+    LLM_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("LLM_MAX_KEEPALIVE_CONNECTIONS", "10"))
+    LLM_KEEPALIVE_EXPIRY = float(os.getenv("LLM_KEEPALIVE_EXPIRY", "30"))
+    LLM_TIMEOUT = float(os.getenv("LLM_TIMEOUT", "30"))
+
+    # Micro-batching of per-clause LLM calls ("packed" prompts or "concurrent" requests)
+    LLM_BATCH_MODE = os.getenv("LLM_BATCH_MODE", "packed")
+    LLM_BATCH_SIZE = int(os.getenv("LLM_BATCH_SIZE", "8"))
+    LLM_BATCH_WINDOW_MS = float(os.getenv("LLM_BATCH_WINDOW_MS", "20"))
+    LLM_BATCH_TOKEN_BUDGET = int(os.getenv("LLM_BATCH_TOKEN_BUDGET", "3000"))
+
+    # Long-document mode: chunked map-reduce above LONGDOC_THRESHOLD characters
+    LONGDOC_THRESHOLD = int(os.getenv("LONGDOC_THRESHOLD", "20000"))
+    LONGDOC_CHUNK_SIZE = int(os.getenv("LONGDOC_CHUNK_SIZE", "6000"))
+    LONGDOC_CHUNK_OVERLAP = int(os.getenv("LONGDOC_CHUNK_OVERLAP", "500"))
+    LONGDOC_CONCURRENCY = int(os.getenv("LONGDOC_CONCURRENCY", "4"))
+    LONGDOC_MAX_CLAUSES = int(os.getenv("LONGDOC_MAX_CLAUSES", "500"))
+
+    # Incremental re-analysis of contract versions (/revisions): sections analyzed per version
+    REVISION_MAX_CLAUSES = int(os.getenv("REVISION_MAX_CLAUSES", "500"))
+    # Per-clause analyses, in their own cache so large revisions do not evict the routes' results
+    CLAUSE_CACHE_MAX_ENTRIES = int(os.getenv("CLAUSE_CACHE_MAX_ENTRIES", "20000"))
+    CLAUSE_CACHE_MAX_BYTES = int(os.getenv("CLAUSE_CACHE_MAX_BYTES", str(32 * 1024 * 1024)))
+
+    # Clause assessments reused for near-duplicate clauses (MinHash Jaccard similarity; 0 entries disables)
+    NEAR_DUPLICATE_THRESHOLD = float(os.getenv("NEAR_DUPLICATE_THRESHOLD", "0.85"))
+    NEAR_DUPLICATE_MAX_ENTRIES = int(os.getenv("NEAR_DUPLICATE_MAX_ENTRIES", "20000"))
+
+    # Background jobs
+    JOB_DB_PATH = os.getenv("JOB_DB_PATH", "data/jobs.sqlite3")
+    JOB_WORKERS = int(os.getenv("JOB_WORKERS", "4"))
+    JOB_MAX_PER_USER = int(os.getenv("JOB_MAX_PER_USER", "2"))
+    JOB_MAX_QUEUE = int(os.getenv("JOB_MAX_QUEUE", "100"))
+    JOB_POLL_SECONDS = float(os.getenv("JOB_POLL_SECONDS", "0.5"))
+    # A running job whose process stops renewing its lease this long is queued again
+    JOB_LEASE_SECONDS = float(os.getenv("JOB_LEASE_SECONDS", "30"))
+    # Files of queued upload jobs, removed once the job has run
+    JOB_UPLOAD_DIR = os.getenv("JOB_UPLOAD_DIR", "data/job-uploads")
+
+    # Verified-token cache size (entries never outlive the token's exp claim)
+    TOKEN_CACHE_SIZE = int(os.getenv("TOKEN_CACHE_SIZE", "10000"))
+
+    # Server-side document store (parsed uploads, referenced by document_id)
+    DOCUMENT_STORE_DIR = os.getenv("DOCUMENT_STORE_DIR", "data/documents")
+    DOCUMENT_STORE_MAX_BYTES = int(os.getenv("DOCUMENT_STORE_MAX_BYTES", str(1024 * 1024 * 1024)))
+    DOCUMENT_STORE_MAX_AGE_SECONDS = float(os.getenv("DOCUMENT_STORE_MAX_AGE_SECONDS", str(7 * 24 * 3600)))
+
+    # Batch analysis (/batch): documents analyzed at once, per request and at most
+    BATCH_CONCURRENCY = int(os.getenv("BATCH_CONCURRENCY", "4"))
+    BATCH_MAX_CONCURRENCY = int(os.getenv("BATCH_MAX_CONCURRENCY", "16"))
+    BATCH_MAX_DOCUMENTS = int(os.getenv("BATCH_MAX_DOCUMENTS", "10000"))
+    BATCH_MAX_DOCUMENT_BYTES = int(os.getenv("BATCH_MAX_DOCUMENT_BYTES", str(50 * 1024 * 1024)))
+
+    # Uploads: larger files are refused with 413; bodies over UPLOAD_SPOOL_MAX_MEMORY spill to a temporary file
+    UPLOAD_MAX_BYTES = int(os.getenv("UPLOAD_MAX_BYTES", str(100 * 1024 * 1024)))
+    UPLOAD_SPOOL_MAX_MEMORY = int(os.getenv("UPLOAD_SPOOL_MAX_MEMORY", str(1024 * 1024)))
+    UPLOAD_CHUNK_SIZE = int(os.getenv("UPLOAD_CHUNK_SIZE", str(1024 * 1024)))
+
+    # Import every router and heavy dependency at startup, before /ready reports the process ready
+    WARM_UP = os.getenv("WARM_UP", "False").lower() == "true"
+
+    # Structured logging: JSON lines on stdout from a background writer. LOG_LEVELS and LOG_SAMPLING are
+    # per-module overrides ("routes.upload=DEBUG,services.auth_service=WARNING"; "routes=0.1" keeps a
+    # tenth of the records below WARNING); strings in a record are cut to LOG_MAX_FIELD_CHARS
+    LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
+    LOG_LEVELS = os.getenv("LOG_LEVELS", "")
+    LOG_SAMPLING = os.getenv("LOG_SAMPLING", "")
+    LOG_MAX_FIELD_CHARS = int(os.getenv("LOG_MAX_FIELD_CHARS", "500"))
+    LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+
+    # /metrics summed over every worker process: each writes its metrics to a file in METRICS_DIR every
+    # METRICS_FLUSH_SECONDS (empty: each process reports only its own; gunicorn.conf.py sets data/metrics)
+    METRICS_DIR = os.getenv("METRICS_DIR", "")
+    METRICS_FLUSH_SECONDS = float(os.getenv("METRICS_FLUSH_SECONDS", "5"))
+
+    # User records: "sqlite" (shared by all worker processes) or "memory" (single process)
+    USER_STORE = os.getenv("USER_STORE", "sqlite")
+    USER_DB_PATH = os.getenv("USER_DB_PATH", "data/users.sqlite3")
+    USER_CACHE_SIZE = int(os.getenv("USER_CACHE_SIZE", "10000"))
+    USER_CACHE_TTL_SECONDS = float(os.getenv("USER_CACHE_TTL_SECONDS", "5"))
\ No newline at end of file
@@ -0,0 +1,53 @@
+# Gunicorn configuration for multi-process serving
+#
+#     gunicorn -c gunicorn.conf.py main:app
+#
+# Runs one uvicorn worker process per available core (WEB_CONCURRENCY
+# overrides), with the app imported once in the master and forked into the
+# workers. Everything the workers must agree on lives in SQLite files under
+# data/ that all of them open: users, the job queue and its per-user limits,
+# stored documents and the result cache. Caches that only speed things up
+# (verified tokens, the in-memory result tier) stay per process. Metrics are
+# recorded per process too, but every worker writes them to METRICS_DIR and
+# /metrics, answered by any worker, sums them all, so scraping the one
+# address covers the whole server (other workers' figures lag by up to
+# METRICS_FLUSH_SECONDS).
+import glob
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from services.cpu_quota import available_cpus
+
+bind = os.getenv("BIND", "0.0.0.0:8000")
+cpus = available_cpus()
+workers = int(os.getenv("WEB_CONCURRENCY", "0")) or cpus
+worker_class = "uvicorn.workers.UvicornWorker"
+# Import the app (and build the keyword automata) once, before forking
+preload_app = True
+timeout = int(os.getenv("WORKER_TIMEOUT", "120"))
+graceful_timeout = 30
+keepalive = 5
+
+# Share analysis results between the workers unless a path was chosen
+os.environ.setdefault("RESULT_CACHE_PATH", "data/results.sqlite3")
+# Sum /metrics over the workers unless a directory was chosen
+os.environ.setdefault("METRICS_DIR", "data/metrics")
+# Every worker has its own PDF pool; split the cores instead of multiplying them
+os.environ.setdefault("PDF_WORKERS", str(max(1, cpus // workers)))
+
+
+def on_starting(server):
+    # Counts from a previous run of the server would be added to this one's
+    if os.environ["METRICS_DIR"]:
+        for path in glob.glob(os.path.join(os.environ["METRICS_DIR"], "*.json")):
+            os.remove(path)
+
+
+def when_ready(server):
+    # With WARM_UP, routers and parsers are imported once here, before the
+    # workers fork, instead of in every worker
+    if os.getenv("WARM_UP", "False").lower() == "true":
+        import main
+        main.startup_state.preload(main.app)
@@ -1,15 +1,8 @@
 # llama_client.py
-import os
-from openai import OpenAI
+from services import llm_client, llm_batcher
 
-# Together.ai API endpoint (Llama 3 hosted)
-client = OpenAI(
-    api_key=os.getenv("TOGETHER_API_KEY"),
-    base_url="https://api.together.xyz/v1"
-)
 
-def summarize_clause(clause_text):
-    """Summarize a legal clause in simple English."""
+async def _summarize_one(clause_text):
     prompt = f"""
     You are a legal AI assistant. 
     Read the clause below and summarize it in 2–3 sentences 
@@ -19,17 +12,14 @@ def summarize_clause(clause_text):
     {clause_text}
     """
 
-    response = client.chat.completions.create(
-        model="meta-llama/Meta-Llama-3.1-8B-Instruct-Turbo",
-        messages=[{"role": "user", "content": prompt}],
+    return await llm_client.get_client("llama").chat(
+        [{"role": "user", "content": prompt}],
         max_tokens=200,
         temperature=0.4,
     )
-    return response.choices[0].message.content.strip()
 
 
-def assess_risk(clause_text):
-    """Analyze clause and assign risk level."""
+async def _assess_one(clause_text):
     prompt = f"""
     You are a legal risk analyst AI.
     Analyze the clause below and assign a risk level: Low, Medium, or High.
@@ -45,10 +35,38 @@ def assess_risk(clause_text):
     }}
     """
 
-    response = client.chat.completions.create(
-        model="meta-llama/Meta-Llama-3.1-8B-Instruct-Turbo",
-        messages=[{"role": "user", "content": prompt}],
+    return await llm_client.get_client("llama").chat(
+        [{"role": "user", "content": prompt}],
         max_tokens=150,
         temperature=0.3,
     )
-    return response.choices[0].message.content.strip()
+
+
+# Per-clause calls made within the batching window share one request
+summary_batcher = llm_batcher.make_batcher(llm_batcher.make_batch_handler(
+    "llama",
+    "You are a legal AI assistant. Summarize the clause in 2–3 sentences "
+    "in plain English for a non-lawyer; the result is a string.",
+    _summarize_one,
+    max_tokens_per_item=200,
+    temperature=0.4,
+))
+
+risk_batcher = llm_batcher.make_batcher(llm_batcher.make_batch_handler(
+    "llama",
+    "You are a legal risk analyst AI. Assign the clause a risk level (Low, Medium or High) "
+    'and justify it in 1 sentence; the result is {"risk_level": "...", "justification": "..."}.',
+    _assess_one,
+    max_tokens_per_item=150,
+    temperature=0.3,
+))
+
+
+async def summarize_clause(clause_text):
+    """Summarize a legal clause in simple English."""
+    return await summary_batcher.submit(clause_text)
+
+
+async def assess_risk(clause_text):
+    """Analyze clause and assign risk level."""
+    return await risk_batcher.submit(clause_text)
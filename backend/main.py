@@ -1,21 +1,25 @@
 # FastAPI app
+import time
+_import_started = time.perf_counter()
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-import sys
-import traceback
-
-print("Starting LawMind Backend...")
+from fastapi.responses import JSONResponse, PlainTextResponse
+from config import Config
+from services.log_service import RequestIdMiddleware, get_logger
+from services.metrics_service import MetricsMiddleware
+from services.startup_service import LazyRouterMiddleware, router_loader, startup as startup_state
+from services.upload_service import UploadSizeLimitMiddleware
 
-try:
-    from routes import upload, analyze, summarize, extract, auth
-    print("All routes imported successfully")
-except Exception as e:
-    print(f"Error importing routes: {e}")
-    traceback.print_exc()
-    sys.exit(1)
+logger = get_logger(__name__)
+logger.info("Starting LawMind Backend...")
 
 app = FastAPI(title="LawMind Backend")
 
+# Routers (and the parsers and clients they use) are imported on the first
+# request under their prefix; WARM_UP=true loads them all before /ready
+app.add_middleware(LazyRouterMiddleware, loader=router_loader)
+
 # Add CORS middleware
 app.add_middleware(
     CORSMiddleware,
@@ -25,33 +29,79 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Include routers
-app.include_router(upload.router)
-app.include_router(analyze.router)
-app.include_router(summarize.router)
-app.include_router(extract.router)
-app.include_router(auth.router)
+# Refuse oversized request bodies early (the upload routes spool files
+# over UPLOAD_SPOOL_MAX_MEMORY to disk, see upload_service.UploadRoute)
+app.add_middleware(UploadSizeLimitMiddleware, max_bytes=Config.UPLOAD_MAX_BYTES)
+
+# Per-route latency, body sizes and error counts, exported at /metrics
+app.add_middleware(MetricsMiddleware)
+
+# Request id for log correlation (outermost, so every record of a request has it)
+app.add_middleware(RequestIdMiddleware)
+
+@app.on_event("startup")
+async def startup():
+    from services import job_service
+    await job_service.job_manager.start()
+    startup_state.begin(app, Config.WARM_UP)
+
+@app.on_event("shutdown")
+async def shutdown():
+    from services import pdf_service, llm_client, job_service
+    await job_service.job_manager.stop()
+    pdf_service.shutdown_pool()
+    await llm_client.shutdown()
 
 # Health check endpoint
 @app.get("/")
 async def root():
     return {"message": "LawMind Backend API is running"}
 
-# New endpoint for comprehensive analysis
-@app.post("/comprehensive-analysis")
-async def comprehensive_analysis(request: dict):
-    text = request.get("text", "")
-    if not text:
-        return {"error": "No text provided"}
-    
-    try:
-        from services import report_service
-        analysis = await report_service.generate_comprehensive_analysis(text)
-        return {"message": "Comprehensive analysis completed", "analysis": analysis}
-    except Exception as e:
-        return {"error": f"Analysis failed: {str(e)}"}
+# Readiness: 503 until the warm-up (if enabled) has finished; reports what
+# importing the app and each lazily loaded module cost
+@app.get("/ready")
+async def ready():
+    report = startup_state.report()
+    return JSONResponse(report, status_code=200 if report["ready"] else 503)
+
+# Prometheus metrics
+@app.get("/metrics")
+async def metrics():
+    import asyncio
+    from services import metrics_service
+    # With METRICS_DIR this reads every worker's snapshot; keep the file I/O off the event loop
+    text = await asyncio.get_running_loop().run_in_executor(None, metrics_service.render)
+    return PlainTextResponse(text, media_type="text/plain; version=0.0.4")
+
+# Result cache counters
+@app.get("/cache/stats")
+async def cache_stats():
+    from services.cache_service import result_cache
+    return result_cache.stats()
+
+# Per-clause analyses of /revisions
+@app.get("/cache/clauses")
+async def clause_cache_stats():
+    from services.revision_service import clause_cache
+    return clause_cache.stats()
+
+# Reuse of model assessments across near-duplicate clauses
+@app.get("/cache/near-duplicates")
+async def near_duplicate_stats():
+    from services.near_duplicates import clause_assessments
+    return clause_assessments.stats()
+
+# Parsed PDF pages kept on disk and reused across uploads
+@app.get("/cache/pdf-pages")
+async def pdf_page_cache_stats():
+    from services.pdf_cache import pdf_page_cache
+    if pdf_page_cache is None:
+        return {"enabled": False}
+    return {"enabled": True, **pdf_page_cache.stats()}
+
+startup_state.import_seconds = round(time.perf_counter() - _import_started, 4)
 
 if __name__ == "__main__":
     import uvicorn
-    print("Starting Uvicorn server...")
+    logger.info("Starting Uvicorn server...")
     uvicorn.run(app, host="0.0.0.0", port=8000)
\ No newline at end of file
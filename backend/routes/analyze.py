@@ -1,13 +1,16 @@
 from fastapi import APIRouter, HTTPException, Depends
 from services import cerebras_service, llama_service
 from services.auth_service import get_current_user
+from services.log_service import get_logger
+from routes.documents import resolve_text
 
 router = APIRouter(prefix="/analyze", tags=["analyze"])
+logger = get_logger(__name__)
 
 @router.post("/")
 async def analyze_document(request: dict, current_user = Depends(get_current_user)):
-    text = request.get("text", "")
-    print(f"User {current_user.username} analyzing document")
+    text = resolve_text(request.get("text", ""), request.get("document_id"), current_user)
+    logger.info("Analyzing document", extra={"user": current_user.username})
     
     if not text:
         raise HTTPException(status_code=400, detail="No text provided for analysis")
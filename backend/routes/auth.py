@@ -1,30 +1,30 @@
 from fastapi import APIRouter, HTTPException, Depends, status
 from fastapi.security import OAuth2PasswordRequestForm
 from services import auth_service
+from services.log_service import get_logger
 from datetime import timedelta
 
 router = APIRouter(prefix="/auth", tags=["auth"])
+logger = get_logger(__name__)
 
 @router.post("/signup", response_model=auth_service.User)
 async def signup(user: auth_service.UserCreate):
-    print(f"Signup request: {user}")
-    if user.username in auth_service.users_db:
-        raise HTTPException(status_code=400, detail="Username already registered")
-    
+    logger.info("Signup request", extra={"user": user.username})
     hashed_password = auth_service.get_password_hash(user.password)
-    auth_service.users_db[user.username] = {
+    # Check and insert in one step, so two workers cannot both register a name
+    added = auth_service.users_db.add({
         "username": user.username,
         "email": user.email,
         "hashed_password": hashed_password
-    }
-    
-    print(f"Updated users_db: {auth_service.users_db}")
+    })
+    if not added:
+        raise HTTPException(status_code=400, detail="Username already registered")
     
     return auth_service.User(username=user.username, email=user.email)
 
 @router.post("/login", response_model=auth_service.Token)
 async def login(form_data: OAuth2PasswordRequestForm = Depends()):
-    print(f"Login request: username={form_data.username}")
+    logger.info("Login request", extra={"user": form_data.username})
     user = auth_service.authenticate_user(auth_service.users_db, form_data.username, form_data.password)
     if not user:
         raise HTTPException(
@@ -0,0 +1,87 @@
+from fastapi import APIRouter, HTTPException, Depends, UploadFile, File, Query
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+from typing import List, Optional
+from services import batch_service, upload_service
+from services.auth_service import get_current_user
+from services.document_store import document_store
+from config import Config
+import json
+
+router = APIRouter(prefix="/batch", tags=["batch"], route_class=upload_service.UploadRoute)
+
+class BatchDocument(BaseModel):
+    id: Optional[str] = None
+    text: Optional[str] = None
+    document_id: Optional[str] = None
+
+class BatchRequest(BaseModel):
+    documents: List[BatchDocument]
+    operations: List[str] = list(batch_service.BATCH_OPERATIONS)
+
+def _ndjson(lines) -> StreamingResponse:
+    async def body():
+        async for line in lines:
+            yield json.dumps(line) + "\n"
+    return StreamingResponse(body(), media_type="application/x-ndjson")
+
+def _document_items(documents: list, owner: str):
+    for index, document in enumerate(documents):
+        # Drop the request's reference, so a finished document's text can be freed
+        documents[index] = None
+
+        async def load(document=document) -> str:
+            if document.document_id:
+                text = document_store.get_text(document.document_id, owner)
+                if text is None:
+                    raise ValueError("Document not found")
+                return text
+            return document.text or ""
+
+        yield document.id or document.document_id or str(index), document.document_id, load
+
+@router.post("/")
+async def batch_analyze(
+    request: BatchRequest,
+    concurrency: Optional[int] = Query(None, ge=1),
+    current_user = Depends(get_current_user),
+):
+    """
+    Extract and/or summarize many documents, given inline or by document_id.
+    Streams one NDJSON line per document as it finishes.
+    """
+    try:
+        operations = batch_service.check_operations(request.operations)
+    except batch_service.BatchError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if len(request.documents) > Config.BATCH_MAX_DOCUMENTS:
+        raise HTTPException(status_code=400, detail=f"Batch is limited to {Config.BATCH_MAX_DOCUMENTS} documents")
+    items = _document_items(request.documents, current_user.username)
+    return _ndjson(batch_service.iter_batch(items, operations, concurrency, current_user.username))
+
+@router.post("/zip")
+async def batch_analyze_zip(
+    file: UploadFile = File(...),
+    operations: List[str] = Query(list(batch_service.BATCH_OPERATIONS)),
+    concurrency: Optional[int] = Query(None, ge=1),
+    current_user = Depends(get_current_user),
+):
+    """
+    Same as /batch/ for the files of a zip archive (PDF, Word or text, told
+    apart by their content). Lines carry the file name as id.
+    """
+    try:
+        operations = batch_service.check_operations(operations)
+        archive = batch_service.open_archive(file.file)
+        items = batch_service.archive_items(archive)
+    except batch_service.BatchError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    async def lines():
+        try:
+            async for line in batch_service.iter_batch(items, operations, concurrency):
+                yield line
+        finally:
+            archive.close()
+
+    return _ndjson(lines())
@@ -0,0 +1,48 @@
+from fastapi import APIRouter, HTTPException, Depends, Query
+from typing import Optional
+from services.auth_service import get_current_user
+from services.clause_index import clause_index, extract_document
+from services.document_store import document_store
+
+router = APIRouter(prefix="/clauses", tags=["clauses"])
+
+@router.get("/search")
+async def search_clauses(
+    q: str = "",
+    type: Optional[str] = None,
+    party: Optional[str] = None,
+    limit: int = Query(20, ge=1, le=100),
+    offset: int = Query(0, ge=0, le=1000),
+    current_user = Depends(get_current_user),
+):
+    """
+    Search the clauses of your analyzed documents, best BM25 match first.
+    `type` keeps one clause type (with no `q`, all clauses of that type);
+    `party` keeps documents with a party whose name contains it.
+    """
+    if not q.strip() and not type:
+        raise HTTPException(status_code=400, detail="Give a query (q) or a clause type")
+    results = clause_index.search(current_user.username, q, type, party, limit, offset)
+    return {"query": q, "type": type, "party": party, "results": results}
+
+@router.post("/reindex")
+async def reindex_clauses(current_user = Depends(get_current_user)):
+    """
+    Extract and index the clauses of your stored documents that have not
+    been analyzed yet (documents are indexed as they are extracted).
+    """
+    indexed = 0
+    for document in document_store.list(current_user.username):
+        if clause_index.is_indexed(document["id"]):
+            continue
+        text = document_store.get_text(document["id"], current_user.username)
+        if not text:
+            continue
+        await extract_document(text, current_user.username, document["id"])
+        indexed += 1
+    return {"message": "Clause index updated", "indexed": indexed,
+            **clause_index.stats(current_user.username)}
+
+@router.get("/stats")
+async def clause_stats(current_user = Depends(get_current_user)):
+    return clause_index.stats(current_user.username)
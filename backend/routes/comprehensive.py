@@ -0,0 +1,47 @@
+from fastapi import APIRouter, Depends
+from fastapi.responses import StreamingResponse
+from services import report_service
+from services.auth_service import get_optional_user
+from services.cache_service import result_cache
+from routes.documents import resolve_text
+import json
+
+router = APIRouter(prefix="/comprehensive-analysis", tags=["comprehensive-analysis"])
+
+# New endpoint for comprehensive analysis
+@router.post("")
+async def comprehensive_analysis(request: dict, current_user = Depends(get_optional_user)):
+    text = resolve_text(request.get("text", ""), request.get("document_id"), current_user)
+    if not text:
+        return {"error": "No text provided"}
+
+    try:
+        analysis = await result_cache.get_or_compute(
+            "comprehensive-analysis", text, report_service.generate_comprehensive_analysis
+        )
+        return {"message": "Comprehensive analysis completed", "analysis": analysis}
+    except Exception as e:
+        return {"error": f"Analysis failed: {str(e)}"}
+
+# Streaming variant: Server-Sent Events emitted as each stage finishes
+@router.post("/stream")
+async def comprehensive_analysis_stream(request: dict, current_user = Depends(get_optional_user)):
+    # Resolved before the stream starts, so a bad document_id gets a real 401/404
+    text = resolve_text(request.get("text", ""), request.get("document_id"), current_user)
+
+    async def events():
+        if not text:
+            yield f"event: error\ndata: {json.dumps({'error': 'No text provided'})}\n\n"
+            return
+        try:
+            async for event, data in report_service.iter_comprehensive_analysis(text):
+                yield f"event: {event}\ndata: {json.dumps(data)}\n\n"
+            yield "event: done\ndata: {}\n\n"
+        except Exception as e:
+            yield f"event: error\ndata: {json.dumps({'error': f'Analysis failed: {str(e)}'})}\n\n"
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
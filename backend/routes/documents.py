@@ -0,0 +1,52 @@
+from fastapi import APIRouter, HTTPException, Depends
+from typing import Optional
+from services.auth_service import get_current_user
+from services.document_store import document_store
+
+router = APIRouter(prefix="/documents", tags=["documents"])
+
+def _public_view(document: dict) -> dict:
+    return {
+        "document_id": document["id"],
+        "filename": document["filename"],
+        "content_length": document["characters"],
+        "size_bytes": document["size_bytes"],
+        "created_at": document["created_at"],
+        "last_access": document["last_access"],
+    }
+
+def resolve_text(text: Optional[str], document_id: Optional[str], current_user) -> str:
+    """
+    The text a request refers to: the stored document when `document_id` is
+    given, otherwise the inline `text`. Only the owner may use a document;
+    anyone else gets the same 404 as for a missing one.
+    """
+    if not document_id:
+        return text or ""
+    if current_user is None:
+        raise HTTPException(
+            status_code=401,
+            detail="Authentication required to use document_id",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    stored = document_store.get_text(document_id, current_user.username)
+    if stored is None:
+        raise HTTPException(status_code=404, detail="Document not found")
+    return stored
+
+@router.get("/")
+async def list_documents(current_user = Depends(get_current_user)):
+    return {"documents": [_public_view(document) for document in document_store.list(current_user.username)]}
+
+@router.get("/{document_id}")
+async def get_document(document_id: str, current_user = Depends(get_current_user)):
+    document = document_store.get(document_id, current_user.username)
+    if document is None:
+        raise HTTPException(status_code=404, detail="Document not found")
+    return _public_view(document)
+
+@router.delete("/{document_id}")
+async def delete_document(document_id: str, current_user = Depends(get_current_user)):
+    if not document_store.delete(document_id, current_user.username):
+        raise HTTPException(status_code=404, detail="Document not found")
+    return {"message": "Document deleted", "document_id": document_id}
@@ -1,13 +1,17 @@
 from fastapi import APIRouter, HTTPException, Depends
 from pydantic import BaseModel
-from services import cerebras_service
+from typing import Optional
+from services import clause_index
 from services.auth_service import get_current_user
-import traceback
+from services.log_service import get_logger
+from routes.documents import resolve_text
 
 router = APIRouter(prefix="/extract", tags=["extract"])
+logger = get_logger(__name__)
 
 class ExtractRequest(BaseModel):
-    text: str
+    text: Optional[str] = None
+    document_id: Optional[str] = None
 
 class ExtractResponse(BaseModel):
     message: str
@@ -18,14 +22,18 @@ async def extract_clauses(request: ExtractRequest, current_user = Depends(get_cu
     """
     Extract clauses from a legal document using Cerebras inference API.
     """
-    print(f"User {current_user.username} extracting clauses")
+    logger.info("Extracting clauses", extra={"user": current_user.username})
     
-    if not request.text:
+    text = resolve_text(request.text, request.document_id, current_user)
+    if not text:
         raise HTTPException(status_code=400, detail="No text provided for clause extraction")
     
     try:
         # Use Cerebras service for clause extraction
-        extracted_data = await cerebras_service.extract_clauses(request.text)
+        # Stored documents also get their clauses indexed for /clauses/search
+        extracted_data = await clause_index.extract_document(
+            text, current_user.username, request.document_id
+        )
         
         # Check if there was an error in the extraction process
         if "error" in extracted_data:
@@ -39,6 +47,5 @@ async def extract_clauses(request: ExtractRequest, current_user = Depends(get_cu
         # Re-raise HTTP exceptions
         raise
     except Exception as e:
-        # Log the full traceback for debugging
-        print(f"Error in extract_clauses: {traceback.format_exc()}")
+        logger.exception("Clause extraction failed")
         raise HTTPException(status_code=500, detail=f"Error during clause extraction: {str(e)}")
\ No newline at end of file
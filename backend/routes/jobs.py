@@ -0,0 +1,78 @@
+import asyncio
+import os
+from fastapi import APIRouter, HTTPException, Depends, UploadFile, File
+from pydantic import BaseModel
+from typing import Optional
+from config import Config
+from services import job_service, upload_service
+from services.auth_service import get_current_user
+from services.document_store import document_store
+
+router = APIRouter(prefix="/jobs", tags=["jobs"], route_class=upload_service.UploadRoute)
+
+# Longest a client may hold a status request open
+MAX_WAIT_SECONDS = 60
+
+class JobRequest(BaseModel):
+    kind: str
+    text: Optional[str] = None
+    document_id: Optional[str] = None
+
+async def _submit(owner: str, kind: str, params: dict) -> dict:
+    try:
+        job_id = await job_service.job_manager.submit(owner, kind, params)
+    except job_service.QueueFullError as e:
+        raise HTTPException(status_code=429, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"message": "Job queued", "job_id": job_id, "status": "queued"}
+
+@router.post("/")
+async def submit_job(request: JobRequest, current_user = Depends(get_current_user)):
+    """
+    Queue an extract, summarize or comprehensive-analysis job.
+    """
+    if request.kind == "upload":
+        raise HTTPException(status_code=400, detail="Use /jobs/upload to submit files")
+    if request.document_id:
+        # Queue the id, not the text; the worker reads the document when the job runs
+        if document_store.get(request.document_id, current_user.username) is None:
+            raise HTTPException(status_code=404, detail="Document not found")
+        return await _submit(current_user.username, request.kind, {"document_id": request.document_id})
+    if not request.text:
+        raise HTTPException(status_code=400, detail="No text provided")
+    return await _submit(current_user.username, request.kind, {"text": request.text})
+
+@router.post("/upload")
+async def submit_upload_job(file: UploadFile = File(...), current_user = Depends(get_current_user)):
+    """
+    Queue parsing of an uploaded file. The spooled upload is copied to
+    JOB_UPLOAD_DIR a chunk at a time and the job keeps its path, so the file
+    is never held in memory or in the job table.
+    """
+    loop = asyncio.get_running_loop()
+    path = await loop.run_in_executor(None, upload_service.save_upload, file.file, Config.JOB_UPLOAD_DIR)
+    params = {"filename": file.filename, "content_type": file.content_type, "path": path}
+    try:
+        return await _submit(current_user.username, "upload", params)
+    except HTTPException:
+        os.remove(path)
+        raise
+
+@router.get("/stats")
+async def job_stats(current_user = Depends(get_current_user)):
+    return job_service.job_manager.stats(current_user.username)
+
+@router.get("/{job_id}")
+async def get_job(job_id: str, wait: float = 0, current_user = Depends(get_current_user)):
+    """
+    Job status and result. With `wait`, hold the request open for up to that
+    many seconds until the job finishes (long-polling).
+    """
+    job = job_service.job_manager.store.get(job_id)
+    if job is None or job["owner"] != current_user.username:
+        raise HTTPException(status_code=404, detail="Job not found")
+    if wait > 0:
+        await job_service.job_manager.wait(job_id, min(wait, MAX_WAIT_SECONDS))
+        job = job_service.job_manager.store.get(job_id)
+    return job_service.public_view(job)
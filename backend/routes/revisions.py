@@ -0,0 +1,38 @@
+from fastapi import APIRouter, HTTPException, Depends
+from pydantic import BaseModel
+from typing import Optional
+from services import revision_service
+from services.auth_service import get_current_user
+from services.log_service import get_logger
+from routes.documents import resolve_text
+
+router = APIRouter(prefix="/revisions", tags=["revisions"])
+logger = get_logger(__name__)
+
+class RevisionRequest(BaseModel):
+    text: Optional[str] = None
+    document_id: Optional[str] = None
+    previous_text: Optional[str] = None
+    previous_document_id: Optional[str] = None
+
+@router.post("/")
+async def analyze_revision(request: RevisionRequest, current_user = Depends(get_current_user)):
+    """
+    Extract and score a new version of a contract, re-analyzing only the
+    clauses that changed, with a clause-level diff against the previous
+    version when one is given.
+    """
+    logger.info("Analyzing revision", extra={"user": current_user.username})
+    
+    text = resolve_text(request.text, request.document_id, current_user)
+    if not text:
+        raise HTTPException(status_code=400, detail="No text provided for analysis")
+    previous_text = None
+    if request.previous_text is not None or request.previous_document_id:
+        previous_text = resolve_text(request.previous_text, request.previous_document_id, current_user)
+    
+    try:
+        result = await revision_service.analyze_revision(text, previous_text)
+        return {"message": "Revision analyzed successfully", **result}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error during revision analysis: {str(e)}")
@@ -1,13 +1,19 @@
 from fastapi import APIRouter, HTTPException, Depends
 from pydantic import BaseModel
-from services import llama_service
+from typing import Optional
+from services import longdoc_service
+from services.cache_service import result_cache
 from services.auth_service import get_current_user
+from services.log_service import get_logger
+from routes.documents import resolve_text
 import json
 
 router = APIRouter(prefix="/summarize", tags=["summarize"])
+logger = get_logger(__name__)
 
 class SummarizeRequest(BaseModel):
-    text: str
+    text: Optional[str] = None
+    document_id: Optional[str] = None
 
 class SummarizeResponse(BaseModel):
     message: str
@@ -19,14 +25,17 @@ class SummarizeResponse(BaseModel):
 
 @router.post("/", response_model=SummarizeResponse)
 async def summarize_document(request: SummarizeRequest, current_user = Depends(get_current_user)):
-    print(f"User {current_user.username} summarizing document")
+    logger.info("Summarizing document", extra={"user": current_user.username})
     
-    if not request.text:
+    text = resolve_text(request.text, request.document_id, current_user)
+    if not text:
         raise HTTPException(status_code=400, detail="No text provided for summarization")
     
     try:
         # Use Llama service for summarization and risk scoring
-        summary_result = await llama_service.summarize_and_score_real(request.text)
+        summary_result = await result_cache.get_or_compute(
+            "summarize", text, longdoc_service.summarize_and_score
+        )
         
         # Ensure all required fields are present
         response_data = {
@@ -1,49 +1,34 @@
+import logging
 from fastapi import APIRouter, UploadFile, File, Depends
 from services.auth_service import get_current_user
-from io import BytesIO
-from pypdf import PdfReader
+from services import upload_service
+from services.log_service import get_logger, log_lazily
+from services.metrics_service import stage_timer
 
-router = APIRouter(prefix="/upload", tags=["upload"])
+router = APIRouter(prefix="/upload", tags=["upload"], route_class=upload_service.UploadRoute)
+logger = get_logger(__name__)
 
 @router.post("/")
-async def upload_file(file: UploadFile = File(...), current_user = Depends(get_current_user)):
+async def upload_file(file: UploadFile = File(...), full_text: bool = False, current_user = Depends(get_current_user)):
     try:
-        # Log the authenticated user
-        print(f"User {current_user.username} uploading file: {file.filename}")
-        
-        # Read the file content
-        content = await file.read()
-        
-        # Log the file information for debugging
-        print(f"File name: {file.filename}")
-        print(f"Content type: {file.content_type}")
-        print(f"Content length: {len(content)}")
-        
-        # Check if it's a PDF file
-        if file.content_type == "application/pdf":
-            # Process PDF with pypdf
-            pdf_file = BytesIO(content)
-            pdf_reader = PdfReader(pdf_file)
-            text = ""
-            for page in pdf_reader.pages:
-                text += page.extract_text()
-            return {"message": "PDF processed successfully", "content": text[:4000]}
-        else:
-            # For text files, try to decode the content
-            try:
-                # Try UTF-8 first
-                text = content.decode("utf-8")
-                print(f"Decoded text: {text}")
-                return {"message": "Text file processed successfully", "content": text[:4000]}
-            except UnicodeDecodeError:
-                try:
-                    # Try with error handling
-                    text = content.decode("utf-8", errors="ignore")
-                    print(f"Decoded text (with errors ignored): {text}")
-                    return {"message": "Text file processed successfully", "content": text[:4000]}
-                except Exception as e:
-                    print(f"Error decoding text: {e}")
-                    return {"message": "Unsupported file type", "content": ""}
+        # The body was spooled to file.file while the form was parsed; it is
+        # consumed from there in chunks rather than read into memory whole
+        log_lazily(logger, logging.INFO, "Uploading file", lambda: {
+            "user": current_user.username,
+            "file": file.filename,
+            "content_type": file.content_type,
+            "bytes": upload_service.file_size(file.file),
+        })
+
+        with stage_timer("upload_file.parse"):
+            # The full text is kept server-side; analysis routes take its document_id
+            parsed = await upload_service.ingest_upload(file.file, current_user.username, file.filename, upload_service.PREVIEW_LENGTH)
+        message = parsed.pop("message")
+        preview = parsed.pop("preview")
+        document = parsed.pop("document")
+        return {"message": message, "document_id": document["id"], **upload_service.content_fields(document, preview, full_text), **parsed}
+    except upload_service.UnsupportedFileType as e:
+        return {"message": str(e), "content": ""}
     except Exception as e:
-        print(f"General error: {e}")
+        logger.exception("Upload failed", extra={"file": file.filename})
         return {"message": f"Error processing file: {str(e)}", "content": ""}
\ No newline at end of file
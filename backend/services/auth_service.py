@@ -5,27 +5,33 @@ from typing import Optional
 import hashlib
 import jwt
 import os
+import threading
+import time
+from collections import OrderedDict
 from datetime import datetime, timedelta
 from config import Config
+from . import user_store
+from .log_service import get_logger
+
+logger = get_logger(__name__)
 
 # OAuth2 scheme for token-based authentication
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/login")
+# Same scheme for routes that also serve anonymous callers
+optional_oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/login", auto_error=False)
 
 # Secret key for JWT token generation (in production, use a more secure method)
 SECRET_KEY = os.getenv("SECRET_KEY", "lawmind_secret_key")
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
 
-# In-memory user storage (in production, use a database)
-users_db = {
-    "admin": {
-        "username": "admin",
-        "hashed_password": hashlib.sha256("admin123".encode()).hexdigest(),
-        "email": "admin@lawmind.com"
-    }
-}
-
-print(f"Initial users_db: {users_db}")
+# User records, shared by every worker process (see user_store)
+users_db = user_store.create_repository()
+users_db.add({
+    "username": "admin",
+    "hashed_password": hashlib.sha256("admin123".encode()).hexdigest(),
+    "email": "admin@lawmind.com"
+})
 
 class User(BaseModel):
     username: str
@@ -47,33 +53,33 @@ class TokenData(BaseModel):
     username: Optional[str] = None
 
 def verify_password(plain_password, hashed_password):
-    result = hashlib.sha256(plain_password.encode()).hexdigest() == hashed_password
-    print(f"Verifying password: {plain_password} -> {hashlib.sha256(plain_password.encode()).hexdigest()} == {hashed_password} = {result}")
-    return result
+    return hashlib.sha256(plain_password.encode()).hexdigest() == hashed_password
 
 def get_password_hash(password):
     return hashlib.sha256(password.encode()).hexdigest()
 
 def get_user(db, username: str):
-    print(f"Getting user: {username}")
-    print(f"Current users_db: {db}")
     if username in db:
         user_dict = db[username]
-        print(f"Found user: {user_dict}")
         return UserInDB(**user_dict)
-    print(f"User {username} not found")
     return None
 
+def delete_user(username: str):
+    """
+    Remove a user; tokens already issued to them stop working immediately.
+    """
+    users_db.delete(username)
+    token_cache.invalidate_user(username)
+
 def authenticate_user(db, username: str, password: str):
-    print(f"Authenticating user: {username}")
     user = get_user(db, username)
     if not user:
-        print(f"User {username} not found")
+        logger.info("Authentication failed: unknown user", extra={"user": username})
         return False
     if not verify_password(password, user.hashed_password):
-        print(f"Password verification failed for user {username}")
+        logger.info("Authentication failed: wrong password", extra={"user": username})
         return False
-    print(f"Authentication successful for user {username}")
+    logger.debug("Authentication succeeded", extra={"user": username})
     return user
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
@@ -86,7 +92,55 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
+class TokenCache:
+    """
+    LRU cache of verified tokens. An entry lives no longer than the token's
+    own `exp` claim and remembers the user record it was resolved from, so a
+    deleted or replaced user is noticed as soon as the user store sees it
+    (the repository hands out the same record object while it is unchanged).
+    """
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self._entries = OrderedDict()  # token -> (expires_at, user_record, user)
+        self._lock = threading.Lock()
+
+    def get(self, token: str):
+        with self._lock:
+            entry = self._entries.get(token)
+            if entry is None:
+                return None
+            expires_at, user_record, user = entry
+            if expires_at <= time.time() or users_db.get(user.username) is not user_record:
+                del self._entries[token]
+                return None
+            self._entries.move_to_end(token)
+            return user
+
+    def put(self, token: str, expires_at: float, user_record: dict, user: UserInDB):
+        with self._lock:
+            self._entries[token] = (expires_at, user_record, user)
+            self._entries.move_to_end(token)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def invalidate_user(self, username: str):
+        with self._lock:
+            for token in [token for token, entry in self._entries.items() if entry[2].username == username]:
+                del self._entries[token]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+token_cache = TokenCache(Config.TOKEN_CACHE_SIZE)
+
 async def get_current_user(token: str = Depends(oauth2_scheme)):
+    # Fast path: token already verified and not yet expired
+    user = token_cache.get(token)
+    if user is not None:
+        return user
+    
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
@@ -100,7 +154,18 @@ async def get_current_user(token: str = Depends(oauth2_scheme)):
         token_data = TokenData(username=username)
     except jwt.PyJWTError:
         raise credentials_exception
-    user = get_user(users_db, username=token_data.username)
-    if user is None:
+    user_record = users_db.get(token_data.username)
+    if user_record is None:
         raise credentials_exception
-    return user
\ No newline at end of file
+    user = UserInDB(**user_record)
+    token_cache.put(token, payload.get("exp", time.time()), user_record, user)
+    return user
+
+async def get_optional_user(token: Optional[str] = Depends(optional_oauth2_scheme)):
+    """
+    The authenticated user, or None when the request carries no token.
+    An invalid token is still rejected.
+    """
+    if token is None:
+        return None
+    return await get_current_user(token)
\ No newline at end of file
@@ -0,0 +1,123 @@
+# Batch Service
+import asyncio
+import zipfile
+from config import Config
+from . import clause_index, longdoc_service, upload_service
+from .cache_service import result_cache
+from .metrics_service import stage_timer
+
+BATCH_OPERATIONS = ("extract", "summarize")
+
+
+class BatchError(ValueError):
+    """
+    A batch that cannot be started (bad operations, too many documents, an
+    unreadable archive). Failures of single documents are reported per line.
+    """
+
+
+def check_operations(operations: list) -> list:
+    unknown = [operation for operation in operations if operation not in BATCH_OPERATIONS]
+    if unknown or not operations:
+        raise BatchError(f"Operations must be among {', '.join(BATCH_OPERATIONS)}")
+    return list(dict.fromkeys(operations))
+
+
+async def analyze_document(text: str, operations: list, owner: str = None, document_id: str = None) -> dict:
+    """
+    Run the requested operations on one document, through the same cache and
+    services as /extract and /summarize. The clauses of a stored document
+    (`document_id` of `owner`) are added to the clause index.
+    """
+    results = {}
+    if not text:
+        raise ValueError("No text provided")
+    if "extract" in operations:
+        with stage_timer("batch.extract"):
+            results["extract"] = await clause_index.extract_document(text, owner, document_id)
+    if "summarize" in operations:
+        with stage_timer("batch.summarize"):
+            results["summarize"] = await result_cache.get_or_compute(
+                "summarize", text, longdoc_service.summarize_and_score
+            )
+    return results
+
+
+async def _run_item(index: int, item_id: str, document_id: str, load, operations: list, owner: str) -> dict:
+    line = {"index": index, "id": item_id}
+    try:
+        text = await load()
+        line.update(await analyze_document(text, operations, owner, document_id))
+        line["status"] = "ok"
+    except Exception as e:
+        line["status"] = "error"
+        line["error"] = str(e)
+    return line
+
+
+async def iter_batch(items, operations: list, concurrency: int = None, owner: str = None):
+    """
+    Analyze the documents of `items`, an iterable of (id, document_id, load)
+    triples where `await load()` returns the document's text and
+    `document_id` is set for documents from `owner`'s store, and yield one result per
+    document as soon as it finishes (completion order, tagged with the input
+    index). At most `concurrency` documents are loaded or analyzed at any
+    time and results are handed on as they arrive, so memory stays flat
+    however long the batch is.
+    """
+    concurrency = max(1, min(concurrency or Config.BATCH_CONCURRENCY, Config.BATCH_MAX_CONCURRENCY))
+    pending = set()
+    try:
+        for index, (item_id, document_id, load) in enumerate(items):
+            while len(pending) >= concurrency:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    yield task.result()
+            pending.add(asyncio.ensure_future(_run_item(index, item_id, document_id, load, operations, owner)))
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                yield task.result()
+    finally:
+        # The client went away mid-batch: stop the documents still running
+        for task in pending:
+            task.cancel()
+
+
+def archive_items(archive: zipfile.ZipFile):
+    """
+    (name, None, load) items for the files of a zip archive. Members are read one
+    at a time, only when their turn comes, and members bigger than
+    BATCH_MAX_DOCUMENT_BYTES once uncompressed are refused without reading
+    them (the size is checked again while reading, in case the header lies).
+    """
+    members = [info for info in archive.infolist() if not info.is_dir()]
+    if len(members) > Config.BATCH_MAX_DOCUMENTS:
+        raise BatchError(f"Batch is limited to {Config.BATCH_MAX_DOCUMENTS} documents")
+
+    def reader(info: zipfile.ZipInfo):
+        def read() -> bytes:
+            with archive.open(info) as member:
+                content = member.read(Config.BATCH_MAX_DOCUMENT_BYTES + 1)
+            if len(content) > Config.BATCH_MAX_DOCUMENT_BYTES:
+                raise ValueError(f"Document exceeds {Config.BATCH_MAX_DOCUMENT_BYTES} bytes")
+            return content
+
+        async def load() -> str:
+            if info.file_size > Config.BATCH_MAX_DOCUMENT_BYTES:
+                raise ValueError(f"Document exceeds {Config.BATCH_MAX_DOCUMENT_BYTES} bytes")
+            loop = asyncio.get_running_loop()
+            content = await loop.run_in_executor(None, read)
+            parsed = await upload_service.parse_upload(content)
+            return parsed["text"]
+
+        return load
+
+    return ((info.filename, None, reader(info)) for info in members)
+
+
+def open_archive(file) -> zipfile.ZipFile:
+    try:
+        return zipfile.ZipFile(file)
+    except zipfile.BadZipFile as e:
+        raise BatchError(f"Not a valid zip archive: {e}")
@@ -0,0 +1,251 @@
+# Cache Service
+import asyncio
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from config import Config
+from .shared_db import SharedDatabase
+
+
+def normalize_text(text: str) -> str:
+    """
+    Normalize document text before it is hashed and analyzed, so that
+    re-submissions that only differ in surrounding whitespace share a result.
+    """
+    return text.strip()
+
+
+def make_key(pipeline: str, text: str) -> str:
+    """
+    Content address of a pipeline result: hash of the pipeline name,
+    the pipeline version and the normalized text.
+    """
+    digest = hashlib.sha256()
+    digest.update(f"{pipeline}:{Config.PIPELINE_VERSION}\0".encode())
+    digest.update(normalize_text(text).encode("utf-8", errors="surrogatepass"))
+    return digest.hexdigest()
+
+
+# Rows evicted per statement, and the share of the size limit eviction frees down to
+EVICTION_BATCH = 256
+EVICTION_TARGET = 0.9
+
+
+class DiskCache:
+    """
+    Optional on-disk tier backed by SQLite, so results survive restarts and
+    are shared by all worker processes. The total size of the stored values
+    is bounded by `max_bytes`: a write that goes over it first drops the
+    expired results, then the oldest ones.
+    """
+
+    def __init__(self, path: str, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.evictions = 0
+        self.db = SharedDatabase(path, schema=(
+            "CREATE TABLE IF NOT EXISTS results ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, size INTEGER NOT NULL, expires_at REAL NOT NULL)",
+            "CREATE INDEX IF NOT EXISTS results_expires_at ON results (expires_at)",
+            # Running total of the size column
+            "CREATE TABLE IF NOT EXISTS totals (name TEXT PRIMARY KEY, value INTEGER NOT NULL)",
+            "INSERT OR IGNORE INTO totals (name, value) VALUES ('bytes', 0)",
+        ))
+
+    def get(self, key: str):
+        with self.db.lock:
+            row = self.db.conn.execute(
+                "SELECT value, expires_at FROM results WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            if row[1] < time.time():
+                # Left for the eviction of a later write, which keeps the running total
+                return None
+            return row[0]
+
+    def set(self, key: str, value: str, expires_at: float):
+        self.set_many([(key, value)], expires_at)
+
+    def set_many(self, items: list, expires_at: float):
+        """
+        Store (key, value) results in one transaction, then evict down to the
+        size limit if over it. Blocks on other processes' writes; keep it
+        off the event loop.
+        """
+        with self.db.transaction() as conn:
+            added = 0
+            for key, value in items:
+                previous = conn.execute("SELECT size FROM results WHERE key = ?", (key,)).fetchone()
+                conn.execute(
+                    "INSERT OR REPLACE INTO results (key, value, size, expires_at) VALUES (?, ?, ?, ?)",
+                    (key, value, len(value), expires_at),
+                )
+                added += len(value) - (previous[0] if previous else 0)
+            conn.execute("UPDATE totals SET value = value + ? WHERE name = 'bytes'", (added,))
+            total = conn.execute("SELECT value FROM totals WHERE name = 'bytes'").fetchone()[0]
+            if total > self.max_bytes:
+                self._evict(conn, total - int(self.max_bytes * EVICTION_TARGET))
+
+    def _evict(self, conn, excess: int):
+        # Expired results sort first, as every result has the same TTL: the
+        # earliest to expire is the oldest
+        freed = evicted = 0
+        while freed < excess:
+            rows = conn.execute(
+                "SELECT key, size FROM results ORDER BY expires_at LIMIT ?", (EVICTION_BATCH,)
+            ).fetchall()
+            if not rows:
+                break
+            for key, size in rows:
+                conn.execute("DELETE FROM results WHERE key = ?", (key,))
+                freed += size
+                evicted += 1
+                if freed >= excess:
+                    break
+        conn.execute("UPDATE totals SET value = value - ? WHERE name = 'bytes'", (freed,))
+        self.evictions += evicted
+
+    def stats(self) -> dict:
+        with self.db.lock:
+            conn = self.db.conn
+            entries = conn.execute("SELECT COUNT(*) FROM results").fetchone()[0]
+            size = conn.execute("SELECT value FROM totals WHERE name = 'bytes'").fetchone()[0]
+        return {"entries": entries, "bytes": size, "max_bytes": self.max_bytes, "evictions": self.evictions}
+
+    def close(self):
+        self.db.close()
+
+
+class ResultCache:
+    """
+    Two-tier result cache: an in-memory LRU bounded by entry count, total
+    size and TTL, in front of an optional on-disk tier.
+    Values are stored as JSON, so every hit returns a fresh copy.
+    """
+
+    def __init__(self, max_entries: int, max_bytes: int, ttl_seconds: float, disk: DiskCache = None):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.disk = disk
+        self._entries = OrderedDict()  # key -> (expires_at, json_value)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def _remove(self, key: str):
+        _, value = self._entries.pop(key)
+        self._bytes -= len(value)
+
+    def _store(self, key: str, expires_at: float, value: str):
+        if key in self._entries:
+            self._remove(key)
+        if len(value) > self.max_bytes:
+            return
+        self._entries[key] = (expires_at, value)
+        self._bytes += len(value)
+        while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+            self._remove(next(iter(self._entries)))
+            self.evictions += 1
+
+    def get(self, key: str):
+        """
+        Return the cached value for key, or None on a miss.
+        """
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[0] >= now:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return json.loads(entry[1])
+                self._remove(key)
+                self.expirations += 1
+
+        if self.disk is not None:
+            value = self.disk.get(key)
+            if value is not None:
+                with self._lock:
+                    self._store(key, now + self.ttl_seconds, value)
+                    self.disk_hits += 1
+                return json.loads(value)
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def set(self, key: str, value):
+        self.set_many([(key, value)])
+
+    def set_many(self, items: list):
+        """
+        Store (key, value) pairs; on disk, in one transaction. With a disk
+        tier this blocks on other processes' writes.
+        """
+        expires_at = time.time() + self.ttl_seconds
+        serialized = [(key, json.dumps(value)) for key, value in items]
+        with self._lock:
+            for key, value in serialized:
+                self._store(key, expires_at, value)
+        if self.disk is not None and serialized:
+            self.disk.set_many(serialized, expires_at)
+
+    async def get_or_compute(self, pipeline: str, text: str, compute):
+        """
+        Return the cached result of `pipeline` for `text`, computing it with
+        `await compute(normalized_text)` on a miss. Error results are not cached.
+        """
+        key = make_key(pipeline, text)
+        cached = self.get(key)
+        if cached is not None:
+            return cached
+        result = await compute(normalize_text(text))
+        if not (isinstance(result, dict) and "error" in result):
+            if self.disk is None:
+                self.set(key, result)
+            else:
+                # The disk write may wait for other processes and evict; keep it off the event loop
+                await asyncio.get_running_loop().run_in_executor(None, self.set, key, result)
+        return result
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.disk_hits + self.misses
+            stats = {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "ttl_seconds": self.ttl_seconds,
+                "disk_enabled": self.disk is not None,
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "hit_rate": round((self.hits + self.disk_hits) / lookups, 4) if lookups else 0.0,
+            }
+            if self.disk is not None:
+                stats["disk"] = self.disk.stats()
+            return stats
+
+
+# Shared cache for the analysis routes
+result_cache = ResultCache(
+    max_entries=Config.RESULT_CACHE_MAX_ENTRIES,
+    max_bytes=Config.RESULT_CACHE_MAX_BYTES,
+    ttl_seconds=Config.RESULT_CACHE_TTL_SECONDS,
+    disk=DiskCache(Config.RESULT_CACHE_PATH, Config.RESULT_CACHE_DISK_MAX_BYTES) if Config.RESULT_CACHE_PATH else None,
+)
@@ -1,47 +1,47 @@
 # Cerebras Service
 import os
 import asyncio
-import httpx
 import json
 import re
 from config import Config
+from . import entity_scanner
+from .document_features import features_of
+from . import keyword_matcher
+from . import llm_client
+from .metrics_service import stage_timer
 
-async def analyze_contract(text: str) -> str:
+# Limits of the single-pass extraction response (extract_clauses)
+MAX_SECTIONS = 10
+MAX_CLAUSES = 15
+MAX_CONTENT_CHARS = 500
+
+async def analyze_contract(text) -> str:
     """
     Analyze a contract using Cerebras AI.
+    `text` is the raw text or its DocumentFeatures.
     """
+    features = features_of(text)
     # In a real implementation, you would call the Cerebras API here
     api_key = Config.CEREBRAS_API_KEY
     
     if not api_key:
         # Return a mock response if no API key is configured
-        analysis = f"Analysis of contract with {len(text)} characters:\n\n"
+        analysis = f"Analysis of contract with {features.length} characters:\n\n"
         analysis += "1. Key Terms Identified\n"
         analysis += "2. Potential Risks Highlighted\n"
         analysis += "3. Compliance Issues Noted\n"
         analysis += "4. Recommendations Provided"
         return analysis
     
-    # Example of how you would make an API call to Cerebras:
-    # async with httpx.AsyncClient() as client:
-    #     headers = {
-    #         "Authorization": f"Bearer {api_key}",
-    #         "Content-Type": "application/json"
-    #     }
-    #     data = {
-    #         "prompt": f"Analyze this legal contract: {text[:1000]}",
-    #         "max_tokens": 1000
-    #     }
-    #     response = await client.post(
-    #         "https://api.cerebras.ai/v1/analyze",
-    #         headers=headers,
-    #         json=data
-    #     }
-    #     response.raise_for_status()
-    #     return response.json()["analysis"]
+    if Config.LLM_ENABLED:
+        # Shared, pooled client created in the application lifespan
+        return await llm_client.get_client("cerebras").chat(
+            [{"role": "user", "content": f"Analyze this legal contract: {features.text[:1000]}"}],
+            max_tokens=1000,
+        )
     
     # For now, return a mock response
-    analysis = f"Analysis of contract with {len(text)} characters:\n\n"
+    analysis = f"Analysis of contract with {features.length} characters:\n\n"
     analysis += "1. Key Terms Identified\n"
     analysis += "2. Potential Risks Highlighted\n"
     analysis += "3. Compliance Issues Noted\n"
@@ -49,78 +49,23 @@ async def analyze_contract(text: str) -> str:
     
     return analysis
 
-async def extract_clauses(text: str) -> dict:
+def extract_parties(cleaned_text: str) -> list:
     """
-    Extract clauses from a legal document using Cerebras inference API.
-    For now, we'll implement a rule-based extraction that works for any document.
-    In a real implementation, you would call the Cerebras API.
+    Find the contracting parties (patterns like "between X and Y").
+    """
+    # Anchor-windowed scan: linear time however the text is shaped
+    return entity_scanner.scan_parties(cleaned_text)
+
+def extract_dates(cleaned_text: str) -> list:
+    """
+    Find every date, normalized to ISO 8601, in document order.
+    """
+    return entity_scanner.scan_dates(cleaned_text)
+
+def split_sections(cleaned_text: str) -> list:
+    """
+    Split a document into candidate clause sections.
     """
-    # Clean the text
-    cleaned_text = text.strip()
-    
-    # If no API key is configured or text is empty, return a basic mock response
-    if not cleaned_text:
-        return {
-            "parties": [],
-            "effective_date": "",
-            "termination_date": "",
-            "clauses": []
-        }
-    
-    # Try to extract parties (look for patterns like "between X and Y")
-    parties = []
-    party_patterns = [
-        r'(?:between|by and between)\s+([^,]+?),?\s+(?:a\s+[^\s]+?\s+corporation\s+)?\(\s*["\']?[Pp]arty\s*[Aa]["\']?\s*\)\s*,?\s+and\s+([^,]+?),?\s+(?:a\s+[^\s]+?\s+corporation\s+)?\(\s*["\']?[Pp]arty\s*[Bb]["\']?\s*\)',
-        r'(?:between|by and between)\s+([^,]+?)\s*,?\s+and\s+([^,]+?)(?:\s*\n|\.\s|\s*\(?\s*["\']?[Pp]arty)',
-        r'([^,]+?)\s*\(\s*["\']?[Dd]isclosing\s*[Pp]arty["\']?\s*\)\s+and\s+([^,]+?)\s*\(\s*["\']?[Rr]eceiving\s*[Pp]arty["\']?\s*\)',
-        r'([^,]+?)\s*\(\s*["\']?[Cc]lient["\']?\s*\)\s+and\s+([^,]+?)\s*\(\s*["\']?[Ss]ervice\s*[Pp]rovider["\']?\s*\)',
-    ]
-    
-    for pattern in party_patterns:
-        matches = re.findall(pattern, cleaned_text, re.IGNORECASE | re.DOTALL)
-        if matches:
-            for match in matches:
-                if isinstance(match, tuple):
-                    # Clean up the party names
-                    party1 = re.sub(r'\s*\([^)]*\)', '', match[0]).strip()
-                    party2 = re.sub(r'\s*\([^)]*\)', '', match[1]).strip()
-                    parties.extend([party1, party2])
-                else:
-                    # Clean up the party name
-                    party = re.sub(r'\s*\([^)]*\)', '', match).strip()
-                    parties.append(party)
-            break
-    
-    # If we didn't find parties with the specific patterns, try a simpler approach
-    if not parties:
-        simple_patterns = [
-            r'(?:between|by and between)\s+([^,]+?)\s+and\s+([^,]+?)(?:\s*\n|\.|\s*\(?\s*party)',
-            r'([^,]+?)\s+and\s+([^,]+?)\s+as\s+of',
-        ]
-        
-        for pattern in simple_patterns:
-            matches = re.findall(pattern, cleaned_text, re.IGNORECASE)
-            if matches:
-                for match in matches:
-                    if isinstance(match, tuple):
-                        parties.extend([match[0].strip(), match[1].strip()])
-                    else:
-                        parties.append(match.strip())
-                break
-    
-    # Remove duplicates and clean up parties
-    parties = list(set([party.strip(' .,') for party in parties if len(party.strip()) > 3 and len(party.strip()) < 100]))
-    
-    # Try to extract dates
-    date_pattern = r'\b(?:January|February|March|April|May|June|July|August|September|October|November|December)\s+\d{1,2},?\s+\d{4}'
-    dates = re.findall(date_pattern, cleaned_text, re.IGNORECASE)
-    
-    effective_date = dates[0] if dates else ""
-    termination_date = dates[-1] if len(dates) > 1 else ""
-    
-    # Extract clauses using a rule-based approach
-    clauses = []
-    
     # Split text into sections using multiple strategies
     # Strategy 1: Split by numbered sections
     sections = re.split(r'\n\s*\d+\.\s*', '\n' + cleaned_text)
@@ -141,81 +86,149 @@ async def extract_clauses(text: str) -> dict:
         sections = re.split(r'\n\s*\n', cleaned_text)
         sections = [section.strip() for section in sections if section.strip() and len(section.strip()) > 20]
     
-    # Define common clause types and keywords
-    clause_keywords = {
-        "confidentiality": ["confidential", "secrecy", "non-disclosure", "secret"],
-        "termination": ["terminate", "end", "cancel", "expiration"],
-        "payment": ["payment", "fee", "charge", "compensation", "consideration"],
-        "liability": ["liability", "responsibility", "accountable"],
-        "warranty": ["warranty", "guarantee", "assure"],
-        "governing_law": ["governing law", "jurisdiction", "venue"],
-        "dispute": ["dispute", "arbitration", "mediation"],
-        "term": ["term", "duration", "period"]
+    return sections
+
+def classify_section(section: str, index: int, max_content: int = MAX_CONTENT_CHARS) -> dict:
+    """
+    Type and title one section; `index` is its position in the document.
+    The content is cut to `max_content` characters (None keeps it whole).
+    """
+    # Determine clause type based on keywords
+    clause_type = "general"
+    clause_title = f"Section {index+1}"
+    
+    # The first clause type with a keyword in the section
+    ctype = keyword_matcher.clause_matcher.first_group(section.lower())
+    if ctype:
+        clause_type = ctype
+        # Try to extract a better title
+        lines = section.split('\n')
+        if lines and len(lines[0]) < 100:
+            # Check if first line looks like a title (all caps or ends with colon)
+            first_line = lines[0].strip()
+            if first_line.isupper() or first_line.endswith(':'):
+                clause_title = first_line.rstrip(':').title()
+            else:
+                # Use the clause type as title
+                clause_title = f"{ctype.replace('_', ' ').title()} Clause"
+        else:
+            clause_title = f"{ctype.replace('_', ' ').title()} Clause"
+    
+    # If we couldn't determine a specific title, try to extract from the first sentence
+    if clause_title == f"Section {index+1}":
+        lines = section.split('\n')
+        if lines and len(lines[0]) < 100:
+            first_line = lines[0].strip()
+            if len(first_line) > 10 and not first_line.isupper():
+                # Use first part of the first sentence as title
+                sentence_end = first_line.find('.')
+                if sentence_end > 0:
+                    clause_title = first_line[:sentence_end].strip()
+                else:
+                    clause_title = first_line[:50].strip() + ("..." if len(first_line) > 50 else "")
+            elif first_line.isupper():
+                clause_title = first_line.title().rstrip(':')
+    
+    return {
+        "type": clause_type,
+        "title": clause_title,
+        "content": section[:max_content]  # Limit content length
     }
+
+def iter_extraction(text, max_sections: int = MAX_SECTIONS, max_content: int = MAX_CONTENT_CHARS):
+    """
+    Run the rule-based extraction stage by stage. Yields ("parties", list),
+    then ("dates", (effective_date, termination_date)), then one
+    ("clause", dict) per section as soon as it has been classified, for the
+    first `max_sections` sections (None for all of them).
+    `text` is the raw text or its DocumentFeatures.
+    """
+    features = features_of(text)
+    # Clean the text
+    cleaned_text = features.cleaned
+    
+    # If no API key is configured or text is empty, return a basic mock response
+    if not cleaned_text:
+        yield "parties", []
+        yield "dates", ("", "")
+        return
+    
+    with stage_timer("extract_clauses.parties"):
+        parties = features.parties
+    yield "parties", parties[:5]  # Limit to first 5 parties
+    
+    # Try to extract dates
+    with stage_timer("extract_clauses.dates"):
+        dates = features.dates
+    
+    effective_date = dates[0] if dates else ""
+    termination_date = dates[-1] if len(dates) > 1 else ""
+    yield "dates", (effective_date, termination_date)
+    
+    # Extract clauses using a rule-based approach
+    clause_count = 0
+    with stage_timer("extract_clauses.split_sections"):
+        sections = features.sections
     
     # Process each section to identify clauses
-    for i, section in enumerate(sections[:10]):  # Limit to first 10 sections
+    for i, section in enumerate(sections[:max_sections]):
         # Skip very short sections that are likely headers
         if len(section) < 20:
             continue
-            
-        # Determine clause type based on keywords
-        clause_type = "general"
-        clause_title = f"Section {i+1}"
         
-        section_lower = section.lower()
-        for ctype, keywords in clause_keywords.items():
-            if any(keyword in section_lower for keyword in keywords):
-                clause_type = ctype
-                # Try to extract a better title
-                lines = section.split('\n')
-                if lines and len(lines[0]) < 100:
-                    # Check if first line looks like a title (all caps or ends with colon)
-                    first_line = lines[0].strip()
-                    if first_line.isupper() or first_line.endswith(':'):
-                        clause_title = first_line.rstrip(':').title()
-                    else:
-                        # Use the clause type as title
-                        clause_title = f"{ctype.replace('_', ' ').title()} Clause"
-                else:
-                    clause_title = f"{ctype.replace('_', ' ').title()} Clause"
-                break
-        
-        # If we couldn't determine a specific title, try to extract from the first sentence
-        if clause_title == f"Section {i+1}":
-            lines = section.split('\n')
-            if lines and len(lines[0]) < 100:
-                first_line = lines[0].strip()
-                if len(first_line) > 10 and not first_line.isupper():
-                    # Use first part of the first sentence as title
-                    sentence_end = first_line.find('.')
-                    if sentence_end > 0:
-                        clause_title = first_line[:sentence_end].strip()
-                    else:
-                        clause_title = first_line[:50].strip() + ("..." if len(first_line) > 50 else "")
-                elif first_line.isupper():
-                    clause_title = first_line.title().rstrip(':')
-        
-        clauses.append({
-            "type": clause_type,
-            "title": clause_title,
-            "content": section[:500]  # Limit content length
-        })
+        clause_count += 1
+        with stage_timer("extract_clauses.classify_section"):
+            clause = classify_section(section, i, max_content)
+        yield "clause", clause
     
     # If no clauses were found using the rule-based approach, create a default clause
-    if not clauses:
-        clauses.append({
+    if not clause_count:
+        yield "clause", {
             "type": "document_content",
             "title": "Document Content",
             "content": cleaned_text[:1000]
-        })
-    
-    return {
-        "parties": parties[:5],  # Limit to first 5 parties
-        "effective_date": effective_date,
-        "termination_date": termination_date,
-        "clauses": clauses[:15]  # Limit to first 15 clauses
+        }
+
+def _collect(stages) -> dict:
+    result = {
+        "parties": [],
+        "effective_date": "",
+        "termination_date": "",
+        "clauses": []
     }
+    for stage, value in stages:
+        if stage == "parties":
+            result["parties"] = value
+        elif stage == "dates":
+            result["effective_date"], result["termination_date"] = value
+        else:
+            result["clauses"].append(value)
+    return result
+
+def extract_clauses_sync(text) -> dict:
+    """
+    Rule-based clause extraction. Pure CPU work, so callers that process many
+    documents can run it in an executor.
+    """
+    result = _collect(iter_extraction(text))
+    result["clauses"] = result["clauses"][:MAX_CLAUSES]  # Limit to first 15 clauses
+    return result
+
+def extract_all_clauses_sync(text) -> dict:
+    """
+    extract_clauses_sync without its limits: a clause for every section,
+    with its whole content. Used on each chunk of a long document and to
+    build the clause index.
+    """
+    return _collect(iter_extraction(text, max_sections=None, max_content=None))
+
+async def extract_clauses(text) -> dict:
+    """
+    Extract clauses from a legal document using Cerebras inference API.
+    For now, we'll implement a rule-based extraction that works for any document.
+    In a real implementation, you would call the Cerebras API.
+    """
+    return extract_clauses_sync(text)
     
     # In a real implementation with the Cerebras API, you would use something like this:
     # (Commenting out the actual implementation to avoid syntax errors)
@@ -247,6 +260,7 @@ async def extract_clauses(text: str) -> dict:
     
     try:
         # Make API call to Cerebras inference endpoint
+        # (use llm_client.get_client("cerebras") rather than a client per request)
         async with httpx.AsyncClient(timeout=30.0) as client:
             headers = {
                 "Authorization": f"Bearer {api_key}",
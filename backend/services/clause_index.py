@@ -0,0 +1,224 @@
+# Clause Index
+import asyncio
+import hashlib
+import re
+import sqlite3
+import time
+from . import longdoc_service
+from .cache_service import result_cache
+from .document_store import DocumentStore, document_store
+from .log_service import get_logger
+from .shared_db import REQUEST_BUSY_TIMEOUT_MS
+
+logger = get_logger(__name__)
+
+# BM25 weights of the clause_fts columns: type, title and content rank,
+# parties and owner_key only filter
+BM25 = "bm25(clause_fts, 2.0, 4.0, 1.0, 0.0, 0.0)"
+PARTY_SEPARATOR = " ; "
+
+_TOKEN_PATTERN = re.compile(r"\w+")
+
+
+def _tokens(text: str) -> list:
+    return _TOKEN_PATTERN.findall(text.lower())
+
+
+def owner_key(owner: str) -> str:
+    """
+    Single-token stand-in for a username, so ownership can be matched in
+    the full-text query itself.
+    """
+    return "o" + hashlib.sha256(owner.encode("utf-8")).hexdigest()[:24]
+
+
+def match_expression(owner: str, query: str = "", clause_type: str = None, party: str = None) -> str:
+    """
+    FTS5 query for the owner's clauses containing any of the words of
+    `query`, of type `clause_type`, in documents with a party whose name has
+    words starting with those of `party`. User input is quoted, so nothing
+    in it is read as query syntax. Empty if there is nothing to search for.
+    """
+    terms = " OR ".join(f'"{token}"' for token in _tokens(query))
+    filters = [f'owner_key : "{owner_key(owner)}"']
+    if clause_type:
+        filters.append(f'type : "{" ".join(_tokens(clause_type))}"')
+    elif not terms:
+        return ""
+    if party and _tokens(party):
+        filters.append(f'parties : "{" ".join(_tokens(party))}" *')
+    if terms:
+        filters.append(f"({terms})")
+    return " AND ".join(filters)
+
+
+class ClauseIndex:
+    """
+    Full-text index of the clauses extracted from stored documents, kept in
+    the document store's database so every worker process shares it and a
+    deleted or evicted document leaves it in the same transaction.
+    Clause type, title and content are tokenized (with stemming) into an
+    SQLite FTS5 inverted index and ranked with BM25, titles and types
+    weighing more than body text. The owner and parties are indexed too, so
+    filtering on them intersects posting lists instead of reading rows.
+    A document is indexed once, the first time its clauses are extracted;
+    its clauses get consecutive rowids, so it is removed by range.
+    """
+
+    def __init__(self, store: DocumentStore):
+        self.db = store.db
+        with self.db.lock:
+            conn = self.db.conn
+            conn.execute(
+                "CREATE VIRTUAL TABLE IF NOT EXISTS clause_fts USING fts5("
+                "type, title, content, parties, owner_key, document_id UNINDEXED, position UNINDEXED, "
+                "tokenize = 'porter unicode61 remove_diacritics 2')"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS clause_documents ("
+                "document_id TEXT PRIMARY KEY, owner TEXT NOT NULL, first_rowid INTEGER NOT NULL, "
+                "clauses INTEGER NOT NULL, indexed_at REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS clause_documents_owner ON clause_documents (owner)")
+            conn.commit()
+        store.delete_hooks.append(self._remove)
+
+    def is_indexed(self, document_id: str) -> bool:
+        with self.db.lock:
+            return self.db.conn.execute(
+                "SELECT 1 FROM clause_documents WHERE document_id = ?", (document_id,)
+            ).fetchone() is not None
+
+    def index_extraction(self, owner: str, document_id: str, extraction: dict) -> bool:
+        """
+        Add the clauses of an extract_clauses result for a stored document.
+        Documents already indexed are skipped (stored text never changes);
+        returns whether anything was added. Raises "database is locked"
+        after REQUEST_BUSY_TIMEOUT_MS.
+        """
+        if not isinstance(extraction, dict) or "error" in extraction:
+            return False
+        clauses = [
+            clause for clause in extraction.get("clauses", []) if clause.get("type") != "document_content"
+        ]
+        parties = PARTY_SEPARATOR.join(extraction.get("parties", []))
+        key = owner_key(owner)
+        # The write lock is held from the rowid allocation to the commit
+        with self.db.transaction(REQUEST_BUSY_TIMEOUT_MS) as conn:
+            if conn.execute("SELECT 1 FROM clause_documents WHERE document_id = ?", (document_id,)).fetchone():
+                return False
+            first_rowid = conn.execute("SELECT COALESCE(MAX(rowid), 0) + 1 FROM clause_fts").fetchone()[0]
+            conn.executemany(
+                "INSERT INTO clause_fts (rowid, type, title, content, parties, owner_key, document_id, position) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                [
+                    (first_rowid + position, clause.get("type", ""), clause.get("title", ""),
+                     clause.get("content", ""), parties, key, document_id, position)
+                    for position, clause in enumerate(clauses)
+                ],
+            )
+            conn.execute(
+                "INSERT INTO clause_documents (document_id, owner, first_rowid, clauses, indexed_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (document_id, owner, first_rowid, len(clauses), time.time()),
+            )
+        return True
+
+    def _remove(self, conn, document_id: str):
+        row = conn.execute(
+            "SELECT first_rowid, clauses FROM clause_documents WHERE document_id = ?", (document_id,)
+        ).fetchone()
+        if row is None:
+            return
+        conn.execute(
+            "DELETE FROM clause_fts WHERE rowid >= ? AND rowid < ?",
+            (row["first_rowid"], row["first_rowid"] + row["clauses"]),
+        )
+        conn.execute("DELETE FROM clause_documents WHERE document_id = ?", (document_id,))
+
+    def search(self, owner: str, query: str = "", clause_type: str = None, party: str = None,
+               limit: int = 20, offset: int = 0) -> list:
+        """
+        The owner's clauses best matching `query`, highest BM25 score first,
+        optionally only those of one clause type and of documents with a
+        given party (see match_expression). With no query, every clause of
+        the type matches.
+        """
+        expression = match_expression(owner, query, clause_type, party)
+        if not expression:
+            return []
+        # Rank every match on rowids alone, then read the columns and build
+        # snippets for the requested page only
+        sql = f"SELECT rowid, -{BM25} AS score FROM clause_fts WHERE clause_fts MATCH ?"
+        args = [expression]
+        if clause_type:
+            # The type's words matched; the type itself must too
+            sql += " AND type = ?"
+            args.append(clause_type)
+        sql += " ORDER BY score DESC LIMIT ? OFFSET ?"
+        args.extend([limit, offset])
+
+        with self.db.lock:
+            conn = self.db.conn
+            scores = {row["rowid"]: row["score"] for row in conn.execute(sql, args).fetchall()}
+            if not scores:
+                return []
+            rows = conn.execute(
+                "SELECT rowid, type, title, content, parties, document_id, position, "
+                "snippet(clause_fts, 2, '[', ']', '...', 24) AS snippet "
+                f"FROM clause_fts WHERE clause_fts MATCH ? AND rowid IN ({', '.join('?' * len(scores))})",
+                [expression, *scores],
+            ).fetchall()
+            rows.sort(key=lambda row: scores[row["rowid"]], reverse=True)
+            filenames = {}
+            for document_id in {row["document_id"] for row in rows}:
+                document = conn.execute("SELECT filename FROM documents WHERE id = ?", (document_id,)).fetchone()
+                filenames[document_id] = document["filename"] if document else None
+        return [
+            {
+                "document_id": row["document_id"],
+                "filename": filenames[row["document_id"]],
+                "position": row["position"],
+                "type": row["type"],
+                "title": row["title"],
+                "content": row["content"],
+                "snippet": row["snippet"],
+                "score": round(scores[row["rowid"]], 4),
+                "parties": row["parties"].split(PARTY_SEPARATOR) if row["parties"] else [],
+            }
+            for row in rows
+        ]
+
+    def stats(self, owner: str) -> dict:
+        with self.db.lock:
+            documents, clauses = self.db.conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(clauses), 0) FROM clause_documents WHERE owner = ?", (owner,)
+            ).fetchone()
+        return {"documents": documents, "clauses": clauses}
+
+
+# Index over the clauses of the documents in the shared document store
+clause_index = ClauseIndex(document_store)
+
+
+async def extract_document(text: str, owner: str = None, document_id: str = None) -> dict:
+    """
+    extract_clauses through the result cache, as the extract routes run it.
+    When the text is the stored document `document_id` of `owner` and not
+    indexed yet, every one of its clauses (not only those the extract
+    response is limited to) is added to the clause index.
+    """
+    extraction = await result_cache.get_or_compute("extract", text, longdoc_service.extract_clauses)
+    if document_id and owner and not clause_index.is_indexed(document_id):
+        # The long-document extraction already has every clause
+        if longdoc_service.is_long_document(text):
+            complete = extraction
+        else:
+            complete = await longdoc_service.extract_all_clauses(text)
+        loop = asyncio.get_running_loop()
+        try:
+            await loop.run_in_executor(None, clause_index.index_extraction, owner, document_id, complete)
+        except sqlite3.OperationalError:
+            # Another process held the write lock too long; the next extract indexes it
+            logger.warning("Could not index document", extra={"document_id": document_id}, exc_info=True)
+    return extraction
@@ -0,0 +1,21 @@
+# CPU Quota
+import os
+
+
+def available_cpus() -> int:
+    """
+    Cores this process may actually use: the CPU affinity mask, further
+    capped by a cgroup v2 CPU quota (docker --cpus) when one is set.
+    """
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except AttributeError:
+        cpus = os.cpu_count() or 1
+    try:
+        with open("/sys/fs/cgroup/cpu.max") as f:
+            quota, period = f.read().split()
+        if quota != "max":
+            cpus = min(cpus, max(1, int(int(quota) / int(period))))
+    except (OSError, ValueError):
+        pass
+    return cpus
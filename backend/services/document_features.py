@@ -0,0 +1,58 @@
+# Document Features
+from functools import cached_property
+from . import entity_scanner
+from . import keyword_matcher
+
+
+class DocumentFeatures:
+    """
+    Everything the services derive from a document's raw text, computed at
+    most once per document and shared between them: the lowercased text,
+    the length, the sections, the summary keyword hits, the dates and the
+    parties. Each feature is computed the first time a service asks for it,
+    so a service that only needs the length never pays for the rest.
+    """
+
+    def __init__(self, text: str):
+        self.text = text
+        self.length = len(text)
+        self.cleaned = text.strip()
+
+    @cached_property
+    def lower(self) -> str:
+        """
+        The lowercased cleaned text, the same length as `cleaned` so offsets
+        are interchangeable. Surrounding whitespace never holds a keyword,
+        party or date, so one copy serves every scan.
+        """
+        return entity_scanner.lowercase(self.cleaned)
+
+    @cached_property
+    def keyword_hits(self) -> list:
+        """
+        Summary keyword groups found in the document (see keyword_matcher).
+        """
+        return keyword_matcher.summary_matcher.present(self.lower)
+
+    @cached_property
+    def sections(self) -> list:
+        from .cerebras_service import split_sections
+        return split_sections(self.cleaned)
+
+    @cached_property
+    def parties(self) -> list:
+        return entity_scanner.scan_parties(self.cleaned, lower=self.lower)
+
+    @cached_property
+    def dates(self) -> list:
+        return entity_scanner.scan_dates(self.cleaned, lower=self.lower)
+
+
+def features_of(document) -> DocumentFeatures:
+    """
+    The DocumentFeatures for `document`, which is either raw text or an
+    already-built DocumentFeatures (returned as is).
+    """
+    if isinstance(document, DocumentFeatures):
+        return document
+    return DocumentFeatures(document)
@@ -0,0 +1,206 @@
+# Document Store
+import hashlib
+import mmap
+import os
+import time
+import uuid
+from config import Config
+from .shared_db import SharedDatabase
+
+# Characters encoded and written at a time
+WRITE_CHUNK_CHARACTERS = 1024 * 1024
+
+
+class DocumentStore:
+    """
+    Parsed document text kept server-side, so clients refer to a document by
+    id instead of sending its text with every request.
+    Each document is one UTF-8 file (compact for the mostly-ASCII text of
+    contracts) read back through a memory map; a SQLite index records its
+    owner, size and last use. Documents unused for `max_age_seconds` expire,
+    and the least recently used go first once the store exceeds `max_bytes`.
+    """
+
+    def __init__(self, directory: str, max_bytes: int, max_age_seconds: float):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.max_age_seconds = max_age_seconds
+        os.makedirs(directory, exist_ok=True)
+        self.db = SharedDatabase(os.path.join(directory, "index.sqlite3"), schema=(
+            "CREATE TABLE IF NOT EXISTS documents ("
+            "id TEXT PRIMARY KEY, owner TEXT NOT NULL, filename TEXT, "
+            "sha256 TEXT NOT NULL, size_bytes INTEGER NOT NULL, characters INTEGER NOT NULL, "
+            "created_at REAL NOT NULL, last_access REAL NOT NULL)",
+            "CREATE INDEX IF NOT EXISTS documents_owner ON documents (owner, sha256)",
+            "CREATE INDEX IF NOT EXISTS documents_access ON documents (last_access)",
+        ))
+        self.evictions = 0
+        # hook(conn, document_id), run in the transaction that deletes a
+        # document, so anything else kept about it in this database goes too
+        self.delete_hooks = []
+
+    def _path(self, document_id: str) -> str:
+        return os.path.join(self.directory, f"{document_id}.txt")
+
+    def put(self, owner: str, text: str, filename: str = None) -> dict:
+        """
+        Store `text` for `owner` and return its metadata. Storing the same
+        text twice for one owner returns the existing document.
+        """
+        # Encoded a slice at a time, so a large text is never copied whole
+        slices = (text[start:start + WRITE_CHUNK_CHARACTERS] for start in range(0, len(text), WRITE_CHUNK_CHARACTERS))
+        return self.put_chunks(owner, slices, filename)
+
+    def put_chunks(self, owner: str, chunks, filename: str = None) -> dict:
+        """
+        put() for a text given as an iterable of string chunks, written out
+        as they come, so the whole text never has to exist in memory.
+        """
+        document_id = uuid.uuid4().hex
+        # Write then rename, so a reader never maps a half-written file
+        temporary_path = self._path(document_id) + ".tmp"
+        digest = hashlib.sha256()
+        size_bytes = characters = 0
+        try:
+            with open(temporary_path, "wb") as f:
+                for chunk in chunks:
+                    data = chunk.encode("utf-8")
+                    digest.update(data)
+                    f.write(data)
+                    size_bytes += len(data)
+                    characters += len(chunk)
+            return self._commit(owner, document_id, temporary_path, digest.hexdigest(), size_bytes, characters, filename)
+        finally:
+            if os.path.exists(temporary_path):
+                os.remove(temporary_path)
+
+    def _commit(self, owner: str, document_id: str, temporary_path: str, digest: str,
+                size_bytes: int, characters: int, filename: str) -> dict:
+        now = time.time()
+        with self.db.lock:
+            row = self.db.conn.execute(
+                "SELECT * FROM documents WHERE owner = ? AND sha256 = ?", (owner, digest)
+            ).fetchone()
+            if row is not None and os.path.exists(self._path(row["id"])):
+                self.db.conn.execute("UPDATE documents SET last_access = ? WHERE id = ?", (now, row["id"]))
+                self.db.conn.commit()
+                return dict(row)
+
+            os.replace(temporary_path, self._path(document_id))
+            self.db.conn.execute(
+                "INSERT INTO documents (id, owner, filename, sha256, size_bytes, characters, created_at, last_access) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (document_id, owner, filename, digest, size_bytes, characters, now, now),
+            )
+            self.db.conn.commit()
+            self._evict(now, keep=document_id)
+            row = self.db.conn.execute("SELECT * FROM documents WHERE id = ?", (document_id,)).fetchone()
+        return dict(row)
+
+    def _owned_row(self, document_id: str, owner: str):
+        row = self.db.conn.execute("SELECT * FROM documents WHERE id = ?", (document_id,)).fetchone()
+        if row is None or row["owner"] != owner:
+            return None
+        if row["last_access"] + self.max_age_seconds <= time.time():
+            self._delete(document_id)
+            self.db.conn.commit()
+            return None
+        return row
+
+    def get(self, document_id: str, owner: str):
+        """
+        Metadata of a document, or None if it does not exist or belongs to
+        someone else.
+        """
+        with self.db.lock:
+            row = self._owned_row(document_id, owner)
+        return dict(row) if row else None
+
+    def get_text(self, document_id: str, owner: str):
+        """
+        The text of a document, or None if it does not exist or belongs to
+        someone else.
+        """
+        with self.db.lock:
+            row = self._owned_row(document_id, owner)
+            if row is None:
+                return None
+            self.db.conn.execute("UPDATE documents SET last_access = ? WHERE id = ?", (time.time(), document_id))
+            self.db.conn.commit()
+        if row["size_bytes"] == 0:
+            return ""
+        try:
+            with open(self._path(document_id), "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                # Decode straight from the mapped pages, with no intermediate bytes copy
+                return str(mapped, "utf-8")
+        except FileNotFoundError:
+            return None
+
+    def list(self, owner: str) -> list:
+        with self.db.lock:
+            rows = self.db.conn.execute(
+                "SELECT * FROM documents WHERE owner = ? ORDER BY created_at DESC", (owner,)
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def delete(self, document_id: str, owner: str) -> bool:
+        with self.db.lock:
+            if self._owned_row(document_id, owner) is None:
+                return False
+            self._delete(document_id)
+            self.db.conn.commit()
+        return True
+
+    def _delete(self, document_id: str):
+        self.db.conn.execute("DELETE FROM documents WHERE id = ?", (document_id,))
+        for hook in self.delete_hooks:
+            hook(self.db.conn, document_id)
+        try:
+            os.remove(self._path(document_id))
+        except FileNotFoundError:
+            pass
+
+    def _evict(self, now: float, keep: str = None):
+        """
+        Drop expired documents, then the least recently used ones until the
+        store fits in max_bytes. `keep` (the document just stored) is spared.
+        """
+        expired = self.db.conn.execute(
+            "SELECT id FROM documents WHERE last_access <= ?", (now - self.max_age_seconds,)
+        ).fetchall()
+        for row in expired:
+            self._delete(row["id"])
+            self.evictions += 1
+
+        total = self.db.conn.execute("SELECT COALESCE(SUM(size_bytes), 0) FROM documents").fetchone()[0]
+        if total > self.max_bytes:
+            rows = self.db.conn.execute(
+                "SELECT id, size_bytes FROM documents WHERE id != ? ORDER BY last_access", (keep,)
+            ).fetchall()
+            for row in rows:
+                if total <= self.max_bytes:
+                    break
+                self._delete(row["id"])
+                total -= row["size_bytes"]
+                self.evictions += 1
+        self.db.conn.commit()
+
+    def stats(self) -> dict:
+        with self.db.lock:
+            count, total = self.db.conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size_bytes), 0) FROM documents"
+            ).fetchone()
+        return {
+            "documents": count,
+            "bytes": total,
+            "max_bytes": self.max_bytes,
+            "evictions": self.evictions,
+        }
+
+
+# Shared store for parsed uploads
+document_store = DocumentStore(
+    Config.DOCUMENT_STORE_DIR,
+    max_bytes=Config.DOCUMENT_STORE_MAX_BYTES,
+    max_age_seconds=Config.DOCUMENT_STORE_MAX_AGE_SECONDS,
+)
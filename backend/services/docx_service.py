@@ -0,0 +1,91 @@
+# DOCX Service
+import asyncio
+import zipfile
+from io import BytesIO
+from xml.etree.ElementTree import iterparse
+
+_W = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+_PARAGRAPH = _W + "p"
+_TEXT = _W + "t"
+_TAB = _W + "tab"
+_BREAKS = (_W + "br", _W + "cr")
+_BODY = _W + "body"
+
+DOCUMENT_PART = "word/document.xml"
+
+
+def is_docx(archive: zipfile.ZipFile) -> bool:
+    try:
+        archive.getinfo(DOCUMENT_PART)
+    except KeyError:
+        return False
+    return True
+
+
+def _open_archive(source) -> zipfile.ZipFile:
+    if isinstance(source, (bytes, bytearray)):
+        return zipfile.ZipFile(BytesIO(source))
+    return zipfile.ZipFile(source)
+
+
+def iter_paragraphs(source):
+    """
+    Yield the text of each paragraph of a .docx file (bytes, a path or a
+    binary file object), in document order, including paragraphs inside
+    tables. `word/document.xml` is decompressed and parsed incrementally,
+    and each top-level body element is discarded once read, so memory stays
+    flat however long the document is. Tabs and line breaks inside a
+    paragraph are kept, as python-docx's `paragraph.text` does.
+    """
+    with _open_archive(source) as archive, archive.open(DOCUMENT_PART) as part:
+        body = None
+        depth = 0
+        parts = []
+        in_paragraph = 0
+        for event, element in iterparse(part, events=("start", "end")):
+            if event == "start":
+                depth += 1
+                if element.tag == _BODY:
+                    body = element
+                elif element.tag == _PARAGRAPH:
+                    in_paragraph += 1
+                continue
+
+            depth -= 1
+            tag = element.tag
+            if in_paragraph:
+                if tag == _TEXT:
+                    parts.append(element.text or "")
+                elif tag == _TAB:
+                    parts.append("\t")
+                elif tag in _BREAKS:
+                    parts.append("\n")
+                elif tag == _PARAGRAPH:
+                    in_paragraph -= 1
+                    if not in_paragraph:
+                        yield "".join(parts)
+                        parts.clear()
+            if body is not None and depth == 2:
+                # A top-level block (paragraph, table, ...) is done
+                body.clear()
+
+
+def extract_docx(source) -> dict:
+    """
+    Extract the text of a .docx file, one line per paragraph.
+    """
+    paragraphs = 0
+    lines = []
+    for paragraph in iter_paragraphs(source):
+        lines.append(paragraph)
+        paragraphs += 1
+    return {"text": "\n".join(lines), "paragraphs": paragraphs}
+
+
+async def extract_docx_async(source) -> dict:
+    """
+    extract_docx in a worker thread, so parsing a large document does not
+    block the event loop.
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(None, extract_docx, source)
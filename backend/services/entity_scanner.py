@@ -0,0 +1,257 @@
+# Entity Scanner
+import re
+from itertools import islice
+from datetime import date
+
+# How far from an anchor the scanner looks for a party name
+WINDOW = 300
+
+# Longest party name that is kept
+MAX_PARTY_LENGTH = 100
+
+# Anchors of one kind examined before giving up; parties are named near the
+# top of a contract, and this bounds the window work on anchor-dense input
+MAX_ANCHORS = 200
+
+# Anchors are found in the lowercased text with str.find (or a regex with a
+# literal prefix), a single linear pass with no backtracking; the names
+# themselves are cut out of a bounded window with str.find and a plain
+# delimiter split.
+
+# Role labels that come in pairs: "X (Client) and Y (Service Provider)"
+_ROLE_PAIRS = [
+    ("party a", "party b"),
+    ("disclosing party", "receiving party"),
+    ("client", "service provider"),
+]
+_ROLE_LABEL = re.compile(r'\(\s?["\'“]?(party a|disclosing party|client)["\'”]?\s?\)')
+
+# Characters that end a party name
+_NAME_DELIMITERS = (",", "(", ")", "\n", ";", ":", ". ")
+_DELIMITER_PATTERN = re.compile(r'[,()\n;:]|\. ')
+
+_MONTHS = {
+    name: index + 1 for index, name in enumerate([
+        "january", "february", "march", "april", "may", "june", "july",
+        "august", "september", "october", "november", "december",
+    ])
+}
+_MONTH_NAMES = "|".join(_MONTHS)
+# Every date contains a four-digit year, and digits are rare in prose, so
+# dates are found by locating years first and then checking a short window
+# before (month forms) or after (ISO form) each one.
+_YEAR = re.compile(r'\d\d\d\d')
+_BEFORE_YEAR = re.compile(
+    r'\b(?:'
+    r'(?P<month1>' + _MONTH_NAMES + r')\s{1,4}(?P<day1>\d{1,2}),?'
+    r'|(?P<day2>\d{1,2})(?:st|nd|rd|th)?\s{1,4}(?:day of\s{1,4})?(?P<month2>' + _MONTH_NAMES + r'),?'
+    r')\s{1,4}$'
+)
+_ISO_DATE = re.compile(r'(?P<year>\d{4})-(?P<month>\d{2})-(?P<day>\d{2})\b')
+# Longest "1st day of September, " style prefix a year can have
+_DATE_REACH = 40
+
+
+def lowercase(text: str) -> str:
+    """
+    text.lower(), but always the same length as `text` so offsets found in
+    one can be used in the other. The few characters whose lowercase form
+    is longer (such as "İ") are left as they are.
+    """
+    lower = text.lower()
+    if len(lower) != len(text):
+        lower = "".join(char if len(char.lower()) != 1 else char.lower() for char in text)
+    return lower
+
+
+def _is_word(char: str) -> bool:
+    return char.isalnum() or char == "_"
+
+
+def _find_all(lower: str, needle: str):
+    position = lower.find(needle)
+    while position != -1:
+        yield position
+        position = lower.find(needle, position + 1)
+
+
+def _between_anchors(lower: str):
+    """
+    Offsets just after each "between" followed by whitespace.
+    """
+    for position in _find_all(lower, "between"):
+        end = position + len("between")
+        if (position == 0 or not _is_word(lower[position - 1])) and end < len(lower) and lower[end].isspace():
+            yield end + 1
+
+
+def _as_of_anchors(lower: str):
+    """
+    Offsets of the whitespace before each "as of" word.
+    """
+    for position in _find_all(lower, "as of"):
+        end = position + len("as of")
+        if position > 0 and lower[position - 1].isspace() and (end == len(lower) or not _is_word(lower[end])):
+            yield position - 1
+
+
+def _cut(segment: str) -> str:
+    """
+    Keep the part of `segment` before the first name delimiter.
+    """
+    end = len(segment)
+    for delimiter in _NAME_DELIMITERS:
+        position = segment.find(delimiter)
+        if position != -1 and position < end:
+            end = position
+    return segment[:end]
+
+
+def _cut_backwards(segment: str) -> str:
+    """
+    Name that ends `segment`: the text after "between" if it is there,
+    otherwise the last delimited piece that is not a descriptor such as
+    "a Delaware corporation".
+    """
+    position = segment.lower().rfind("between ")
+    if position != -1:
+        return _cut(segment[position + len("between "):])
+    for piece in reversed(_DELIMITER_PATTERN.split(segment)):
+        piece = _clean(piece)
+        if piece and not piece.lower().startswith(("a ", "an ")):
+            return piece
+    return ""
+
+
+def _clean(name: str) -> str:
+    name = " ".join(name.split())
+    return name.strip(' .,;:"\'“”')
+
+
+def _split_and(window: str):
+    """
+    Split "X and Y ..." at the first " and " in the window.
+    """
+    position = window.lower().find(" and ")
+    if position == -1:
+        return None
+    return window[:position], window[position + len(" and "):]
+
+
+def _parties_from_roles(text: str, lower: str):
+    for match in islice(_ROLE_LABEL.finditer(lower), MAX_ANCHORS):
+        first_role = match.group(1)
+        second_role = dict(_ROLE_PAIRS)[first_role]
+        first = _cut_backwards(text[max(0, match.start() - WINDOW):match.start()])
+        after = text[match.end():match.end() + WINDOW]
+        # The second party is named between "and" and its own role label
+        label_position = lower.find(second_role, match.end(), match.end() + WINDOW)
+        if label_position == -1:
+            continue
+        between_labels = after[:label_position - match.end()]
+        parts = _split_and(" " + between_labels.lstrip(" ,"))
+        if parts is None:
+            continue
+        second = parts[1]
+        position = second.rfind("(")
+        if position != -1:
+            second = second[:position]
+        yield first
+        yield _cut(second)
+
+
+def _parties_from_between(text: str, lower: str):
+    for anchor in islice(_between_anchors(lower), MAX_ANCHORS):
+        window = text[anchor:anchor + WINDOW].lstrip()
+        first = _cut(window)
+        rest = window[len(first):]
+        parts = _split_and(rest) if rest.strip(" ,") else None
+        if parts is None:
+            # "between X and Y" with nothing in between the names
+            parts = _split_and(window)
+            if parts is None:
+                continue
+            first = parts[0]
+        yield _cut(first)
+        yield _cut(parts[1])
+
+
+def _parties_from_as_of(text: str, lower: str):
+    for anchor in islice(_as_of_anchors(lower), MAX_ANCHORS):
+        segment = _cut_backwards(text[max(0, anchor - WINDOW):anchor])
+        parts = _split_and(" " + segment)
+        if parts is not None:
+            yield parts[0]
+            yield parts[1]
+
+
+def scan_parties(text: str, limit: int = 5, lower: str = None) -> list:
+    """
+    Find up to `limit` contracting parties, in order of first appearance.
+    Role labels ("Party A", "(Client)", "(Disclosing Party)") are tried first,
+    then "between X and Y", then "X and Y as of". Every anchor is examined
+    through a window of at most WINDOW characters, so the scan is linear in
+    the length of the text whatever its content. Pass `lower` (see
+    lowercase()) when the lowercased text is already at hand.
+    """
+    lower = lowercase(text) if lower is None else lower
+    for candidates in (
+        _parties_from_roles(text, lower),
+        _parties_from_between(text, lower),
+        _parties_from_as_of(text, lower),
+    ):
+        parties = []
+        for candidate in candidates:
+            name = _clean(candidate)
+            if 3 < len(name) < MAX_PARTY_LENGTH and name not in parties:
+                parties.append(name)
+                if len(parties) >= limit:
+                    break
+        if parties:
+            return parties
+    return []
+
+
+def iter_dates(text: str, lower: str = None):
+    """
+    Yield (offset, matched_text, iso_date) for every date in the text.
+    Recognizes "January 1, 2025", "1st day of January, 2025" and "2025-01-01".
+    Whitespace runs are bounded so no match attempt can scan far ahead.
+    """
+    lower = lowercase(text) if lower is None else lower
+    length = len(lower)
+    last_end = 0
+    for year in _YEAR.finditer(lower):
+        year_start, year_end = year.span()
+        if year_start < last_end:
+            continue
+        match = None
+        if year_end == length or not _is_word(lower[year_end]):
+            match = _BEFORE_YEAR.search(lower, max(last_end, year_start - _DATE_REACH), year_start)
+        if match is not None:
+            start, end = match.start(), year_end
+            month = _MONTHS[match.group("month1") or match.group("month2")]
+            day = match.group("day1") or match.group("day2")
+            year_value = year.group(0)
+        else:
+            if year_start > 0 and _is_word(lower[year_start - 1]):
+                continue
+            match = _ISO_DATE.match(lower, year_start)
+            if match is None:
+                continue
+            start, end = match.span()
+            month, day, year_value = int(match.group("month")), match.group("day"), match.group("year")
+        last_end = end
+        try:
+            value = date(int(year_value), month, int(day))
+        except ValueError:
+            # Not a real calendar date (e.g. February 30)
+            continue
+        yield start, text[start:end], value.isoformat()
+
+
+def scan_dates(text: str, lower: str = None) -> list:
+    """
+    ISO 8601 dates found in the text, in document order.
+    """
+    return [iso for _, _, iso in iter_dates(text, lower)]
@@ -0,0 +1,360 @@
+# Job Service
+import asyncio
+import functools
+import json
+import os
+import sqlite3
+import time
+import uuid
+from config import Config
+from .log_service import get_logger, request_id
+from .shared_db import REQUEST_BUSY_TIMEOUT_MS, SharedDatabase
+
+logger = get_logger(__name__)
+
+JOB_KINDS = ("upload", "extract", "summarize", "comprehensive-analysis")
+
+
+class QueueFullError(Exception):
+    pass
+
+
+class JobStore:
+    """
+    SQLite-backed job table, so queued and finished jobs survive a restart.
+    It is also the queue itself: every worker process claims jobs from it,
+    so queue limits and per-user limits hold across the whole deployment.
+    A claimed job is leased to its process until `lease_expires`, which the
+    process keeps renewing while the job runs; a job whose lease ran out
+    (its process died or hung) is queued again.
+    """
+
+    def __init__(self, path: str):
+        self.db = SharedDatabase(path, schema=(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            "id TEXT PRIMARY KEY, owner TEXT NOT NULL, kind TEXT NOT NULL, "
+            "status TEXT NOT NULL, params TEXT NOT NULL, "
+            "result TEXT, error TEXT, created_at REAL NOT NULL, "
+            "started_at REAL, finished_at REAL, claimed_by INTEGER, lease_expires REAL)",
+            "CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, created_at)",
+        ))
+
+    def insert(self, job_id: str, owner: str, kind: str, params: dict, max_queue: int):
+        """
+        Queue a job, or raise QueueFullError if `max_queue` jobs are already
+        waiting. The count and the insert are one transaction, so concurrent
+        submissions from any process cannot push the queue past the limit.
+        Submissions are request paths: when other processes hold the write
+        lock for longer than REQUEST_BUSY_TIMEOUT_MS, QueueFullError is
+        raised too.
+        """
+        try:
+            with self.db.transaction(REQUEST_BUSY_TIMEOUT_MS) as conn:
+                queued = conn.execute("SELECT COUNT(*) FROM jobs WHERE status = 'queued'").fetchone()[0]
+                if queued >= max_queue:
+                    raise QueueFullError("Job queue is full, try again later")
+                conn.execute(
+                    "INSERT INTO jobs (id, owner, kind, status, params, created_at) "
+                    "VALUES (?, ?, ?, 'queued', ?, ?)",
+                    (job_id, owner, kind, json.dumps(params), time.time()),
+                )
+        except sqlite3.OperationalError as e:
+            raise QueueFullError("Job queue is busy, try again later") from e
+
+    def get(self, job_id: str):
+        with self.db.lock:
+            row = self.db.conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return dict(row) if row else None
+
+    def claim_next(self, max_per_user: int, lease_seconds: float):
+        """
+        Atomically mark the oldest queued job whose owner has fewer than
+        `max_per_user` jobs running as running in this process, leased for
+        `lease_seconds`, and return its (id, owner); None when nothing is
+        runnable. Running jobs whose lease has expired are queued again
+        first. Gives up with "database is locked" after
+        REQUEST_BUSY_TIMEOUT_MS; the caller retries.
+        """
+        now = time.time()
+        # The write lock is taken up front, so two processes cannot pick the same job
+        with self.db.transaction(REQUEST_BUSY_TIMEOUT_MS) as conn:
+            expired = conn.execute(
+                "UPDATE jobs SET status = 'queued', started_at = NULL, claimed_by = NULL, lease_expires = NULL "
+                "WHERE status = 'running' AND (lease_expires IS NULL OR lease_expires < ?)",
+                (now,),
+            ).rowcount
+            row = conn.execute(
+                "SELECT id, owner FROM jobs WHERE status = 'queued' AND owner NOT IN ("
+                "SELECT owner FROM jobs WHERE status = 'running' GROUP BY owner HAVING COUNT(*) >= ?) "
+                "ORDER BY created_at LIMIT 1",
+                (max_per_user,),
+            ).fetchone()
+            if row is not None:
+                conn.execute(
+                    "UPDATE jobs SET status = 'running', started_at = ?, claimed_by = ?, lease_expires = ? "
+                    "WHERE id = ?",
+                    (now, os.getpid(), now + lease_seconds, row["id"]),
+                )
+        if expired:
+            logger.warning("Requeued jobs whose lease expired", extra={"jobs": expired})
+        return (row["id"], row["owner"]) if row else None
+
+    def renew(self, job_ids: list, lease_seconds: float):
+        """
+        Extend the leases of jobs this process is running.
+        """
+        if job_ids:
+            self.db.execute(
+                f"UPDATE jobs SET lease_expires = ? WHERE status = 'running' AND id IN ({', '.join('?' * len(job_ids))})",
+                (time.time() + lease_seconds, *job_ids),
+            )
+
+    def release(self, job_ids: list):
+        """
+        Queue again jobs this process stopped running before they finished.
+        """
+        if job_ids:
+            self.db.execute(
+                "UPDATE jobs SET status = 'queued', started_at = NULL, claimed_by = NULL, lease_expires = NULL "
+                f"WHERE status = 'running' AND id IN ({', '.join('?' * len(job_ids))})",
+                tuple(job_ids),
+            )
+
+    def mark_finished(self, job_id: str, result=None, error: str = None):
+        self.db.execute(
+            "UPDATE jobs SET status = ?, result = ?, error = ?, finished_at = ? WHERE id = ?",
+            ("failed" if error else "completed", json.dumps(result) if error is None else None,
+             error, time.time(), job_id),
+        )
+
+    def counts(self, owner: str = None) -> dict:
+        """
+        Number of queued and running jobs, overall or for one owner.
+        """
+        sql = "SELECT status, COUNT(*) AS count FROM jobs WHERE status IN ('queued', 'running')"
+        args = ()
+        if owner is not None:
+            sql += " AND owner = ?"
+            args = (owner,)
+        with self.db.lock:
+            rows = self.db.conn.execute(sql + " GROUP BY status", args).fetchall()
+        counts = {"queued": 0, "running": 0}
+        counts.update({row["status"]: row["count"] for row in rows})
+        return counts
+
+    def close(self):
+        self.db.close()
+
+
+class JobManager:
+    """
+    Bounded pool of asyncio workers running jobs from the store.
+    At most JOB_MAX_PER_USER jobs of one user run at the same time and at
+    most JOB_MAX_QUEUE jobs may be waiting; a user's jobs run in order.
+    Each worker process runs its own pool, and the limits are enforced by
+    the shared store, so they hold across processes. Idle workers are woken
+    by submissions in their own process and otherwise check the store every
+    JOB_POLL_SECONDS for jobs submitted elsewhere. The leases of the jobs
+    running here are renewed every third of JOB_LEASE_SECONDS; jobs
+    interrupted by a shutdown are queued again at once, those of a process
+    that died once their lease expires.
+    """
+
+    def __init__(self, store: JobStore, workers: int, max_per_user: int, max_queue: int,
+                 poll_seconds: float = 0.5, lease_seconds: float = 30.0):
+        self.store = store
+        self.workers = workers
+        self.max_per_user = max_per_user
+        self.max_queue = max_queue
+        self.poll_seconds = poll_seconds
+        self.lease_seconds = lease_seconds
+        self._wakeup = None
+        self._finished_events = {}
+        self._running = set()
+        self._tasks = []
+
+    async def start(self):
+        self._wakeup = asyncio.Event()
+        self._tasks = [asyncio.ensure_future(self._worker()) for _ in range(self.workers)]
+        self._tasks.append(asyncio.ensure_future(self._renew_leases()))
+
+    async def stop(self):
+        interrupted = list(self._running)
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        # Another process (or the next start) runs them again without waiting for the lease
+        self.store.release(interrupted)
+
+    async def submit(self, owner: str, kind: str, params: dict) -> str:
+        if kind not in JOB_KINDS:
+            raise ValueError(f"Unknown job kind: {kind}")
+        job_id = uuid.uuid4().hex
+        # Store calls wait on SQLite locks; keep them off the event loop
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, self.store.insert, job_id, owner, kind, params, self.max_queue)
+        self._wakeup.set()
+        return job_id
+
+    async def _worker(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            self._wakeup.clear()
+            try:
+                claimed = await loop.run_in_executor(None, self.store.claim_next, self.max_per_user, self.lease_seconds)
+            except Exception:
+                # Such as "database is locked" while another process holds the write lock
+                logger.exception("Could not claim a job, retrying")
+                await asyncio.sleep(self.poll_seconds)
+                continue
+            if claimed is None:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), self.poll_seconds)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            job_id, owner = claimed
+            self._running.add(job_id)
+            # Records logged while the job runs carry its id
+            token = request_id.set(job_id)
+            try:
+                await self._run(job_id)
+            except Exception:
+                logger.exception("Job could not be run", extra={"job_id": job_id})
+            finally:
+                request_id.reset(token)
+                self._running.discard(job_id)
+                # The owner's next job may be runnable now
+                self._wakeup.set()
+                event = self._finished_events.pop(job_id, None)
+                if event is not None:
+                    event.set()
+
+    async def _renew_leases(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            await asyncio.sleep(self.lease_seconds / 3)
+            try:
+                await loop.run_in_executor(None, self.store.renew, list(self._running), self.lease_seconds)
+            except Exception:
+                logger.exception("Could not renew job leases")
+
+    async def _run(self, job_id: str):
+        job = self.store.get(job_id)
+        if job is None:
+            return
+        params = json.loads(job["params"])
+        loop = asyncio.get_running_loop()
+        try:
+            result = await execute(job["kind"], params, job["owner"])
+        except Exception as e:
+            logger.warning("Job failed", extra={"job_id": job_id, "kind": job["kind"], "error": str(e)})
+            await loop.run_in_executor(None, functools.partial(self.store.mark_finished, job_id, error=str(e)))
+        else:
+            await loop.run_in_executor(None, functools.partial(self.store.mark_finished, job_id, result=result))
+        if "path" in params:
+            # The uploaded file of a finished job is not needed any more
+            try:
+                os.remove(params["path"])
+            except FileNotFoundError:
+                pass
+
+    async def wait(self, job_id: str, timeout: float):
+        """
+        Long-poll: return once the job has finished or `timeout` has passed.
+        A job running in this process signals its end; one running in
+        another worker process is checked every `poll_seconds`.
+        """
+        deadline = time.monotonic() + timeout
+        event = self._finished_events.setdefault(job_id, asyncio.Event())
+        while True:
+            job = self.store.get(job_id)
+            if job is None or job["status"] in ("completed", "failed"):
+                # It may have finished in another process, which sets no event here
+                self._finished_events.pop(job_id, None)
+                return
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return
+            try:
+                await asyncio.wait_for(event.wait(), min(remaining, self.poll_seconds))
+            except asyncio.TimeoutError:
+                pass
+
+    def stats(self, owner: str = None) -> dict:
+        stats = {
+            "workers": self.workers,
+            "max_per_user": self.max_per_user,
+            "max_queue": self.max_queue,
+        }
+        counts = self.store.counts()
+        stats["queue_depth"] = counts["queued"]
+        stats["running"] = counts["running"]
+        if owner is not None:
+            stats["user"] = self.store.counts(owner)
+        return stats
+
+
+async def execute(kind: str, params: dict, owner: str):
+    """
+    Run one job with the same services the synchronous routes use.
+    """
+    from . import clause_index, longdoc_service, report_service, upload_service
+    from .cache_service import result_cache
+    from .document_store import document_store
+
+    if kind == "upload":
+        filename = params.get("filename")
+        # UnsupportedFileType propagates, failing the job
+        with open(params["path"], "rb") as file:
+            parsed = await upload_service.ingest_upload(file, owner, filename, upload_service.PREVIEW_LENGTH)
+        # The same fields as /upload: the text stays in the document store
+        message = parsed.pop("message")
+        preview = parsed.pop("preview")
+        document = parsed.pop("document")
+        return {
+            "filename": filename, "message": message, "document_id": document["id"],
+            **upload_service.content_fields(document, preview), **parsed,
+        }
+
+    if "document_id" in params:
+        text = document_store.get_text(params["document_id"], owner)
+        if text is None:
+            raise ValueError("Document not found")
+    else:
+        text = params["text"]
+    if kind == "extract":
+        return await clause_index.extract_document(text, owner, params.get("document_id"))
+    if kind == "summarize":
+        return await result_cache.get_or_compute("summarize", text, longdoc_service.summarize_and_score)
+    return await result_cache.get_or_compute(
+        "comprehensive-analysis", text, report_service.generate_comprehensive_analysis
+    )
+
+
+def public_view(job: dict) -> dict:
+    """
+    Job fields returned to clients.
+    """
+    return {
+        "job_id": job["id"],
+        "kind": job["kind"],
+        "status": job["status"],
+        "result": json.loads(job["result"]) if job["result"] else None,
+        "error": job["error"],
+        "created_at": job["created_at"],
+        "started_at": job["started_at"],
+        "finished_at": job["finished_at"],
+    }
+
+
+# Shared job manager, started in the application lifespan
+job_manager = JobManager(
+    JobStore(Config.JOB_DB_PATH),
+    workers=Config.JOB_WORKERS,
+    max_per_user=Config.JOB_MAX_PER_USER,
+    max_queue=Config.JOB_MAX_QUEUE,
+    poll_seconds=Config.JOB_POLL_SECONDS,
+    lease_seconds=Config.JOB_LEASE_SECONDS,
+)
@@ -0,0 +1,170 @@
+# Keyword Matcher
+from collections import deque
+
+try:
+    # C implementation of Aho-Corasick, used when installed
+    import ahocorasick
+except ImportError:
+    ahocorasick = None
+
+# Keywords used to type clauses in cerebras_service.extract_clauses.
+# Order matters: a section gets the first type any of whose keywords it contains.
+CLAUSE_KEYWORDS = {
+    "confidentiality": ["confidential", "secrecy", "non-disclosure", "secret"],
+    "termination": ["terminate", "end", "cancel", "expiration"],
+    "payment": ["payment", "fee", "charge", "compensation", "consideration"],
+    "liability": ["liability", "responsibility", "accountable"],
+    "warranty": ["warranty", "guarantee", "assure"],
+    "governing_law": ["governing law", "jurisdiction", "venue"],
+    "dispute": ["dispute", "arbitration", "mediation"],
+    "term": ["term", "duration", "period"]
+}
+
+# Keywords used by llama_service.summarize_and_score for key points and risk
+SUMMARY_KEYWORDS = {
+    "confidentiality": ["confidential", "secret"],
+    "liability": ["liability", "responsibility"],
+    "termination": ["termination", "cancel"],
+    "payment": ["payment", "fee", "charge"],
+    "warranty": ["warranty", "guarantee"]
+}
+
+
+class KeywordMatcher:
+    """
+    Multi-keyword matcher compiled once from a {group: [keywords]} dictionary.
+    Keywords are matched as lowercase substrings, like `keyword in text.lower()`.
+
+    first_group() and present() only need to know whether a group occurs,
+    so they stop at its first hit: each keyword is one C substring search
+    that returns at its first occurrence, and a group's remaining keywords
+    are skipped once one is found. These are what the hot paths use.
+
+    scan() finds every (possibly overlapping) occurrence in a single pass of
+    an Aho-Corasick automaton and reports hit counts and start offsets per
+    group. It touches every hit, so on keyword-dense text it is several
+    times slower than the first-hit checks. It uses pyahocorasick when
+    installed; the pure-Python fallback is slower still, several times
+    slower than str.find per keyword (see benchmarks/bench_keyword_matcher.py).
+    """
+
+    def __init__(self, keyword_groups: dict, pure_python: bool = False):
+        self.groups = list(keyword_groups)
+        self._group_keywords = [(group, tuple(keywords)) for group, keywords in keyword_groups.items()]
+        self._keyword_groups = {}
+        for group, keywords in keyword_groups.items():
+            for keyword in keywords:
+                self._keyword_groups.setdefault(keyword, []).append(group)
+        self._keywords = list(self._keyword_groups)
+
+        if ahocorasick is not None and not pure_python:
+            self._automaton = ahocorasick.Automaton()
+            for index, keyword in enumerate(self._keywords):
+                self._automaton.add_word(keyword, index)
+            self._automaton.make_automaton()
+        else:
+            self._automaton = None
+            self._build_dfa()
+
+    def _build_dfa(self):
+        # Trie of all keywords
+        goto = [{}]
+        outputs = [[]]
+        for index, keyword in enumerate(self._keywords):
+            state = 0
+            for char in keyword:
+                if char not in goto[state]:
+                    goto.append({})
+                    outputs.append([])
+                    goto[state][char] = len(goto) - 1
+                state = goto[state][char]
+            outputs[state].append(index)
+
+        # Failure links in breadth-first order, folded into a full transition
+        # table so scanning takes exactly one dictionary lookup per character
+        fail = [0] * len(goto)
+        transitions = [None] * len(goto)
+        transitions[0] = dict(goto[0])
+        queue = deque(goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, target in goto[state].items():
+                queue.append(target)
+                fail[target] = transitions[fail[state]].get(char, 0) if state else 0
+                outputs[target] = outputs[target] + outputs[fail[target]]
+            table = dict(transitions[fail[state]])
+            table.update(goto[state])
+            transitions[state] = table
+
+        self._transitions = transitions
+        self._outputs = outputs
+
+    def _keyword_ends(self, text_lower: str) -> list:
+        """
+        Return, for every keyword (by index), the end offsets of its occurrences.
+        """
+        ends = [[] for _ in self._keywords]
+        if self._automaton is not None:
+            for end, index in self._automaton.iter(text_lower):
+                ends[index].append(end)
+            return ends
+
+        lookups = [table.get for table in self._transitions]
+        outputs = self._outputs
+        state = 0
+        for end, char in enumerate(text_lower):
+            state = lookups[state](char, 0)
+            if outputs[state]:
+                for index in outputs[state]:
+                    ends[index].append(end)
+        return ends
+
+    def scan(self, text_lower: str) -> dict:
+        """
+        Scan already-lowercased text and return {group: {"count", "offsets"}}
+        for every group with at least one hit.
+        """
+        hits = {}
+        for index, keyword_ends in enumerate(self._keyword_ends(text_lower)):
+            if not keyword_ends:
+                continue
+            length = len(self._keywords[index]) - 1
+            starts = [end - length for end in keyword_ends]
+            for group in self._keyword_groups[self._keywords[index]]:
+                if group in hits:
+                    hits[group]["offsets"].extend(starts)
+                else:
+                    hits[group] = {"count": 0, "offsets": list(starts)}
+        for group_hits in hits.values():
+            group_hits["offsets"].sort()
+            group_hits["count"] = len(group_hits["offsets"])
+        return hits
+
+    def first_group(self, text_lower: str):
+        """
+        Return the first group (in dictionary order) with a keyword in the
+        already-lowercased text, or None if nothing matched.
+        """
+        for group, keywords in self._group_keywords:
+            for keyword in keywords:
+                if keyword in text_lower:
+                    return group
+        return None
+
+    def present(self, text_lower: str) -> list:
+        """
+        Return the groups (in dictionary order) with a keyword in the
+        already-lowercased text.
+        """
+        groups = []
+        for group, keywords in self._group_keywords:
+            for keyword in keywords:
+                if keyword in text_lower:
+                    groups.append(group)
+                    break
+        return groups
+
+
+# Compiled once at import and shared by the services
+clause_matcher = KeywordMatcher(CLAUSE_KEYWORDS)
+summary_matcher = KeywordMatcher(SUMMARY_KEYWORDS)
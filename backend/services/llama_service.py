@@ -1,8 +1,13 @@
 # Llama Service
 import asyncio
-import httpx
 import json
 from config import Config
+from . import llm_client
+from .document_features import features_of
+from .log_service import get_logger
+from .metrics_service import stage_timer
+
+logger = get_logger(__name__)
 
 async def process_legal_text(text: str) -> str:
     """
@@ -16,40 +21,60 @@ async def process_legal_text(text: str) -> str:
         processed_text = f"Processed legal text with {len(text)} characters"
         return processed_text
     
-    # Example of how you would make an API call to Llama:
-    # async with httpx.AsyncClient() as client:
-    #     headers = {
-    #         "Authorization": f"Bearer {api_key}",
-    #         "Content-Type": "application/json"
-    #     }
-    #     data = {
-    #         "prompt": f"Process this legal text: {text[:1000]}",
-    #         "max_tokens": 1000
-    #     }
-    #     response = await client.post(
-    #         "https://api.llama.ai/v1/process",
-    #         headers=headers,
-    #         json=data
-    #     }
-    #     response.raise_for_status()
-    #     return response.json()["processed_text"]
+    if Config.LLM_ENABLED:
+        return await llm_client.get_client("llama").chat(
+            [{"role": "user", "content": f"Process this legal text: {text[:1000]}"}],
+            max_tokens=1000,
+        )
     
     # For now, return a mock response
     processed_text = f"Processed legal text with {len(text)} characters"
     return processed_text
 
-async def summarize_and_score(text: str) -> dict:
+def model_enabled() -> bool:
+    """
+    Whether summarize_and_score_real calls the model (otherwise it scores
+    with the rule-based summarize_and_score).
+    """
+    return bool(Config.LLAMA_API_KEY) and Config.LLM_ENABLED
+
+def risk_level_for(risk_score: int) -> str:
+    """
+    Map a 0-100 risk score to its risk level label.
+    """
+    if risk_score < 30:
+        return "Low"
+    elif risk_score < 50:
+        return "Medium-Low"
+    elif risk_score < 70:
+        return "Medium"
+    elif risk_score < 90:
+        return "High"
+    else:
+        return "Very High"
+
+async def summarize_and_score(text) -> dict:
     """
     Summarize legal text and provide risk scoring using Meta Llama 3.
     Returns a dictionary with summary, risk score, and other analysis.
+    `text` is the raw text or its DocumentFeatures.
     """
+    features = features_of(text)
     # In a real implementation, you would call the Llama API here
     api_key = Config.LLAMA_API_KEY
     
+    with stage_timer("summarize_and_score.keyword_scan"):
+        keyword_hits = features.keyword_hits
+    return score_document(features.length, keyword_hits)
+
+def score_document(text_length: int, keyword_hits) -> dict:
+    """
+    The rule-based summary and risk score of a document `text_length`
+    characters long in which the summary keyword groups `keyword_hits`
+    (any collection of group names) were found.
+    """
     # Even without a real API key, we can provide more realistic mock responses
     # based on the actual content of the document
-    text_length = len(text)
-    
     # Generate a more realistic summary based on document length
     if text_length < 100:
         summary = "Brief document provided. Contains minimal content for analysis."
@@ -83,31 +108,22 @@ async def summarize_and_score(text: str) -> dict:
         recommendations = ["Comprehensive legal review is essential", "Consider negotiating key terms", "Verify all cross-references", "Assess enforceability of provisions", "Review insurance requirements"]
     
     # Add some content-specific keywords to make it more realistic
-    if "confidential" in text.lower() or "secret" in text.lower():
+    if "confidentiality" in keyword_hits:
         key_points.append("Confidentiality provisions detected")
         risk_score = min(risk_score + 5, 100)
-    if "liability" in text.lower() or "responsibility" in text.lower():
+    if "liability" in keyword_hits:
         key_points.append("Liability clauses present")
         risk_score = min(risk_score + 10, 100)
-    if "termination" in text.lower() or "cancel" in text.lower():
+    if "termination" in keyword_hits:
         key_points.append("Termination conditions identified")
-    if "payment" in text.lower() or "fee" in text.lower() or "charge" in text.lower():
+    if "payment" in keyword_hits:
         key_points.append("Financial obligations present")
         risk_score = min(risk_score + 5, 100)
-    if "warranty" in text.lower() or "guarantee" in text.lower():
+    if "warranty" in keyword_hits:
         key_points.append("Warranty provisions included")
     
     # Adjust risk level based on final score
-    if risk_score < 30:
-        risk_level = "Low"
-    elif risk_score < 50:
-        risk_level = "Medium-Low"
-    elif risk_score < 70:
-        risk_level = "Medium"
-    elif risk_score < 90:
-        risk_level = "High"
-    else:
-        risk_level = "Very High"
+    risk_level = risk_level_for(risk_score)
     
     return {
         "summary": summary,
@@ -117,84 +133,62 @@ async def summarize_and_score(text: str) -> dict:
         "recommendations": recommendations
     }
 
-# In a real implementation with an actual Llama API, you would use something like this:
-async def summarize_and_score_real(text: str) -> dict:
+# Model-backed variant of summarize_and_score; falls back to the dynamic mock
+async def summarize_and_score_real(text) -> dict:
     """
-    Real implementation using Llama API (commented out for now)
+    Real implementation using the Llama API (enabled with LLM_ENABLED)
     """
+    features = features_of(text)
     api_key = Config.LLAMA_API_KEY
     
     if not api_key:
         # Fallback to dynamic mock if no API key
-        return await summarize_and_score(text)
+        return await summarize_and_score(features)
+    
+    if not Config.LLM_ENABLED:
+        # Real model calls are switched off; use the dynamic mock
+        return await summarize_and_score(features)
     
-    # Example of how you would make an API call to Llama for summarization and scoring:
-    # try:
-    #     async with httpx.AsyncClient(timeout=30.0) as client:
-    #         headers = {
-    #             "Authorization": f"Bearer {api_key}",
-    #             "Content-Type": "application/json"
-    #         }
-    #         
-    #         # Create a prompt for summarization and risk scoring
-    #         prompt = f"""
-    #         Analyze the following legal document and provide:
-    #         1. A concise summary (2-3 sentences)
-    #         2. A risk score from 0-100 (0 = no risk, 100 = extremely high risk)
-    #         3. Risk level classification (Low, Medium-Low, Medium, High, Very High)
-    #         4. 3-5 key points from the document
-    #         5. 2-4 recommendations for the user
-    #         
-    #         Document: {text[:3000]}
-    #         
-    #         Please respond in JSON format with the following structure:
-    #         {{
-    #             "summary": "Concise summary here",
-    #             "risk_score": 75,
-    #             "risk_level": "High",
-    #             "key_points": ["Point 1", "Point 2", "Point 3"],
-    #             "recommendations": ["Recommendation 1", "Recommendation 2"]
-    #         }}
-    #         """
-    #         
-    #         data = {
-    #             "model": "llama3",  # or whatever model identifier is correct
-    #             "prompt": prompt,
-    #             "max_tokens": 800,
-    #             "temperature": 0.3
-    #         }
-    #         
-    #         response = await client.post(
-    #             "https://api.llama.ai/v1/completions",  # Replace with correct endpoint
-    #             headers=headers,
-    #             json=data
-    #         }
-    #         
-    #         response.raise_for_status()
-    #         result = response.json()
-    #         
-    #         # Extract and parse the JSON response from the LLM
-    #         if "choices" in result and len(result["choices"]) > 0:
-    #             content = result["choices"][0]["text"]
-    #             try:
-    #                 return json.loads(content)
-    #             except json.JSONDecodeError:
-    #                 # If parsing fails, return a structured response with the raw content
-    #                 return {
-    #                     "summary": content[:500],
-    #                     "risk_score": 50,
-    #                     "risk_level": "Medium",
-    #                     "key_points": ["Response received from LLM"],
-    #                     "recommendations": ["Review the full response"]
-    #                 }
-    #         else:
-    #             # Fallback to dynamic mock if API response is unexpected
-    #             return await summarize_and_score(text)
-    #             
-    # except Exception as e:
-    #     # Fallback to dynamic mock if API call fails
-    #     print(f"Error calling Llama API: {str(e)}")
-    #     return await summarize_and_score(text)
+    # Create a prompt for summarization and risk scoring
+    prompt = f"""
+    Analyze the following legal document and provide:
+    1. A concise summary (2-3 sentences)
+    2. A risk score from 0-100 (0 = no risk, 100 = extremely high risk)
+    3. Risk level classification (Low, Medium-Low, Medium, High, Very High)
+    4. 3-5 key points from the document
+    5. 2-4 recommendations for the user
+    
+    Document: {features.text[:3000]}
+    
+    Please respond in JSON format with the following structure:
+    {{
+        "summary": "Concise summary here",
+        "risk_score": 75,
+        "risk_level": "High",
+        "key_points": ["Point 1", "Point 2", "Point 3"],
+        "recommendations": ["Recommendation 1", "Recommendation 2"]
+    }}
+    """
     
-    # For now, always return the dynamic mock
-    return await summarize_and_score(text)
\ No newline at end of file
+    try:
+        # Shared, pooled client created in the application lifespan
+        content = await llm_client.get_client("llama").chat(
+            [{"role": "user", "content": prompt}],
+            max_tokens=800,
+            temperature=0.3,
+        )
+        try:
+            return json.loads(content)
+        except json.JSONDecodeError:
+            # If parsing fails, return a structured response with the raw content
+            return {
+                "summary": content[:500],
+                "risk_score": 50,
+                "risk_level": "Medium",
+                "key_points": ["Response received from LLM"],
+                "recommendations": ["Review the full response"]
+            }
+    except Exception as e:
+        # Fallback to dynamic mock if API call fails
+        logger.warning("Llama API call failed, scoring without it", extra={"error": str(e)})
+        return await summarize_and_score(features)
@@ -0,0 +1,163 @@
+# LLM Batcher
+import asyncio
+import json
+from config import Config
+from . import llm_client
+from .log_service import get_logger
+
+logger = get_logger(__name__)
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Rough prompt-token estimate (about four characters per token).
+    """
+    return len(text) // 4 + 1
+
+
+class MicroBatcher:
+    """
+    Collects per-item requests for a short window (or until the batch is
+    full) and hands them to `handle_batch(items)` in one go; each caller
+    gets back the result at its own position.
+    A batch is flushed as soon as it reaches `max_batch_size` items or
+    `token_budget` estimated prompt tokens, otherwise after `window_seconds`.
+    """
+
+    def __init__(self, handle_batch, max_batch_size: int, window_seconds: float, token_budget: int):
+        self.handle_batch = handle_batch
+        self.max_batch_size = max(1, max_batch_size)
+        self.window_seconds = window_seconds
+        self.token_budget = token_budget
+        self._pending = []  # (item, future)
+        self._pending_tokens = 0
+        self._timer = None
+        self._tasks = set()
+        self.batches = 0
+        self.items = 0
+
+    async def submit(self, item: str):
+        loop = asyncio.get_running_loop()
+        tokens = estimate_tokens(item)
+        if self._pending and self._pending_tokens + tokens > self.token_budget:
+            # Adding this item would overflow the prompt budget
+            self._flush()
+
+        future = loop.create_future()
+        self._pending.append((item, future))
+        self._pending_tokens += tokens
+
+        if len(self._pending) >= self.max_batch_size or self._pending_tokens >= self.token_budget:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.window_seconds, self._flush)
+        return await future
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if not self._pending:
+            return
+        batch, self._pending, self._pending_tokens = self._pending, [], 0
+        task = asyncio.ensure_future(self._run(batch))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, batch: list):
+        self.batches += 1
+        self.items += len(batch)
+        try:
+            results = await self.handle_batch([item for item, _ in batch])
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for (_, future), result in zip(batch, results):
+            if future.done():
+                continue
+            if isinstance(result, Exception):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+
+    def stats(self) -> dict:
+        return {
+            "batches": self.batches,
+            "items": self.items,
+            "average_batch_size": round(self.items / self.batches, 2) if self.batches else 0.0,
+            "pending": len(self._pending),
+        }
+
+
+async def complete_packed(provider: str, instruction: str, items: list,
+                          max_tokens_per_item: int, temperature: float) -> list:
+    """
+    Ask for every item in one structured prompt and return the per-item
+    results in order. Raises ValueError if the reply cannot be matched up.
+    """
+    numbered = "\n\n".join(f"[{index}]\n{item}" for index, item in enumerate(items))
+    prompt = f"""
+    {instruction}
+    Apply this to each numbered clause below independently.
+
+    {numbered}
+
+    Respond with only a JSON array of {len(items)} objects, in the same order:
+    [{{"index": 0, "result": <result for clause 0>}}, ...]
+    """
+    content = await llm_client.get_client(provider).chat(
+        [{"role": "user", "content": prompt}],
+        max_tokens=max_tokens_per_item * len(items),
+        temperature=temperature,
+    )
+    try:
+        parsed = json.loads(content[content.index("["):content.rindex("]") + 1])
+    except ValueError:
+        raise ValueError("Batched reply is not a JSON array")
+    if not isinstance(parsed, list) or len(parsed) != len(items):
+        raise ValueError("Batched reply does not match the number of clauses")
+
+    results = [None] * len(items)
+    for entry in parsed:
+        index = entry.get("index") if isinstance(entry, dict) else None
+        if not isinstance(index, int) or not 0 <= index < len(items) or results[index] is not None:
+            raise ValueError("Batched reply has missing or duplicate indexes")
+        result = entry.get("result")
+        results[index] = result if isinstance(result, str) else json.dumps(result)
+    return results
+
+
+def make_batch_handler(provider: str, instruction: str, single_call,
+                       max_tokens_per_item: int, temperature: float):
+    """
+    Build a handle_batch function: one packed request when LLM_BATCH_MODE is
+    "packed", concurrent individual requests otherwise. A packed request that
+    fails - a reply that can't be parsed, a transport or HTTP error, a
+    timeout - falls back to individual calls, so one bad request does not
+    fail every item of the batch.
+    """
+    async def handle_batch(items: list) -> list:
+        if Config.LLM_BATCH_MODE == "packed" and len(items) > 1:
+            # httpx is imported on first use, as in llm_client
+            import httpx
+            try:
+                return await complete_packed(provider, instruction, items, max_tokens_per_item, temperature)
+            except (ValueError, KeyError, IndexError, httpx.HTTPError) as e:
+                logger.warning(
+                    "Packed LLM request failed, falling back to single calls",
+                    extra={"provider": provider, "items": len(items), "error": repr(e)},
+                )
+        return await asyncio.gather(*(single_call(item) for item in items), return_exceptions=True)
+
+    return handle_batch
+
+
+def make_batcher(handle_batch) -> MicroBatcher:
+    return MicroBatcher(
+        handle_batch,
+        max_batch_size=Config.LLM_BATCH_SIZE,
+        window_seconds=Config.LLM_BATCH_WINDOW_MS / 1000,
+        token_budget=Config.LLM_BATCH_TOKEN_BUDGET,
+    )
@@ -0,0 +1,96 @@
+# LLM Client
+from config import Config
+from .metrics_service import stage_timer
+
+
+def http2_available() -> bool:
+    try:
+        import h2  # noqa: F401  (required by httpx for HTTP/2)
+    except ImportError:
+        return False
+    return True
+
+
+class LLMClient:
+    """
+    Async client for an OpenAI-compatible chat completions API.
+    One instance is shared by every request, so connections to the provider
+    are pooled and kept alive instead of re-doing the TCP/TLS handshake per call.
+    """
+
+    def __init__(self, name: str, base_url: str, api_key: str, model: str):
+        self.name = name
+        self.base_url = base_url.rstrip("/")
+        self.api_key = api_key
+        self.model = model
+        self._stage = f"llm.{name}"
+        # httpx is imported with the first client, not when the app starts
+        import httpx
+        self._client = httpx.AsyncClient(
+            base_url=self.base_url,
+            headers={"Authorization": f"Bearer {api_key}"},
+            http2=Config.LLM_HTTP2 and http2_available(),
+            limits=httpx.Limits(
+                max_connections=Config.LLM_MAX_CONNECTIONS,
+                max_keepalive_connections=Config.LLM_MAX_KEEPALIVE_CONNECTIONS,
+                keepalive_expiry=Config.LLM_KEEPALIVE_EXPIRY,
+            ),
+            timeout=Config.LLM_TIMEOUT,
+        )
+
+    async def chat(self, messages: list, max_tokens: int = 800, temperature: float = 0.3,
+                   model: str = None, timeout: float = None) -> str:
+        """
+        Run one chat completion and return the stripped message content.
+        `timeout` overrides the client default for this call only.
+        """
+        with stage_timer(self._stage):
+            response = await self._client.post(
+                "/chat/completions",
+                json={
+                    "model": model or self.model,
+                    "messages": messages,
+                    "max_tokens": max_tokens,
+                    "temperature": temperature,
+                },
+                timeout=timeout if timeout is not None else Config.LLM_TIMEOUT,
+            )
+        response.raise_for_status()
+        return response.json()["choices"][0]["message"]["content"].strip()
+
+    async def aclose(self):
+        await self._client.aclose()
+
+
+# Shared clients, one per provider, created by the warm-up or on first use
+_clients = {}
+
+
+def _provider_settings(provider: str) -> tuple:
+    if provider == "llama":
+        return Config.LLAMA_BASE_URL, Config.LLAMA_API_KEY, Config.LLAMA_MODEL
+    if provider == "cerebras":
+        return Config.CEREBRAS_BASE_URL, Config.CEREBRAS_API_KEY, Config.CEREBRAS_MODEL
+    raise ValueError(f"Unknown LLM provider: {provider}")
+
+
+def get_client(provider: str) -> LLMClient:
+    """
+    Return the shared client for a provider ("llama" or "cerebras"),
+    creating it on first use when the warm-up has not.
+    """
+    if provider not in _clients:
+        base_url, api_key, model = _provider_settings(provider)
+        _clients[provider] = LLMClient(provider, base_url, api_key, model)
+    return _clients[provider]
+
+
+async def startup():
+    for provider in ("llama", "cerebras"):
+        get_client(provider)
+
+
+async def shutdown():
+    while _clients:
+        _, client = _clients.popitem()
+        await client.aclose()
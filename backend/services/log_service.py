@@ -0,0 +1,261 @@
+# Log Service
+import atexit
+import contextvars
+import json
+import logging
+import os
+import queue
+import random
+import sys
+import uuid
+from logging.handlers import QueueHandler, QueueListener
+from config import Config
+from .metrics_service import log_records_dropped
+
+ROOT_LOGGER = "lawmind"
+REQUEST_ID_HEADER = b"x-request-id"
+
+# Set per request by RequestIdMiddleware (and per background job), added to every record
+request_id = contextvars.ContextVar("request_id", default=None)
+
+# Attributes every LogRecord has; anything else came from `extra` and is logged as a field
+_RECORD_ATTRIBUTES = set(vars(logging.makeLogRecord({}))) | {"message", "asctime", "sampled"}
+
+_traceback_formatter = logging.Formatter()
+
+
+def _parse_settings(value: str) -> dict:
+    """
+    "routes.upload=DEBUG,services=0.5" -> {"routes.upload": "DEBUG", "services": "0.5"}
+    """
+    settings = {}
+    for item in value.split(","):
+        name, _, setting = item.partition("=")
+        if name.strip() and setting.strip():
+            settings[name.strip()] = setting.strip()
+    return settings
+
+
+def truncate(value, limit: int):
+    """
+    Strings longer than `limit` characters are cut, noting how much was left out.
+    """
+    if isinstance(value, str) and len(value) > limit:
+        return f"{value[:limit]}... [{len(value) - limit} more characters]"
+    return value
+
+
+class JsonFormatter(logging.Formatter):
+    """
+    One JSON object per record: time, level, logger, request id, message
+    and the record's `extra` fields, each string cut to `max_chars`.
+    Tracebacks keep their last `max_chars` characters, where the error is.
+    """
+
+    def __init__(self, max_chars: int):
+        super().__init__()
+        self.max_chars = max_chars
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": round(record.created, 3),
+            "level": record.levelname,
+            "logger": record.name[len(ROOT_LOGGER) + 1:] or record.name,
+            "request_id": getattr(record, "request_id", None),
+            "message": truncate(record.getMessage(), self.max_chars),
+        }
+        for name, value in vars(record).items():
+            if name not in _RECORD_ATTRIBUTES and name not in entry:
+                if not isinstance(value, (str, int, float, bool, type(None))):
+                    value = repr(value)
+                entry[name] = truncate(value, self.max_chars)
+        exception = record.exc_text or (self.formatException(record.exc_info) if record.exc_info else None)
+        if exception:
+            if len(exception) > self.max_chars:
+                exception = "... " + exception[-self.max_chars:]
+            entry["exception"] = exception
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class ContextFilter(logging.Filter):
+    """
+    Adds the current request id, and drops records below WARNING from
+    sampled loggers at the configured rate (the longest matching logger
+    name prefix decides).
+    """
+
+    def __init__(self, sampling: dict):
+        super().__init__()
+        self.sampling = sorted(sampling.items(), key=lambda item: -len(item[0]))
+
+    def _rate(self, name: str) -> float:
+        for prefix, rate in self.sampling:
+            if name == prefix or name.startswith(prefix + "."):
+                return rate
+        return 1.0
+
+    def keep(self, name: str, level: int) -> bool:
+        """
+        Draw whether a record of `level` from logger `name` survives sampling.
+        """
+        if level < logging.WARNING and self.sampling:
+            rate = self._rate(name[len(ROOT_LOGGER) + 1:])
+            if rate < 1.0 and random.random() >= rate:
+                log_records_dropped.inc(("sampled",))
+                return False
+        return True
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        # Records from log_lazily were sampled before they were built
+        if not getattr(record, "sampled", False) and not self.keep(record.name, record.levelno):
+            return False
+        record.request_id = request_id.get()
+        return True
+
+
+class NonBlockingQueueHandler(QueueHandler):
+    """
+    Hands records to the background writer without waiting: when the queue
+    is full the record is dropped and counted in /metrics. The writer
+    thread builds the JSON line; the calling thread only resolves what
+    could change or hold on to a stack frame meanwhile (the message and
+    traceback), so a record costs the request path little.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # QueueHandler.prepare formats a copy of the record for any later
+        # handlers; this is the only handler of the app's loggers
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = _traceback_formatter.formatException(record.exc_info)
+            record.exc_info = None
+        record.stack_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            log_records_dropped.inc(("queue_full",))
+
+
+class DrainingQueueListener(QueueListener):
+    """
+    A QueueListener whose stop() waits for room in a full queue rather than
+    raising queue.Full; the writer thread is still draining it.
+    """
+
+    def enqueue_sentinel(self):
+        self.queue.put(self._sentinel)
+
+
+class LogService:
+    """
+    Structured logging for the app's `lawmind.*` loggers: records become
+    JSON lines written to stdout by a background thread, so request paths
+    never block on the stream. Levels (LOG_LEVEL, LOG_LEVELS) and sampling
+    rates (LOG_SAMPLING) are set per module. The writer thread is
+    restarted in forked worker processes.
+    """
+
+    def __init__(self, level: str, levels: dict, sampling: dict, max_chars: int, queue_size: int, stream=None):
+        self.queue_size = queue_size
+        self.stream = stream or sys.stdout
+        self.context = ContextFilter({name: float(rate) for name, rate in sampling.items()})
+        self.formatter = JsonFormatter(max_chars)
+        self.handler = NonBlockingQueueHandler(queue.Queue(queue_size))
+        self.handler.addFilter(self.context)
+        self.listener = None
+
+        root = logging.getLogger(ROOT_LOGGER)
+        root.setLevel(level.upper())
+        root.propagate = False
+        root.handlers = [self.handler]
+        for name, module_level in levels.items():
+            logging.getLogger(f"{ROOT_LOGGER}.{name}").setLevel(module_level.upper())
+        self._start()
+
+    def _start(self):
+        writer = logging.StreamHandler(self.stream)
+        writer.setFormatter(self.formatter)
+        self.listener = DrainingQueueListener(self.handler.queue, writer)
+        self.listener.start()
+
+    def after_fork(self):
+        # The parent's writer thread was not copied, and its queue's lock may have been held
+        self.handler.queue = queue.Queue(self.queue_size)
+        self._start()
+
+    def redirect(self, stream):
+        """
+        Write records to `stream` from now on, after the queued ones.
+        """
+        self.stop()
+        self.stream = stream
+        self._start()
+
+    def stop(self):
+        """
+        Write out the queued records and stop the writer thread.
+        """
+        if self.listener is not None:
+            self.listener.stop()
+            self.listener = None
+
+
+log_service = LogService(
+    level=Config.LOG_LEVEL,
+    levels=_parse_settings(Config.LOG_LEVELS),
+    sampling=_parse_settings(Config.LOG_SAMPLING),
+    max_chars=Config.LOG_MAX_FIELD_CHARS,
+    queue_size=Config.LOG_QUEUE_SIZE,
+)
+os.register_at_fork(after_in_child=log_service.after_fork)
+atexit.register(log_service.stop)
+
+
+def get_logger(name: str) -> logging.Logger:
+    """
+    Logger for a module (pass __name__), under the app's structured log.
+    """
+    return logging.getLogger(f"{ROOT_LOGGER}.{name}")
+
+
+def log_lazily(logger: logging.Logger, level: int, message: str, make_extra):
+    """
+    Log a record whose `extra` is costly to build: `make_extra()` is only
+    called when the logger's level and sampling let the record through.
+    """
+    if logger.isEnabledFor(level) and log_service.context.keep(logger.name, level):
+        logger.log(level, message, extra={**make_extra(), "sampled": True})
+
+
+class RequestIdMiddleware:
+    """
+    Gives each HTTP request an id, taken from its X-Request-ID header or
+    generated, that is added to every record logged while handling it and
+    returned in the response's X-Request-ID header.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        incoming = next((value for name, value in scope["headers"] if name == REQUEST_ID_HEADER), None)
+        current = incoming[:64].decode("latin-1") if incoming else uuid.uuid4().hex
+        token = request_id.set(current)
+
+        async def send_with_id(message):
+            if message["type"] == "http.response.start":
+                message["headers"] = list(message.get("headers", [])) + [(REQUEST_ID_HEADER, current.encode("latin-1"))]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_id)
+        finally:
+            request_id.reset(token)
@@ -0,0 +1,300 @@
+# Long Document Service
+import asyncio
+import bisect
+import re
+from collections import Counter
+from config import Config
+from . import cerebras_service
+from . import llama_service
+from .document_features import DocumentFeatures, features_of
+
+# Places where a chunk may start or end: numbered sections and blank lines
+_BOUNDARY_PATTERN = re.compile(r'\n(?=\s*\d+\.\s)|\n\s*\n')
+
+
+def is_long_document(text: str) -> bool:
+    return len(text) > Config.LONGDOC_THRESHOLD
+
+
+def section_boundaries(text: str) -> list:
+    """
+    Offsets where a section starts, in ascending order.
+    """
+    return [match.start() for match in _BOUNDARY_PATTERN.finditer(text)]
+
+
+def iter_chunks(text: str, chunk_size: int = None, overlap: int = None):
+    """
+    Yield (start, end) offsets of overlapping chunks of at most `chunk_size`
+    characters. Chunks end and start on section boundaries whenever one is
+    available, so a clause is normally seen whole by at least one chunk.
+    """
+    chunk_size = chunk_size or Config.LONGDOC_CHUNK_SIZE
+    overlap = Config.LONGDOC_CHUNK_OVERLAP if overlap is None else overlap
+    boundaries = section_boundaries(text)
+    length = len(text)
+    start = 0
+    while start < length:
+        end = min(start + chunk_size, length)
+        if end < length:
+            # Last boundary in the second half of the window
+            position = bisect.bisect_right(boundaries, end) - 1
+            if position >= 0 and boundaries[position] > start + chunk_size // 2:
+                end = boundaries[position]
+        yield start, end
+        if end >= length:
+            break
+
+        # Step back by `overlap`, preferring to restart on a section boundary
+        next_start = end - overlap
+        position = bisect.bisect_right(boundaries, next_start) - 1
+        if position >= 0 and start < boundaries[position] < end:
+            next_start = boundaries[position]
+        start = max(next_start, start + 1)
+
+
+def _extract_chunk(chunk: DocumentFeatures, start: int) -> dict:
+    """
+    Every clause of a chunk starting at `start` in the document, with the
+    document offset its section starts at in "offsets" (None if not found).
+    """
+    extraction = cerebras_service.extract_all_clauses_sync(chunk)
+    # The chunk's sections are consecutive, non-overlapping slices of its stripped text
+    base = start + len(chunk.text) - len(chunk.text.lstrip())
+    offsets = []
+    cursor = 0
+    for clause in extraction["clauses"]:
+        found = chunk.cleaned.find(clause["content"], cursor)
+        if found < 0:
+            offsets.append(None)
+        else:
+            offsets.append(base + found)
+            cursor = found + len(clause["content"])
+    extraction["offsets"] = offsets
+    return extraction
+
+
+async def _map_chunk(index: int, text: str, start: int, end: int, extract: bool, summarize: bool) -> tuple:
+    # Shared by extraction and summarization of this chunk
+    chunk = DocumentFeatures(text[start:end])
+    extraction = summary = None
+    if extract:
+        # Rule-based extraction is CPU work; keep it off the event loop
+        loop = asyncio.get_running_loop()
+        extraction = await loop.run_in_executor(None, _extract_chunk, chunk, start)
+    if summarize:
+        summary = await llama_service.summarize_and_score_real(chunk)
+    return index, extraction, summary, end - start
+
+
+class _Reducer:
+    """
+    Merges per-chunk results one at a time, in chunk order, so only the
+    merged result and the chunks currently in flight are held in memory.
+    """
+
+    def __init__(self):
+        self.chunks = 0
+        self.party_counts = Counter()
+        self.first_date = ""
+        self.last_date = ""
+        self.date_count = 0
+        self.clauses = []
+        self.clause_offsets = []  # document offset of each clause's section, or None
+        self.clause_at = {}  # section offset (or type and content) -> index in clauses
+        self.settled = 0  # clauses handed out by take_settled
+        self.summaries = Counter()
+        self.key_points = []
+        self.recommendations = []
+        self.risk_scores = []
+
+    def add(self, extraction: dict, summary: dict, length: int):
+        self.chunks += 1
+        if extraction is not None:
+            self._add_extraction(extraction)
+        if summary is not None:
+            self._add_summary(summary, length)
+
+    def _add_extraction(self, extraction: dict):
+        self.party_counts.update(extraction.get("parties", []))
+
+        for date in (extraction.get("effective_date"), extraction.get("termination_date")):
+            if date:
+                self.first_date = self.first_date or date
+                self.last_date = date
+                self.date_count += 1
+
+        for clause, offset in zip(extraction.get("clauses", []), extraction.get("offsets", [])):
+            if clause["type"] == "document_content":
+                continue
+            # Overlapping chunks see the sections where they overlap twice;
+            # keep the longer copy, as a chunk's last section may be cut short
+            key = offset if offset is not None else (clause["type"], clause["content"])
+            if key in self.clause_at:
+                position = self.clause_at[key]
+                if len(clause["content"]) > len(self.clauses[position]["content"]):
+                    self.clauses[position] = clause
+                continue
+            if len(self.clauses) >= Config.LONGDOC_MAX_CLAUSES:
+                continue
+            self.clause_at[key] = len(self.clauses)
+            self.clauses.append(clause)
+            self.clause_offsets.append(offset)
+
+    def take_settled(self, before: int = None) -> list:
+        """
+        Clauses not handed out yet that no later chunk can replace, in
+        order: those whose section starts before `before`, the start of the
+        latest merged chunk (later chunks start after it, so cannot see
+        them). With no `before`, every clause left.
+        """
+        end = self.settled
+        while end < len(self.clauses):
+            offset = self.clause_offsets[end]
+            # Clauses without an offset are only ever matched by identical copies
+            if before is not None and offset is not None and offset >= before:
+                break
+            end += 1
+        settled = self.clauses[self.settled:end]
+        self.settled = end
+        return settled
+
+    def _add_summary(self, summary: dict, length: int):
+        self.summaries[summary.get("summary", "")] += length
+        for point in summary.get("key_points", []):
+            if point not in self.key_points:
+                self.key_points.append(point)
+        for recommendation in summary.get("recommendations", []):
+            if recommendation not in self.recommendations:
+                self.recommendations.append(recommendation)
+        self.risk_scores.append(summary.get("risk_score", 50))
+
+    def extraction(self) -> dict:
+        return {
+            "parties": [party for party, _ in self.party_counts.most_common(5)],
+            "effective_date": self.first_date,
+            "termination_date": self.last_date if self.date_count > 1 else "",
+            "clauses": self.clauses,
+            "chunks": self.chunks,
+        }
+
+    def summary(self) -> dict:
+        # The riskiest part of a contract drives its overall risk
+        risk_score = max(self.risk_scores) if self.risk_scores else 50
+        summary = self.summaries.most_common(1)[0][0] if self.summaries else "Summary not available"
+        return {
+            "summary": f"Long document analyzed in {self.chunks} parts. {summary}".strip(),
+            "risk_score": risk_score,
+            "risk_level": llama_service.risk_level_for(risk_score),
+            "key_points": self.key_points[:8],
+            "recommendations": self.recommendations[:6],
+            "chunks": self.chunks,
+        }
+
+
+async def reduce_chunks(text: str, reducer: _Reducer, extract: bool = True, summarize: bool = True):
+    """
+    Map extraction and summarization over the chunks of `text` with bounded
+    concurrency, and merge the per-chunk results into `reducer`, in chunk
+    order. Yields the start offset of each chunk once it has been merged.
+    """
+    pending = set()
+    starts = {}  # chunk index -> start offset, until merged
+    finished = {}  # chunk index -> result waiting for earlier chunks
+    next_index = 0
+
+    async def collect() -> list:
+        # Starts of the chunks merged once the next chunk finishes
+        nonlocal pending, next_index
+        done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+        for task in done:
+            index, *result = task.result()
+            finished[index] = result
+        merged = []
+        while next_index in finished:
+            reducer.add(*finished.pop(next_index))
+            merged.append(starts.pop(next_index))
+            next_index += 1
+        return merged
+
+    try:
+        for index, (start, end) in enumerate(iter_chunks(text)):
+            # Only start a new chunk once there is room for it, which keeps the
+            # number of chunk copies alive at any time bounded
+            while len(pending) + len(finished) >= Config.LONGDOC_CONCURRENCY:
+                for merged in await collect():
+                    yield merged
+            starts[index] = start
+            pending.add(asyncio.ensure_future(_map_chunk(index, text, start, end, extract, summarize)))
+        while pending:
+            for merged in await collect():
+                yield merged
+    finally:
+        # A chunk raised, or the caller stopped early or was cancelled: stop the chunks still running
+        for task in pending:
+            task.cancel()
+
+
+async def analyze_long_document(text: str, extract: bool = True, summarize: bool = True) -> _Reducer:
+    """
+    The merged result of every chunk of `text` (see reduce_chunks).
+    """
+    reducer = _Reducer()
+    async for _ in reduce_chunks(text, reducer, extract, summarize):
+        pass
+    return reducer
+
+
+async def iter_clauses(text: str):
+    """
+    The clauses extract_clauses returns for a long document, each yielded
+    as soon as the chunks that can contain its section have been merged,
+    rather than once every chunk has.
+    """
+    reducer = _Reducer()
+    chunks = reduce_chunks(text.strip(), reducer, summarize=False)
+    try:
+        async for start in chunks:
+            for clause in reducer.take_settled(start):
+                yield clause
+    finally:
+        # Cancels the chunks in flight when the consumer stops early
+        await chunks.aclose()
+    for clause in reducer.take_settled():
+        yield clause
+
+
+async def extract_clauses(text: str) -> dict:
+    """
+    extract_clauses that switches to chunked map-reduce for long documents,
+    which returns every clause (up to LONGDOC_MAX_CLAUSES).
+    """
+    if not is_long_document(text):
+        return await cerebras_service.extract_clauses(text)
+    reducer = await analyze_long_document(text.strip(), summarize=False)
+    return reducer.extraction()
+
+
+async def extract_all_clauses(text: str) -> dict:
+    """
+    Every clause of a document of any length, with its whole content.
+    """
+    if not is_long_document(text):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, cerebras_service.extract_all_clauses_sync, text)
+    return await extract_clauses(text)
+
+
+async def summarize_and_score(text) -> dict:
+    """
+    summarize_and_score_real that switches to chunked map-reduce for long
+    documents when a model scores them. The rule-based scorer reads the
+    whole document in one linear pass, and scoring it whole keeps the risk
+    score from changing at LONGDOC_THRESHOLD.
+    `text` is the raw text or its DocumentFeatures.
+    """
+    features = features_of(text)
+    if not is_long_document(features.text) or not llama_service.model_enabled():
+        return await llama_service.summarize_and_score_real(features)
+    reducer = await analyze_long_document(features.cleaned, extract=False)
+    return reducer.summary()
@@ -0,0 +1,328 @@
+# Metrics Service
+import atexit
+import glob
+import json
+import os
+import threading
+import time
+import uuid
+from bisect import bisect_left
+from config import Config
+
+# Histogram bucket upper bounds
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216, 67108864)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names: tuple, values: tuple, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(value)
+
+
+class Counter:
+    def __init__(self, name: str, help_text: str, label_names: tuple):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = label_names
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, labels: tuple, amount: float = 1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return dict(self._values)
+
+    @staticmethod
+    def merge(total: dict, values: dict):
+        for labels, value in values.items():
+            total[labels] = total.get(labels, 0) + value
+
+    def reset(self):
+        with self._lock:
+            self._values = {}
+
+    def render(self, values: dict = None) -> list:
+        values = sorted((self.snapshot() if values is None else values).items())
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        for labels, value in values:
+            lines.append(f"{self.name}{_format_labels(self.label_names, labels)} {_format_value(value)}")
+        return lines
+
+
+class Histogram:
+    """
+    Prometheus-style histogram. Each observation is one bisect plus a few
+    additions under a lock, cheap enough to record on every request.
+    """
+
+    def __init__(self, name: str, help_text: str, label_names: tuple, buckets: tuple):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = label_names
+        self.buckets = buckets
+        self._series = {}  # labels -> [per-bucket counts..., +Inf count, sum]
+        self._lock = threading.Lock()
+
+    def observe(self, labels: tuple, value: float):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [0] * (len(self.buckets) + 2)
+            series[index] += 1
+            series[-1] += value
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {labels: list(values) for labels, values in self._series.items()}
+
+    @staticmethod
+    def merge(total: dict, series: dict):
+        for labels, values in series.items():
+            if labels in total:
+                total[labels] = [a + b for a, b in zip(total[labels], values)]
+            else:
+                total[labels] = list(values)
+
+    def reset(self):
+        with self._lock:
+            self._series = {}
+
+    def render(self, series: dict = None) -> list:
+        series = sorted((self.snapshot() if series is None else series).items())
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        for labels, values in series:
+            cumulative = 0
+            for bound, count in zip(self.buckets + ("+Inf",), values):
+                cumulative += count
+                le = f'le="{bound}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.label_names, labels, le)} {cumulative}")
+            label_text = _format_labels(self.label_names, labels)
+            lines.append(f"{self.name}_sum{label_text} {_format_value(values[-1])}")
+            lines.append(f"{self.name}_count{label_text} {cumulative}")
+        return lines
+
+
+request_duration = Histogram(
+    "lawmind_http_request_duration_seconds", "Time to complete an HTTP request, by route.",
+    ("method", "route"), LATENCY_BUCKETS,
+)
+request_size = Histogram(
+    "lawmind_http_request_size_bytes", "Size of HTTP request bodies, by route.",
+    ("method", "route"), SIZE_BUCKETS,
+)
+response_size = Histogram(
+    "lawmind_http_response_size_bytes", "Size of HTTP response bodies, by route.",
+    ("method", "route"), SIZE_BUCKETS,
+)
+requests_total = Counter(
+    "lawmind_http_requests_total", "HTTP requests, by route and status code.",
+    ("method", "route", "status"),
+)
+request_errors = Counter(
+    "lawmind_http_request_errors_total", "HTTP requests that raised or returned a 5xx status, by route.",
+    ("method", "route"),
+)
+stage_duration = Histogram(
+    "lawmind_stage_duration_seconds", "Time spent in one processing stage.",
+    ("stage",), LATENCY_BUCKETS,
+)
+
+log_records_dropped = Counter(
+    "lawmind_log_records_dropped_total", "Log records not written: sampled out, or the log queue was full.",
+    ("reason",),
+)
+
+METRICS = [request_duration, request_size, response_size, requests_total, request_errors, stage_duration,
+           log_records_dropped]
+
+
+class stage_timer:
+    """
+    Context manager recording the time spent in a block under `stage`:
+
+        with stage_timer("extract_clauses.split_sections"):
+            sections = split_sections(text)
+    """
+
+    __slots__ = ("labels", "start")
+
+    def __init__(self, stage: str):
+        self.labels = (stage,)
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        stage_duration.observe(self.labels, time.perf_counter() - self.start)
+        return False
+
+
+class SharedMetrics:
+    """
+    Metrics summed over every worker process of a deployment. Each process
+    writes a snapshot of its own metrics to a file of its own in
+    `directory` every `flush_seconds`, and whenever it answers /metrics;
+    that process then adds up all the snapshots. Figures of the other
+    workers are therefore up to `flush_seconds` old. Snapshots of workers
+    that exited are kept, so counters do not go backwards when gunicorn
+    replaces a worker; the directory is emptied when the server starts
+    (see gunicorn.conf.py).
+    """
+
+    def __init__(self, directory: str, flush_seconds: float):
+        self.directory = directory
+        self.flush_seconds = flush_seconds
+        os.makedirs(directory, exist_ok=True)
+        self._stopped = None
+        self._start()
+
+    def _start(self):
+        # Named per process lifetime, not by pid alone: a reused pid must not
+        # overwrite (and so lower) the counts of the worker that had it
+        self.path = os.path.join(self.directory, f"{os.getpid()}-{uuid.uuid4().hex[:8]}.json")
+        self._stopped = threading.Event()
+        threading.Thread(target=self._flush_periodically, args=(self._stopped,),
+                         name="metrics-flush", daemon=True).start()
+
+    def after_fork(self):
+        # The child counts from zero in a file of its own; what the parent
+        # recorded before the fork stays in the parent's snapshot
+        for metric in METRICS:
+            metric.reset()
+        self._start()
+
+    def _flush_periodically(self, stopped: threading.Event):
+        while not stopped.wait(self.flush_seconds):
+            self.flush()
+
+    def flush(self):
+        """
+        Write this process's snapshot, replacing the previous one atomically.
+        """
+        snapshot = {
+            metric.name: [[list(labels), value] for labels, value in metric.snapshot().items()]
+            for metric in METRICS
+        }
+        temporary_path = f"{self.path}.tmp"
+        with open(temporary_path, "w") as f:
+            json.dump(snapshot, f)
+        os.replace(temporary_path, self.path)
+
+    def collect(self) -> dict:
+        """
+        Metric name -> values summed over every snapshot in the directory.
+        """
+        self.flush()
+        totals = {metric.name: {} for metric in METRICS}
+        merges = {metric.name: metric.merge for metric in METRICS}
+        for path in glob.glob(os.path.join(self.directory, "*.json")):
+            try:
+                with open(path) as f:
+                    snapshot = json.load(f)
+            except (OSError, ValueError):
+                # Removed or cleared since the glob
+                continue
+            for name, values in snapshot.items():
+                if name in totals:
+                    merges[name](totals[name], {tuple(labels): value for labels, value in values})
+        return totals
+
+    def stop(self):
+        self._stopped.set()
+        self.flush()
+
+
+# With METRICS_DIR, /metrics reports the whole deployment instead of the worker that answered
+shared_metrics = SharedMetrics(Config.METRICS_DIR, Config.METRICS_FLUSH_SECONDS) if Config.METRICS_DIR else None
+if shared_metrics is not None:
+    os.register_at_fork(after_in_child=shared_metrics.after_fork)
+    atexit.register(shared_metrics.stop)
+
+
+def render() -> str:
+    """
+    All metrics in the Prometheus text exposition format, summed over every
+    worker process when METRICS_DIR is set.
+    """
+    totals = shared_metrics.collect() if shared_metrics is not None else {}
+    lines = []
+    for metric in METRICS:
+        lines.extend(metric.render(totals.get(metric.name)))
+    return "\n".join(lines) + "\n"
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware recording latency, body sizes and errors for every HTTP
+    request. Routes are labelled by their path template ("/jobs/{job_id}"),
+    and requests that match no route share one "unmatched" label, so the
+    number of series stays bounded. Durations cover the whole response,
+    including streamed bodies.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self._route_paths = None
+
+    def _route_label(self, scope) -> str:
+        endpoint = scope.get("endpoint")
+        if endpoint is None:
+            return "unmatched"
+        if self._route_paths is None or endpoint not in self._route_paths:
+            # Endpoint -> path template, rebuilt when a router has been included since
+            router = scope["app"].router
+            self._route_paths = {route.endpoint: route.path for route in router.routes if hasattr(route, "endpoint")}
+        return self._route_paths.get(endpoint, "unmatched")
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        received = 0
+        sent = 0
+        status = 500
+
+        async def counting_receive():
+            nonlocal received
+            message = await receive()
+            received += len(message.get("body", b""))
+            return message
+
+        async def counting_send(message):
+            nonlocal sent, status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            elif message["type"] == "http.response.body":
+                sent += len(message.get("body", b""))
+            await send(message)
+
+        try:
+            await self.app(scope, counting_receive, counting_send)
+        except Exception:
+            status = 500
+            raise
+        finally:
+            labels = (scope["method"], self._route_label(scope))
+            request_duration.observe(labels, time.perf_counter() - start)
+            request_size.observe(labels, received)
+            response_size.observe(labels, sent)
+            requests_total.inc(labels + (str(status),))
+            if status >= 500:
+                request_errors.inc(labels)
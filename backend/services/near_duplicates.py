@@ -0,0 +1,171 @@
+# Near-Duplicate Clauses
+import hashlib
+import random
+import re
+import threading
+from collections import OrderedDict
+from config import Config
+
+# MinHash signature length, split into BANDS bands of ROWS values for LSH
+PERMUTATIONS = 128
+BANDS = 32
+ROWS = PERMUTATIONS // BANDS
+SHINGLE_SIZE = 3
+SIMILARITY_BUCKETS = (0.5, 0.6, 0.7, 0.8, 0.85, 0.9, 0.95, 1.0)
+
+_MERSENNE_PRIME = (1 << 61) - 1
+_rng = random.Random(0x1a3d)
+_PERMUTATION_PARAMETERS = [
+    (_rng.randrange(1, _MERSENNE_PRIME), _rng.randrange(0, _MERSENNE_PRIME)) for _ in range(PERMUTATIONS)
+]
+_TOKEN_PATTERN = re.compile(r"\w+")
+
+
+def shingles(text: str) -> set:
+    """
+    Hashes of the overlapping SHINGLE_SIZE-word sequences of the text, case
+    and punctuation ignored.
+    """
+    tokens = _TOKEN_PATTERN.findall(text.lower())
+    if len(tokens) < SHINGLE_SIZE:
+        tokens = [" ".join(tokens)] if tokens else []
+    else:
+        tokens = [" ".join(tokens[i:i + SHINGLE_SIZE]) for i in range(len(tokens) - SHINGLE_SIZE + 1)]
+    return {
+        int.from_bytes(hashlib.blake2b(shingle.encode("utf-8"), digest_size=8).digest(), "big")
+        for shingle in tokens
+    }
+
+
+def signature(text: str) -> tuple:
+    """
+    MinHash signature of the text's shingles: two texts agree on a
+    position with probability equal to the Jaccard similarity of their
+    shingle sets. Empty for text without words.
+    """
+    hashes = shingles(text)
+    if not hashes:
+        return ()
+    return tuple(
+        min([(a * value + b) % _MERSENNE_PRIME for value in hashes])
+        for a, b in _PERMUTATION_PARAMETERS
+    )
+
+
+def similarity(first: tuple, second: tuple) -> float:
+    """
+    Jaccard similarity estimated from two signatures.
+    """
+    return sum(1 for x, y in zip(first, second) if x == y) / PERMUTATIONS
+
+
+def _band_keys(signature: tuple) -> list:
+    return [hash((band, signature[band * ROWS:(band + 1) * ROWS])) for band in range(BANDS)]
+
+
+class NearDuplicateIndex:
+    """
+    Locality-sensitive hashing index of clause MinHash signatures and the
+    results computed for them. Texts sharing all values of one band of their
+    signatures become candidates (almost always above 0.6 similarity, rarely
+    below 0.3); the most similar candidate at or above `threshold` is a
+    match. Entries are evicted least recently matched first.
+    """
+
+    def __init__(self, threshold: float, max_entries: int):
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # id -> (signature, value)
+        self._buckets = {}  # band key -> ids
+        self._next_id = 0
+        self._lock = threading.Lock()
+        self.lookups = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.candidates = 0
+        # Similarity of the best candidate, for hits and for misses that had one
+        self.hit_similarity = [0] * len(SIMILARITY_BUCKETS)
+        self.miss_similarity = [0] * len(SIMILARITY_BUCKETS)
+
+    def lookup(self, signature: tuple):
+        """
+        (value, similarity) of the indexed text most similar to the one with
+        this signature, or None if none reaches the threshold.
+        """
+        with self._lock:
+            self.lookups += 1
+            best, best_similarity = None, 0.0
+            if signature:
+                candidates = set()
+                for key in _band_keys(signature):
+                    candidates.update(self._buckets.get(key, ()))
+                self.candidates += len(candidates)
+                for entry_id in candidates:
+                    score = similarity(signature, self._entries[entry_id][0])
+                    if score > best_similarity:
+                        best, best_similarity = entry_id, score
+            if best is None or best_similarity < self.threshold:
+                self.misses += 1
+                if best is not None:
+                    self._observe(self.miss_similarity, best_similarity)
+                return None
+            self.hits += 1
+            self._observe(self.hit_similarity, best_similarity)
+            self._entries.move_to_end(best)
+            return self._entries[best][1], best_similarity
+
+    def add(self, signature: tuple, value):
+        if not signature or self.max_entries <= 0:
+            return
+        with self._lock:
+            entry_id = self._next_id
+            self._next_id += 1
+            self._entries[entry_id] = (signature, value)
+            for key in _band_keys(signature):
+                self._buckets.setdefault(key, []).append(entry_id)
+            while len(self._entries) > self.max_entries:
+                self._evict()
+
+    def _evict(self):
+        entry_id, (signature, _) = self._entries.popitem(last=False)
+        for key in _band_keys(signature):
+            bucket = self._buckets[key]
+            bucket.remove(entry_id)
+            if not bucket:
+                del self._buckets[key]
+        self.evictions += 1
+
+    @staticmethod
+    def _observe(histogram: list, value: float):
+        for index, bound in enumerate(SIMILARITY_BUCKETS):
+            if value <= bound:
+                histogram[index] += 1
+                return
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "threshold": self.threshold,
+                "permutations": PERMUTATIONS,
+                "bands": BANDS,
+                "shingle_size": SHINGLE_SIZE,
+                "lookups": self.lookups,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / self.lookups, 4) if self.lookups else 0.0,
+                "average_candidates": round(self.candidates / self.lookups, 2) if self.lookups else 0.0,
+                # Counts of best-candidate similarity up to each bound
+                "hit_similarity": dict(zip(map(str, SIMILARITY_BUCKETS), self.hit_similarity)),
+                "miss_similarity": dict(zip(map(str, SIMILARITY_BUCKETS), self.miss_similarity)),
+            }
+
+
+# Model assessments of clauses, reused for near-identical boilerplate
+clause_assessments = NearDuplicateIndex(
+    threshold=Config.NEAR_DUPLICATE_THRESHOLD,
+    max_entries=Config.NEAR_DUPLICATE_MAX_ENTRIES,
+)
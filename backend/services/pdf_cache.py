@@ -0,0 +1,183 @@
+# PDF Page Cache
+import json
+import threading
+import time
+from config import Config
+from .shared_db import SharedDatabase
+
+# Bumped when the way page text is extracted changes, to drop older entries
+CACHE_VERSION = "1"
+
+# Rows evicted per statement, and the share of the size limit eviction frees down to
+EVICTION_BATCH = 256
+EVICTION_TARGET = 0.9
+
+# Host parameters per statement (SQLite's default limit is 999)
+_KEYS_PER_QUERY = 500
+
+
+def _batches(keys: list) -> list:
+    return [keys[start:start + _KEYS_PER_QUERY] for start in range(0, len(keys), _KEYS_PER_QUERY)]
+
+
+class PdfPageCache:
+    """
+    Text extracted from PDF pages, kept on local disk in SQLite and shared
+    by all worker processes. Pages are keyed by a fingerprint of their
+    content, so a revised document only re-parses the pages that changed;
+    whole files are keyed by their hash and list their pages' keys, so a
+    re-upload is answered without opening the document. The total size of
+    the cached text and page lists is bounded by `max_bytes`, least
+    recently used first out.
+    """
+
+    def __init__(self, path: str, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.db = SharedDatabase(path, schema=(
+            "CREATE TABLE IF NOT EXISTS pages ("
+            "key TEXT PRIMARY KEY, text TEXT NOT NULL, size INTEGER NOT NULL, used_at REAL NOT NULL)",
+            "CREATE INDEX IF NOT EXISTS pages_used_at ON pages (used_at)",
+            "CREATE TABLE IF NOT EXISTS files ("
+            "key TEXT PRIMARY KEY, pages TEXT NOT NULL, size INTEGER NOT NULL, used_at REAL NOT NULL)",
+            "CREATE INDEX IF NOT EXISTS files_used_at ON files (used_at)",
+            # Running total of the size column of both tables
+            "CREATE TABLE IF NOT EXISTS totals (name TEXT PRIMARY KEY, value INTEGER NOT NULL)",
+            "INSERT OR IGNORE INTO totals (name, value) VALUES ('bytes', 0)",
+        ))
+        # Counters of this process
+        self._lock = threading.Lock()
+        self.file_hits = 0
+        self.file_misses = 0
+        self.page_hits = 0
+        self.page_misses = 0
+        self.evictions = 0
+
+    def _count(self, **counts):
+        with self._lock:
+            for name, value in counts.items():
+                setattr(self, name, getattr(self, name) + value)
+
+    def get_file(self, key: str):
+        """
+        Page texts of the file with this hash, in page order, or None if the
+        file or any of its pages is not cached.
+        """
+        with self.db.lock:
+            row = self.db.conn.execute("SELECT pages FROM files WHERE key = ?", (key,)).fetchone()
+            texts = None
+            if row is not None:
+                page_keys = json.loads(row[0])
+                pages = self._read_pages(page_keys)
+                if len(pages) == len(set(page_keys)):
+                    texts = [pages[page_key] for page_key in page_keys]
+                    self.db.conn.execute("UPDATE files SET used_at = ? WHERE key = ?", (time.time(), key))
+            self.db.conn.commit()
+        if texts is None:
+            self._count(file_misses=1)
+        else:
+            self._count(file_hits=1, page_hits=len(texts))
+        return texts
+
+    def get_pages(self, keys: list) -> dict:
+        """
+        Texts of the cached pages among `keys`, by key.
+        """
+        with self.db.lock:
+            pages = self._read_pages(keys)
+            self.db.conn.commit()
+        hits = sum(1 for key in keys if key in pages)
+        self._count(page_hits=hits, page_misses=len(keys) - hits)
+        return pages
+
+    def _read_pages(self, keys: list) -> dict:
+        # Marks the pages used; the caller commits
+        pages = {}
+        now = time.time()
+        for batch in _batches(list(set(keys))):
+            placeholders = ", ".join("?" * len(batch))
+            pages.update(self.db.conn.execute(
+                f"SELECT key, text FROM pages WHERE key IN ({placeholders})", batch
+            ).fetchall())
+            self.db.conn.execute(f"UPDATE pages SET used_at = ? WHERE key IN ({placeholders})", (now, *batch))
+        return pages
+
+    def put(self, file_key: str, page_keys: list, texts: dict):
+        """
+        Store the texts of newly parsed pages (by page key) and the page
+        list of the file, then evict down to the size limit if over it.
+        """
+        now = time.time()
+        page_list = json.dumps(page_keys)
+        with self.db.lock:
+            conn = self.db.conn
+            added = 0
+            for key, text in texts.items():
+                size = len(text.encode("utf-8", errors="surrogatepass"))
+                if conn.execute(
+                    "INSERT OR IGNORE INTO pages (key, text, size, used_at) VALUES (?, ?, ?, ?)",
+                    (key, text, size, now),
+                ).rowcount:
+                    added += size
+            previous = conn.execute("SELECT size FROM files WHERE key = ?", (file_key,)).fetchone()
+            conn.execute(
+                "INSERT OR REPLACE INTO files (key, pages, size, used_at) VALUES (?, ?, ?, ?)",
+                (file_key, page_list, len(page_list), now),
+            )
+            added += len(page_list) - (previous[0] if previous else 0)
+            conn.execute("UPDATE totals SET value = value + ? WHERE name = 'bytes'", (added,))
+            total = conn.execute("SELECT value FROM totals WHERE name = 'bytes'").fetchone()[0]
+            if total > self.max_bytes:
+                self._evict(conn, total - int(self.max_bytes * EVICTION_TARGET))
+            conn.commit()
+
+    def _evict(self, conn, excess: int):
+        # Least recently used rows of either table, a batch at a time
+        freed = evicted = 0
+        while freed < excess:
+            rows = conn.execute(
+                "SELECT * FROM (SELECT 'pages', key, size, used_at FROM pages ORDER BY used_at LIMIT ?) "
+                "UNION ALL "
+                "SELECT * FROM (SELECT 'files', key, size, used_at FROM files ORDER BY used_at LIMIT ?) "
+                "ORDER BY used_at LIMIT ?",
+                (EVICTION_BATCH, EVICTION_BATCH, EVICTION_BATCH),
+            ).fetchall()
+            if not rows:
+                break
+            for table, key, size, _ in rows:
+                conn.execute(f"DELETE FROM {table} WHERE key = ?", (key,))
+                freed += size
+                evicted += 1
+                if freed >= excess:
+                    break
+        conn.execute("UPDATE totals SET value = value - ? WHERE name = 'bytes'", (freed,))
+        self._count(evictions=evicted)
+
+    def stats(self) -> dict:
+        with self.db.lock:
+            conn = self.db.conn
+            pages = conn.execute("SELECT COUNT(*) FROM pages").fetchone()[0]
+            files = conn.execute("SELECT COUNT(*) FROM files").fetchone()[0]
+            size = conn.execute("SELECT value FROM totals WHERE name = 'bytes'").fetchone()[0]
+        with self._lock:
+            lookups = self.page_hits + self.page_misses
+            return {
+                "pages": pages,
+                "files": files,
+                "bytes": size,
+                "max_bytes": self.max_bytes,
+                "file_hits": self.file_hits,
+                "file_misses": self.file_misses,
+                "page_hits": self.page_hits,
+                "page_misses": self.page_misses,
+                "evictions": self.evictions,
+                "page_hit_rate": round(self.page_hits / lookups, 4) if lookups else 0.0,
+            }
+
+    def close(self):
+        self.db.close()
+
+
+# Parsed PDF pages, shared by every worker (PDF_CACHE_PATH empty disables it)
+pdf_page_cache = (
+    PdfPageCache(Config.PDF_CACHE_PATH, Config.PDF_CACHE_MAX_BYTES) if Config.PDF_CACHE_PATH else None
+)
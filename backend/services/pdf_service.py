@@ -0,0 +1,229 @@
+# PDF Service
+import asyncio
+import hashlib
+import os
+import shutil
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from io import BytesIO
+from config import Config
+from . import pdf_cache
+
+# Read size when hashing a file
+HASH_CHUNK_BYTES = 1024 * 1024
+
+# Entries that have no bearing on a page's text: the page tree (which links
+# every page), annotations, thumbnails and metadata
+_UNEXTRACTED_ENTRIES = {"/Parent", "/Annots", "/B", "/Thumb", "/Metadata", "/PieceInfo", "/StructParents"}
+
+# Shared process pool, created on first use so importing this module stays cheap
+_pool = None
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _pool
+    if _pool is None:
+        _pool = ProcessPoolExecutor(max_workers=Config.PDF_WORKERS)
+    return _pool
+
+
+def shutdown_pool():
+    """
+    Stop the worker processes (called on application shutdown).
+    """
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=False)
+        _pool = None
+
+
+def _open_reader(source):
+    # pypdf is imported on the first PDF, not when the app starts
+    from pypdf import PdfReader
+    if isinstance(source, (bytes, bytearray)):
+        return PdfReader(BytesIO(source))
+    return PdfReader(source)
+
+
+def _extract_pages(reader, indexes: list) -> list:
+    """
+    Extract the given pages and return (page_number, text, seconds) tuples.
+    """
+    results = []
+    for index in indexes:
+        started = time.perf_counter()
+        text = reader.pages[index].extract_text() or ""
+        results.append((index, text, time.perf_counter() - started))
+    return results
+
+
+def _extract_pages_from(source, indexes: list) -> list:
+    # Runs inside a worker process, so it opens its own reader
+    return _extract_pages(_open_reader(source), indexes)
+
+
+def _chunks(indexes: list, size: int) -> list:
+    return [indexes[start:start + size] for start in range(0, len(indexes), size)]
+
+
+def _cache_prefix() -> bytes:
+    # Text extracted by another pypdf release or cache version is not reused
+    import pypdf
+    return f"{pypdf.__version__}:{pdf_cache.CACHE_VERSION}\0".encode()
+
+
+def file_key(source) -> str:
+    """
+    Hash of the whole file (bytes, a path or a seekable binary file object,
+    which is read in chunks and rewound).
+    """
+    digest = hashlib.sha256(_cache_prefix())
+    if isinstance(source, (bytes, bytearray)):
+        digest.update(source)
+        return digest.hexdigest()
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, "rb") as file:
+            return file_key(file)
+    source.seek(0)
+    for chunk in iter(lambda: source.read(HASH_CHUNK_BYTES), b""):
+        digest.update(chunk)
+    source.seek(0)
+    return digest.hexdigest()
+
+
+def _object_digest(obj, memo: dict) -> bytes:
+    """
+    Digest of a PDF object and everything it references: dictionaries by
+    their entries, streams by their entries and decoded data. Each indirect
+    object is digested once per document (fonts are shared by many pages),
+    and references back to an object being digested count as empty.
+    """
+    from pypdf.generic import ArrayObject, DictionaryObject, IndirectObject, StreamObject
+    if isinstance(obj, IndirectObject):
+        reference = (obj.idnum, obj.generation)
+        if reference not in memo:
+            memo[reference] = b""
+            memo[reference] = _object_digest(obj.get_object(), memo)
+        return memo[reference]
+    digest = hashlib.sha256()
+    if isinstance(obj, DictionaryObject):
+        digest.update(b"<<")
+        for name, value in sorted(obj.items()):
+            if name not in _UNEXTRACTED_ENTRIES:
+                digest.update(name.encode("utf-8", errors="surrogatepass"))
+                digest.update(_object_digest(value, memo))
+        if isinstance(obj, StreamObject) and obj.get("/Subtype") != "/Image":
+            digest.update(b"stream")
+            digest.update(obj.get_data())
+    elif isinstance(obj, ArrayObject):
+        digest.update(b"[")
+        for value in obj:
+            digest.update(_object_digest(value, memo))
+    else:
+        digest.update(f"{type(obj).__name__}:{obj!r}".encode("utf-8", errors="surrogatepass"))
+    return digest.digest()
+
+
+def page_key(page, memo: dict) -> str:
+    """
+    Fingerprint of what a page's text is extracted from: its content
+    stream, and the fonts, form XObjects and other resources it uses
+    (inherited ones included, as the reader copies them onto the page).
+    `memo` is shared by the pages of one document.
+    """
+    digest = hashlib.sha256(_cache_prefix())
+    digest.update(_object_digest(page, memo))
+    return digest.hexdigest()
+
+
+def extract_pdf(source) -> dict:
+    """
+    Extract the text of a PDF given as bytes, a file path or a seekable
+    binary file object.
+    With the page cache, a file parsed before is answered from its hash
+    without being opened, and of any other only the pages not seen before
+    are parsed. Large numbers of pages to parse are split into chunks that
+    are parsed in parallel across the process pool; the page texts are
+    joined once, in page order.
+    Returns the text, the page count, the per-page extraction timings (0
+    for cached pages) and how many pages came from the cache.
+    """
+    started = time.perf_counter()
+    cache = pdf_cache.pdf_page_cache
+    if cache is not None:
+        source_key = file_key(source)
+        texts = cache.get_file(source_key)
+        if texts is not None:
+            return _result(texts, [0.0] * len(texts), len(texts), started)
+
+    reader = _open_reader(source)
+    page_count = len(reader.pages)
+    texts = [None] * page_count
+    timings = [0.0] * page_count
+    if cache is not None:
+        memo = {}
+        page_keys = [page_key(page, memo) for page in reader.pages]
+        cached = cache.get_pages(page_keys)
+        texts = [cached.get(key) for key in page_keys]
+    missing = [index for index, text in enumerate(texts) if text is None]
+
+    pages_per_chunk = max(1, Config.PDF_PAGES_PER_CHUNK)
+    if len(missing) <= pages_per_chunk or Config.PDF_WORKERS <= 1:
+        # Not worth the inter-process overhead for a few pages
+        page_results = _extract_pages(reader, missing)
+    else:
+        page_results = _extract_in_pool(source, missing, pages_per_chunk)
+    for index, text, seconds in page_results:
+        texts[index] = text
+        timings[index] = seconds
+
+    if cache is not None:
+        cache.put(source_key, page_keys, {page_keys[index]: texts[index] for index in missing})
+    return _result(texts, timings, page_count - len(missing), started)
+
+
+def _result(texts: list, timings: list, cached_pages: int, started: float) -> dict:
+    return {
+        "text": "".join(texts),
+        "pages": len(texts),
+        "page_timings": [round(seconds, 6) for seconds in timings],
+        "cached_pages": cached_pages,
+        "total_seconds": round(time.perf_counter() - started, 6),
+    }
+
+
+def _extract_in_pool(source, indexes: list, pages_per_chunk: int) -> list:
+    # Hand the workers a file path rather than pickling the whole document per chunk
+    temp_path = None
+    if not isinstance(source, (str, os.PathLike)):
+        with tempfile.NamedTemporaryFile(suffix=".pdf", delete=False) as temp_file:
+            if isinstance(source, (bytes, bytearray)):
+                temp_file.write(source)
+            else:
+                source.seek(0)
+                shutil.copyfileobj(source, temp_file)
+            temp_path = temp_file.name
+        source = temp_path
+
+    try:
+        pool = _get_pool()
+        futures = [
+            pool.submit(_extract_pages_from, source, chunk)
+            for chunk in _chunks(indexes, pages_per_chunk)
+        ]
+        page_results = []
+        for future in futures:
+            page_results.extend(future.result())
+        return page_results
+    finally:
+        if temp_path:
+            os.unlink(temp_path)
+
+
+async def extract_pdf_async(source) -> dict:
+    """
+    Run extract_pdf off the event loop so other requests keep being served.
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(None, extract_pdf, source)
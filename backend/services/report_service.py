@@ -1,9 +1,11 @@
 # Report Service
 import asyncio
-import httpx
 from config import Config
 from . import cerebras_service
 from . import llama_service
+from . import longdoc_service
+from .document_features import DocumentFeatures
+from .metrics_service import stage_timer
 
 async def generate_summary(text: str) -> str:
     """
@@ -29,12 +31,74 @@ async def generate_comprehensive_analysis(text: str) -> dict:
     """
     Generate a comprehensive analysis including summary, risk scoring, and recommendations.
     """
-    # Use Llama service for comprehensive analysis
-    analysis_result = await llama_service.summarize_and_score(text)
+    # Built once and shared by every service below
+    features = DocumentFeatures(text)
+    
+    # Use Llama service for comprehensive analysis (chunked for long documents)
+    with stage_timer("comprehensive_analysis.summarize"):
+        analysis_result = await longdoc_service.summarize_and_score(features)
     
     # Add additional analysis from Cerebras if needed
-    cerebras_analysis = await cerebras_service.analyze_contract(text)
+    with stage_timer("comprehensive_analysis.insights"):
+        cerebras_analysis = await cerebras_service.analyze_contract(features)
     
     analysis_result["cerebras_insights"] = str(cerebras_analysis)
     
-    return analysis_result
\ No newline at end of file
+    return analysis_result
+
+
+async def _long_document_stages(features: DocumentFeatures):
+    # Parties and dates from one scan of the whole document (off the event
+    # loop, and cached for the summary), then the clauses of the chunked
+    # extraction as its chunks are merged
+    loop = asyncio.get_running_loop()
+    parties, dates = await loop.run_in_executor(None, lambda: (features.parties, features.dates))
+    yield "parties", parties[:5]
+    yield "dates", (dates[0] if dates else "", dates[-1] if len(dates) > 1 else "")
+    async for clause in longdoc_service.iter_clauses(features.text):
+        yield "clause", clause
+
+
+async def _stages(stages):
+    for stage in stages:
+        yield stage
+
+
+async def iter_comprehensive_analysis(text: str):
+    """
+    Produce the comprehensive analysis piece by piece, as (event, data) pairs:
+    parties and dates first, then each clause as it is classified, then the
+    summary, the risk score and the Cerebras insights. Long documents stream
+    the clauses /extract returns for them, each as soon as the chunked
+    extraction has settled it.
+    """
+    # Built once and shared by every service below
+    features = DocumentFeatures(text)
+    
+    if longdoc_service.is_long_document(text):
+        stages = _long_document_stages(features)
+    else:
+        stages = _stages(cerebras_service.iter_extraction(features))
+    async for stage, value in stages:
+        if stage == "parties":
+            yield "parties", {"parties": value}
+        elif stage == "dates":
+            yield "dates", {"effective_date": value[0], "termination_date": value[1]}
+        else:
+            yield "clause", value
+        # Let the event loop flush this event before the next stage runs
+        await asyncio.sleep(0)
+    
+    analysis_result = await longdoc_service.summarize_and_score(features)
+    yield "summary", {
+        "summary": analysis_result["summary"],
+        "key_points": analysis_result["key_points"],
+        "recommendations": analysis_result["recommendations"]
+    }
+    yield "risk", {
+        "risk_score": analysis_result["risk_score"],
+        "risk_level": analysis_result["risk_level"]
+    }
+    
+    cerebras_analysis = await cerebras_service.analyze_contract(features)
+    yield "insights", {"cerebras_insights": str(cerebras_analysis)}
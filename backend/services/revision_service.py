@@ -0,0 +1,265 @@
+# Revision Service
+import asyncio
+import difflib
+import hashlib
+import json
+from config import Config
+from . import cerebras_service, llama_service, near_duplicates
+from .cache_service import DiskCache, ResultCache, make_key
+from .document_features import DocumentFeatures
+from .log_service import get_logger
+from .metrics_service import stage_timer
+
+logger = get_logger(__name__)
+
+CLAUSE_PIPELINE = "clause"
+# Taken from an earlier near-duplicate clause instead of asking the model
+REUSED_FIELDS = ("type", "summary", "risk")
+
+# Analyses of single clauses, which a long revision produces by the hundred;
+# kept apart from result_cache so they cannot evict whole-document results
+clause_cache = ResultCache(
+    max_entries=Config.CLAUSE_CACHE_MAX_ENTRIES,
+    max_bytes=Config.CLAUSE_CACHE_MAX_BYTES,
+    ttl_seconds=Config.RESULT_CACHE_TTL_SECONDS,
+    disk=DiskCache(Config.RESULT_CACHE_PATH, Config.RESULT_CACHE_DISK_MAX_BYTES) if Config.RESULT_CACHE_PATH else None,
+)
+
+
+def fingerprint(section: str) -> str:
+    """
+    Short content hash identifying a section across versions of a document.
+    """
+    return hashlib.sha256(section.encode("utf-8", errors="surrogatepass")).hexdigest()[:16]
+
+
+def classify_clause(section: str) -> dict:
+    """
+    The rule-based part of a clause's analysis, which depends only on the
+    section's text: its type, title and content.
+    """
+    clause = cerebras_service.classify_section(section, 0)
+    # Untitled sections are named after their position, filled in per version
+    clause["positional_title"] = clause["title"] == "Section 1"
+    return clause
+
+
+def _assessing() -> bool:
+    return bool(Config.LLM_ENABLED and Config.LLAMA_API_KEY)
+
+
+def _classify_all(sections: list) -> list:
+    # Signatures are only needed to look up earlier model assessments
+    assessing = _assessing()
+    clauses = []
+    for section in sections:
+        clause = classify_clause(section)
+        clauses.append((clause, near_duplicates.signature(clause["content"]) if assessing else ()))
+    return clauses
+
+
+async def assess_clause(clause: dict, signature: tuple = ()) -> bool:
+    """
+    Add the model's plain-English summary and risk assessment of the clause
+    (only when LLM_ENABLED). A near duplicate of a clause assessed before,
+    found by its MinHash `signature`, takes that clause's type, summary and
+    risk instead. Returns False if the model could not be reached, in which
+    case the clause is not stored and is assessed again next time.
+    """
+    if not _assessing():
+        return True
+    match = near_duplicates.clause_assessments.lookup(signature)
+    if match is not None:
+        assessment, similarity = match
+        clause.update(assessment)
+        clause["near_duplicate_similarity"] = round(similarity, 4)
+        return True
+    import lliama_client
+    try:
+        summary, risk = await asyncio.gather(
+            lliama_client.summarize_clause(clause["content"]),
+            lliama_client.assess_risk(clause["content"]),
+        )
+    except Exception as e:
+        logger.warning("Clause assessment failed", extra={"error": str(e)})
+        return False
+    clause["summary"] = summary
+    try:
+        clause["risk"] = json.loads(risk)
+    except (TypeError, ValueError):
+        clause["risk"] = {"risk_level": "Unknown", "justification": str(risk)[:200]}
+    near_duplicates.clause_assessments.add(signature, {field: clause[field] for field in REUSED_FIELDS})
+    return True
+
+
+async def assess_clauses(fresh: list) -> list:
+    """
+    assess_clause for each (clause, signature) pair of `fresh`, which are
+    assessed concurrently and so cannot find each other in the shared index:
+    a near duplicate of an earlier clause in the list takes that clause's
+    assessment once it is made. Returns assess_clause's result per clause.
+    """
+    if not _assessing() or Config.NEAR_DUPLICATE_MAX_ENTRIES <= 0:
+        return list(await asyncio.gather(*(assess_clause(clause, signature) for clause, signature in fresh)))
+    batch = near_duplicates.NearDuplicateIndex(Config.NEAR_DUPLICATE_THRESHOLD, len(fresh))
+    leaders = []
+    followers = {}  # position -> (leader position, similarity)
+    for position, (_, signature) in enumerate(fresh):
+        match = batch.lookup(signature)
+        if match is None:
+            batch.add(signature, position)
+            leaders.append(position)
+        else:
+            followers[position] = match
+    complete = dict(zip(leaders, await asyncio.gather(*(assess_clause(*fresh[position]) for position in leaders))))
+    for position, (leader, similarity) in followers.items():
+        complete[position] = complete[leader]
+        if complete[leader]:
+            fresh[position][0].update({field: fresh[leader][0][field] for field in REUSED_FIELDS})
+            fresh[position][0]["near_duplicate_similarity"] = round(similarity, 4)
+    return [complete[position] for position in range(len(fresh))]
+
+
+def _prepare(text: str, previous_text: str) -> tuple:
+    # Splitting and entity scans are CPU work over the whole document
+    features = DocumentFeatures(text)
+    previous_sections = DocumentFeatures(previous_text).sections if previous_text is not None else None
+    return (
+        features.length, features.sections, features.parties[:5], features.dates,
+        features.keyword_hits, previous_sections,
+    )
+
+
+def _title_for(clause: dict, index: int) -> dict:
+    clause = dict(clause)
+    if clause.pop("positional_title"):
+        clause["title"] = f"Section {index + 1}"
+    return clause
+
+
+def diff_sections(previous_sections: list, sections: list) -> dict:
+    """
+    Clause-level diff between two versions, from the sequence of section
+    fingerprints: each change is "added", "removed", "modified" (a section
+    replaced in place) or "moved" (the same text at another position).
+    Returns the change counts and the changes, unchanged sections omitted.
+    """
+    old = [fingerprint(section) for section in previous_sections]
+    new = [fingerprint(section) for section in sections]
+    changes = []
+    unchanged = 0
+    matcher = difflib.SequenceMatcher(a=old, b=new, autojunk=False)
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == "equal":
+            unchanged += i2 - i1
+            continue
+        paired = min(i2 - i1, j2 - j1) if tag == "replace" else 0
+        for offset in range(paired):
+            changes.append({"status": "modified", "previous_index": i1 + offset, "index": j1 + offset})
+        for position in range(i1 + paired, i2):
+            changes.append({"status": "removed", "previous_index": position, "index": None})
+        for position in range(j1 + paired, j2):
+            changes.append({"status": "added", "previous_index": None, "index": position})
+
+    # A section removed in one place and added in another has moved
+    removed = {}
+    for change in changes:
+        if change["status"] == "removed":
+            removed.setdefault(old[change["previous_index"]], []).append(change)
+    for change in changes:
+        if change["status"] == "added" and removed.get(new[change["index"]]):
+            origin = removed[new[change["index"]]].pop(0)
+            change["status"] = "moved"
+            change["previous_index"] = origin["previous_index"]
+            origin["status"] = None
+    changes = [change for change in changes if change["status"]]
+    changes.sort(key=lambda change: (
+        change["index"] if change["index"] is not None else change["previous_index"],
+        change["index"] is None,
+    ))
+
+    for change in changes:
+        if change["index"] is not None:
+            change["fingerprint"] = new[change["index"]]
+        if change["previous_index"] is not None:
+            section = previous_sections[change["previous_index"]]
+            change["previous_fingerprint"] = old[change["previous_index"]]
+            if change["status"] in ("modified", "removed"):
+                previous = cerebras_service.classify_section(section, change["previous_index"])
+                change["previous_type"] = previous["type"]
+                change["previous_title"] = previous["title"]
+                change["previous_content"] = previous["content"]
+
+    counts = {"unchanged": unchanged, "modified": 0, "added": 0, "removed": 0, "moved": 0}
+    for change in changes:
+        counts[change["status"]] += 1
+    return {"counts": counts, "changes": changes}
+
+
+async def analyze_revision(text: str, previous_text: str = None) -> dict:
+    """
+    Extraction and scoring of one version of a contract that reuses the
+    stored analysis of every section seen before. Sections are split the
+    way extract_clauses splits them and identified by their content, so
+    only new or edited sections are analyzed; the rest come from the clause
+    cache, whichever version or document they were first seen in, and new
+    sections nearly identical to one assessed before reuse its assessment.
+    The document's summary and risk score are the rule-based ones, from the
+    keyword groups of the whole text: the same as /summarize gives when no
+    model scores documents.
+    With `previous_text`, the result also has a clause-level "diff" against
+    that version.
+    """
+    loop = asyncio.get_running_loop()
+    with stage_timer("revision.split"):
+        length, sections, parties, dates, keyword_hits, previous_sections = await loop.run_in_executor(
+            None, _prepare, text, previous_text
+        )
+    analyzed = sections[:Config.REVISION_MAX_CLAUSES]
+
+    # The clause cache's disk tier is read and written off the event loop
+    clauses = await loop.run_in_executor(
+        None, lambda: [clause_cache.get(make_key(CLAUSE_PIPELINE, section)) for section in analyzed]
+    )
+    missing = {}  # section -> positions
+    for index, section in enumerate(analyzed):
+        if clauses[index] is None:
+            missing.setdefault(section, []).append(index)
+
+    with stage_timer("revision.analyze_clauses"):
+        fresh = await loop.run_in_executor(None, _classify_all, list(missing))
+        stored = await assess_clauses(fresh)
+    assessed = []
+    for (section, positions), (clause, _), complete in zip(missing.items(), fresh, stored):
+        if complete:
+            assessed.append((make_key(CLAUSE_PIPELINE, section), clause))
+        for index in positions:
+            clauses[index] = clause
+    await loop.run_in_executor(None, clause_cache.set_many, assessed)
+
+    recomputed = sum(len(positions) for positions in missing.values())
+    summary = llama_service.score_document(length, keyword_hits)
+    risks = [clause["risk"].get("risk_level") for clause in clauses if isinstance(clause.get("risk"), dict)]
+    if risks:
+        summary["clause_risk_levels"] = {level: risks.count(level) for level in sorted(set(risks))}
+
+    result = {
+        "parties": parties,
+        "effective_date": dates[0] if dates else "",
+        "termination_date": dates[-1] if len(dates) > 1 else "",
+        "clauses": [
+            dict(_title_for(clause, index), index=index, fingerprint=fingerprint(section))
+            for index, (section, clause) in enumerate(zip(analyzed, clauses))
+        ],
+        "summary": summary,
+        "sections": len(sections),
+        "reused_clauses": len(analyzed) - recomputed,
+        "analyzed_clauses": recomputed,
+        "near_duplicate_clauses": sum(
+            len(missing[section]) for section, (clause, _) in zip(missing, fresh) if "near_duplicate_similarity" in clause
+        ),
+    }
+    if previous_sections is not None:
+        with stage_timer("revision.diff"):
+            result["diff"] = await loop.run_in_executor(None, diff_sections, previous_sections, sections)
+    return result
@@ -0,0 +1,89 @@
+# Shared SQLite Database
+import contextlib
+import os
+import sqlite3
+import threading
+
+# Longest a writer waits for another process's write to finish, in milliseconds
+BUSY_TIMEOUT_MS = 30000
+
+# The same for transactions on request paths, which fail fast instead of
+# holding an executor thread while another process writes
+REQUEST_BUSY_TIMEOUT_MS = 2000
+
+
+class SharedDatabase:
+    """
+    A SQLite database that every worker process of a deployment opens. Each
+    process gets its own connection, opened on first use and again after a
+    fork (a preloaded app must not hand one connection to several workers).
+    WAL mode lets one process read while another writes, and writers wait
+    for each other instead of failing with "database is locked".
+    `schema` statements run on every new connection, so they must be
+    idempotent (CREATE ... IF NOT EXISTS).
+    """
+
+    def __init__(self, path: str, schema: tuple = ()):
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.path = path
+        self.schema = schema
+        # Serializes the threads of one process on its connection
+        self.lock = threading.RLock()
+        self._conn = None
+        self._pid = None
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        if self._pid != os.getpid():
+            conn = sqlite3.connect(self.path, check_same_thread=False, timeout=BUSY_TIMEOUT_MS / 1000)
+            conn.row_factory = sqlite3.Row
+            conn.execute(f"PRAGMA busy_timeout = {BUSY_TIMEOUT_MS}")
+            conn.execute("PRAGMA journal_mode=WAL")
+            for statement in self.schema:
+                conn.execute(statement)
+            conn.commit()
+            self._conn = conn
+            self._pid = os.getpid()
+        return self._conn
+
+    def execute(self, sql: str, args: tuple = ()) -> sqlite3.Cursor:
+        """
+        Run one statement and commit it.
+        """
+        with self.lock:
+            cursor = self.conn.execute(sql, args)
+            self.conn.commit()
+            return cursor
+
+    @contextlib.contextmanager
+    def transaction(self, busy_timeout_ms: int = BUSY_TIMEOUT_MS):
+        """
+        Yield the connection inside a write transaction (BEGIN IMMEDIATE, so
+        the write lock is held from the first read to the commit), committed
+        when the block ends and rolled back if it raises. Waits at most
+        `busy_timeout_ms` for the lock before raising "database is locked".
+        Blocks; call it from an executor thread, not the event loop.
+        """
+        with self.lock:
+            conn = self.conn
+            if busy_timeout_ms != BUSY_TIMEOUT_MS:
+                conn.execute(f"PRAGMA busy_timeout = {busy_timeout_ms}")
+            try:
+                conn.execute("BEGIN IMMEDIATE")
+                try:
+                    yield conn
+                    conn.commit()
+                except BaseException:
+                    conn.rollback()
+                    raise
+            finally:
+                if busy_timeout_ms != BUSY_TIMEOUT_MS:
+                    conn.execute(f"PRAGMA busy_timeout = {BUSY_TIMEOUT_MS}")
+
+    def close(self):
+        with self.lock:
+            if self._conn is not None and self._pid == os.getpid():
+                self._conn.close()
+            self._conn = None
+            self._pid = None
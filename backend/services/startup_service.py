@@ -0,0 +1,202 @@
+# Startup Service
+import asyncio
+import importlib
+import sys
+import threading
+import time
+from .log_service import get_logger
+
+logger = get_logger(__name__)
+
+# Router modules by URL prefix, each imported and included the first time a
+# request reaches its prefix (or by the warm-up)
+ROUTERS = {
+    "/upload": "routes.upload",
+    "/analyze": "routes.analyze",
+    "/summarize": "routes.summarize",
+    "/extract": "routes.extract",
+    "/auth": "routes.auth",
+    "/jobs": "routes.jobs",
+    "/documents": "routes.documents",
+    "/batch": "routes.batch",
+    "/revisions": "routes.revisions",
+    "/clauses": "routes.clauses",
+    "/comprehensive-analysis": "routes.comprehensive",
+}
+
+# Dependencies the routers only import when first needed (document parsers,
+# the LLM HTTP client), preloaded by the warm-up
+WARM_UP_MODULES = ("pypdf", "httpx")
+
+
+class RouterLoader:
+    """
+    Imports router modules on demand and includes them in the app, and
+    records what each import cost: seconds, and how many modules it
+    brought in, for the startup report. Imports run in the default
+    executor, so the event loop keeps serving meanwhile; routers are
+    included on the event loop thread, which is the one that reads the
+    route table. Concurrent requests for a module still loading wait for
+    the same load.
+    """
+
+    def __init__(self, routers: dict):
+        self.routers = routers
+        self.loads = {}  # module -> {"seconds", "modules", "trigger"}
+        self.included = set()
+        self._loading = {}  # module -> future of its load in progress
+        # Records each module's import once when threads import at the same time
+        self._import_lock = threading.Lock()
+
+    def module_for(self, path: str):
+        for prefix, module in self.routers.items():
+            if path == prefix or path.startswith(prefix + "/"):
+                return module
+        return None
+
+    def import_module(self, name: str, trigger: str):
+        """
+        Import a module, recording its cost the first time. Blocks; run it
+        in an executor when the event loop is running.
+        """
+        with self._import_lock:
+            if name in self.loads:
+                return sys.modules[name]
+            modules = len(sys.modules)
+            start = time.perf_counter()
+            module = importlib.import_module(name)
+            self.loads[name] = {
+                "seconds": round(time.perf_counter() - start, 4),
+                "modules": len(sys.modules) - modules,
+                "trigger": trigger,
+            }
+        logger.info("Loaded module", extra={"loaded_module": name, **self.loads[name]})
+        return module
+
+    def add_router(self, app, name: str, module):
+        """
+        Include an imported router module's router, once. Call it on the
+        event loop thread, or before the server runs.
+        """
+        if name in self.included:
+            return
+        app.include_router(module.router)
+        self.included.add(name)
+        # Rebuilt with the new routes on the next /openapi.json
+        app.openapi_schema = None
+
+    async def include(self, app, name: str, trigger: str):
+        if name in self.included:
+            return
+        future = self._loading.get(name)
+        if future is None:
+            future = self._loading[name] = asyncio.ensure_future(self._load(app, name, trigger))
+        # A waiter that is cancelled must not cancel the load the others wait for
+        await asyncio.shield(future)
+
+    async def _load(self, app, name: str, trigger: str):
+        try:
+            module = await asyncio.get_running_loop().run_in_executor(None, self.import_module, name, trigger)
+            self.add_router(app, name, module)
+        finally:
+            # After a failed import, the next request tries again
+            self._loading.pop(name, None)
+
+    async def include_all(self, app, trigger: str):
+        await asyncio.gather(*(self.include(app, name, trigger) for name in self.routers.values()))
+
+
+class LazyRouterMiddleware:
+    """
+    Includes the router serving a request's path before the request is
+    routed, the first time one arrives under its prefix. The OpenAPI schema
+    includes every router.
+    """
+
+    def __init__(self, app, loader: RouterLoader):
+        self.app = app
+        self.loader = loader
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] in ("http", "websocket"):
+            app = scope["app"]
+            if scope["path"] == app.openapi_url:
+                await self.loader.include_all(app, "openapi")
+            else:
+                module = self.loader.module_for(scope["path"])
+                if module is not None and module not in self.loader.included:
+                    await self.loader.include(app, module, "request")
+        await self.app(scope, receive, send)
+
+
+class Startup:
+    """
+    Readiness of this process. Without warm-up it is ready as soon as the
+    app has started; with it (WARM_UP), once every router and heavy
+    dependency has been imported and the LLM clients created, which
+    happens off the event loop so liveness checks are answered meanwhile.
+    """
+
+    def __init__(self, loader: RouterLoader):
+        self.loader = loader
+        self.import_seconds = None
+        self.warm_up_seconds = None
+        self.ready = False
+        self._task = None
+
+    def import_all(self) -> dict:
+        """
+        Import every router and dependency; returns the router modules by
+        name. Blocks.
+        """
+        routers = {name: self.loader.import_module(name, "warm-up") for name in self.loader.routers.values()}
+        for name in WARM_UP_MODULES:
+            self.loader.import_module(name, "warm-up")
+        return routers
+
+    def preload(self, app):
+        """
+        Import and include every router and dependency, before the server
+        runs. Safe before forking workers.
+        """
+        for name, module in self.import_all().items():
+            self.loader.add_router(app, name, module)
+
+    def begin(self, app, warm_up: bool):
+        """
+        Called at app startup; the warm-up runs in the background.
+        """
+        if not warm_up:
+            self.ready = True
+            return
+        self._task = asyncio.ensure_future(self._warm_up(app))
+
+    async def _warm_up(self, app):
+        start = time.perf_counter()
+        try:
+            routers = await asyncio.get_running_loop().run_in_executor(None, self.import_all)
+            # Included here on the event loop thread, not in the executor
+            for name, module in routers.items():
+                self.loader.add_router(app, name, module)
+            from . import llm_client
+            await llm_client.startup()
+        except Exception:
+            # Not reported ready: a router or dependency that cannot be imported is a broken deploy
+            logger.exception("Warm-up failed")
+            return
+        self.warm_up_seconds = round(time.perf_counter() - start, 4)
+        self.ready = True
+        logger.info("Warm-up finished", extra={"seconds": self.warm_up_seconds})
+
+    def report(self) -> dict:
+        return {
+            "ready": self.ready,
+            "import_seconds": self.import_seconds,
+            "warm_up_seconds": self.warm_up_seconds,
+            "loaded": dict(self.loader.loads),
+            "pending_routers": [name for name in self.loader.routers.values() if name not in self.loader.included],
+        }
+
+
+router_loader = RouterLoader(ROUTERS)
+startup = Startup(router_loader)
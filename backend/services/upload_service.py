@@ -0,0 +1,356 @@
+# Upload Service
+import asyncio
+import codecs
+import os
+import shutil
+import tempfile
+import zipfile
+from io import BytesIO
+from fastapi.routing import APIRoute
+from starlette.datastructures import FormData, UploadFile
+from starlette.formparsers import MultiPartMessage, MultiPartParser, _user_safe_decode, multipart, parse_options_header
+from starlette.requests import Request
+from starlette.responses import JSONResponse
+from config import Config
+from . import docx_service, pdf_service
+from .document_store import document_store
+
+PDF_MAGIC = b"%PDF-"
+ZIP_MAGIC = b"PK\x03\x04"
+
+# Room for the multipart boundaries and part headers around the file itself
+MULTIPART_OVERHEAD = 64 * 1024
+
+# Characters of an upload's content returned unless the full text is requested
+PREVIEW_LENGTH = 4000
+
+
+class UnsupportedFileType(ValueError):
+    """
+    Raised for an upload that is not a PDF, Word document or text file.
+    """
+
+
+def detect_file_type(file) -> str:
+    """
+    "pdf", "docx", "zip" (any other archive) or "text", from the leading
+    bytes of a seekable binary file rather than the content type the client
+    claims. The file is left at its start.
+    """
+    file.seek(0)
+    head = file.read(1024)
+    file.seek(0)
+    # PDF readers accept the header anywhere in the first kilobyte
+    if PDF_MAGIC in head:
+        return "pdf"
+    if not head.startswith(ZIP_MAGIC):
+        return "text"
+    try:
+        with zipfile.ZipFile(file) as archive:
+            return "docx" if docx_service.is_docx(archive) else "zip"
+    except zipfile.BadZipFile:
+        return "text"
+    finally:
+        file.seek(0)
+
+
+def iter_decoded(file, chunk_size: int = None):
+    """
+    Yield the text of a UTF-8 file chunk by chunk, decoded incrementally so
+    a character split across two reads is still decoded once. Invalid bytes
+    are dropped.
+    """
+    chunk_size = chunk_size or Config.UPLOAD_CHUNK_SIZE
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="ignore")
+    while True:
+        chunk = file.read(chunk_size)
+        if not chunk:
+            break
+        yield decoder.decode(chunk)
+    yield decoder.decode(b"", final=True)
+
+
+def decode_text(file) -> str:
+    return "".join(iter_decoded(file))
+
+
+async def parse_upload_file(file, file_type: str = None) -> dict:
+    """
+    Turn an uploaded file (a seekable binary file object, such as the spooled
+    file of an UploadFile) into text, without reading it into memory whole.
+    Returns a dictionary with a "message", the "text" and any extra details
+    about the parse (page count, timings and pages reused from the page
+    cache for PDFs, paragraph count for Word documents). Raises
+    UnsupportedFileType for other archives. `file_type` skips detecting it
+    again when the caller already has.
+    """
+    file_type = file_type or detect_file_type(file)
+    if file_type == "pdf":
+        # Parse the pages in the PDF worker pool, off the event loop
+        result = await pdf_service.extract_pdf_async(file)
+        return {
+            "message": "PDF processed successfully",
+            "text": result["text"],
+            "pages": result["pages"],
+            "page_timings": result["page_timings"],
+            "cached_pages": result["cached_pages"],
+        }
+    if file_type == "docx":
+        result = await docx_service.extract_docx_async(file)
+        return {
+            "message": "Word document processed successfully",
+            "text": result["text"],
+            "paragraphs": result["paragraphs"],
+        }
+    if file_type == "zip":
+        raise UnsupportedFileType("Unsupported file type")
+
+    # Large spools live on disk; keep their reads off the event loop
+    loop = asyncio.get_running_loop()
+    text = await loop.run_in_executor(None, decode_text, file)
+    return {"message": "Text file processed successfully", "text": text}
+
+
+async def parse_upload(content: bytes) -> dict:
+    """
+    parse_upload_file for a file already held in memory.
+    """
+    return await parse_upload_file(BytesIO(content))
+
+
+def _store_text_file(file, owner: str, filename: str, preview_length: int) -> tuple:
+    preview = []
+    remaining = preview_length
+
+    def chunks():
+        nonlocal remaining
+        for chunk in iter_decoded(file):
+            if remaining > 0:
+                preview.append(chunk[:remaining])
+                remaining -= len(preview[-1])
+            yield chunk
+
+    document = document_store.put_chunks(owner, chunks(), filename)
+    return document, "".join(preview)
+
+
+async def ingest_upload(file, owner: str, filename: str, preview_length: int) -> dict:
+    """
+    Parse an uploaded file and keep its text in the document store for
+    `owner`. Like parse_upload_file, but returns the stored "document" and a
+    "preview" of its first `preview_length` characters instead of the text.
+    Plain text is decoded and written to the store chunk by chunk, so it is
+    never held in memory whole.
+    """
+    file_type = detect_file_type(file)
+    # Large spools live on disk and documents are written to disk; keep both off the event loop
+    loop = asyncio.get_running_loop()
+    if file_type == "text":
+        document, preview = await loop.run_in_executor(
+            None, _store_text_file, file, owner, filename, preview_length
+        )
+        return {"message": "Text file processed successfully", "document": document, "preview": preview}
+
+    parsed = await parse_upload_file(file, file_type)
+    text = parsed.pop("text")
+    parsed["document"] = await loop.run_in_executor(None, document_store.put, owner, text, filename)
+    parsed["preview"] = text[:preview_length]
+    return parsed
+
+
+def content_fields(document: dict, preview: str, full_text: bool = False) -> dict:
+    """
+    Content of an ingested upload returned to the client (the preview, or
+    the whole text with `full_text`), flagging when it was cut short.
+    """
+    content = document_store.get_text(document["id"], document["owner"]) if full_text else preview
+    return {"content": content, "content_length": document["characters"], "truncated": len(content) < document["characters"]}
+
+
+def save_upload(file, directory: str) -> str:
+    """
+    Copy an uploaded file into `directory` chunk by chunk and return the
+    absolute path of the copy.
+    """
+    os.makedirs(directory, exist_ok=True)
+    descriptor, path = tempfile.mkstemp(suffix=".upload", dir=directory)
+    file.seek(0)
+    with os.fdopen(descriptor, "wb") as copy:
+        shutil.copyfileobj(file, copy, Config.UPLOAD_CHUNK_SIZE)
+    file.seek(0)
+    return os.path.abspath(path)
+
+
+def file_size(file) -> int:
+    """
+    Size in bytes of a seekable file, which is left at its start.
+    """
+    file.seek(0, os.SEEK_END)
+    size = file.tell()
+    file.seek(0)
+    return size
+
+
+class SpooledUploadFile(UploadFile):
+    """
+    UploadFile kept in memory up to UPLOAD_SPOOL_MAX_MEMORY bytes and
+    spilled to a temporary file beyond that.
+    """
+
+    spool_max_size = Config.UPLOAD_SPOOL_MAX_MEMORY
+
+
+class SpooledMultiPartParser(MultiPartParser):
+    """
+    Starlette's multipart parser with the file parts written to
+    SpooledUploadFile instead of UploadFile.
+    """
+
+    async def parse(self) -> FormData:
+        _, params = parse_options_header(self.headers["Content-Type"])
+        charset = params.get(b"charset", "utf-8")
+        if isinstance(charset, bytes):
+            charset = charset.decode("latin-1")
+        callbacks = {
+            name: getattr(self, name) for name in (
+                "on_part_begin", "on_part_data", "on_part_end", "on_header_field",
+                "on_header_value", "on_header_end", "on_headers_finished", "on_end",
+            )
+        }
+        parser = multipart.MultipartParser(params.get(b"boundary"), callbacks)
+        header_field = header_value = b""
+        disposition = None
+        content_type = b""
+        field_name = ""
+        data = b""
+        file = None
+        items = []
+
+        async for chunk in self.stream:
+            parser.write(chunk)
+            messages = list(self.messages)
+            self.messages.clear()
+            for message_type, message_bytes in messages:
+                if message_type == MultiPartMessage.PART_BEGIN:
+                    disposition = None
+                    content_type = data = b""
+                elif message_type == MultiPartMessage.HEADER_FIELD:
+                    header_field += message_bytes
+                elif message_type == MultiPartMessage.HEADER_VALUE:
+                    header_value += message_bytes
+                elif message_type == MultiPartMessage.HEADER_END:
+                    field = header_field.lower()
+                    if field == b"content-disposition":
+                        disposition = header_value
+                    elif field == b"content-type":
+                        content_type = header_value
+                    header_field = header_value = b""
+                elif message_type == MultiPartMessage.HEADERS_FINISHED:
+                    _, options = parse_options_header(disposition)
+                    field_name = _user_safe_decode(options[b"name"], charset)
+                    file = None
+                    if b"filename" in options:
+                        file = SpooledUploadFile(
+                            filename=_user_safe_decode(options[b"filename"], charset),
+                            content_type=content_type.decode("latin-1"),
+                        )
+                elif message_type == MultiPartMessage.PART_DATA:
+                    if file is None:
+                        data += message_bytes
+                    else:
+                        await file.write(message_bytes)
+                elif message_type == MultiPartMessage.PART_END:
+                    if file is None:
+                        items.append((field_name, _user_safe_decode(data, charset)))
+                    else:
+                        await file.seek(0)
+                        items.append((field_name, file))
+
+        parser.finalize()
+        return FormData(items)
+
+
+class SpooledRequest(Request):
+    """
+    Request whose multipart form is parsed by SpooledMultiPartParser.
+    """
+
+    async def form(self) -> FormData:
+        if not hasattr(self, "_form"):
+            content_type, _ = parse_options_header(self.headers.get("Content-Type"))
+            if content_type != b"multipart/form-data":
+                return await super().form()
+            self._form = await SpooledMultiPartParser(self.headers, self.stream()).parse()
+        return self._form
+
+
+class UploadRoute(APIRoute):
+    """
+    Route class for routers taking file uploads: their files are spooled as
+    SpooledUploadFile, so UPLOAD_SPOOL_MAX_MEMORY applies to them alone
+    rather than to every UploadFile in the process.
+    """
+
+    def get_route_handler(self):
+        handler = super().get_route_handler()
+
+        async def spooled_handler(request: Request):
+            return await handler(SpooledRequest(request.scope, request.receive))
+
+        return spooled_handler
+
+
+class _UploadTooLarge(Exception):
+    pass
+
+
+class UploadSizeLimitMiddleware:
+    """
+    ASGI middleware refusing request bodies larger than `max_bytes` (plus
+    room for multipart framing) with 413, whatever their content type: file
+    uploads as well as JSON or form bodies. A declared Content-Length over
+    the limit is refused before any of the body is read; otherwise the body
+    is counted as it arrives and the request is stopped as soon as it passes
+    the limit, so an oversized body is never read or spooled in full.
+    """
+
+    def __init__(self, app, max_bytes: int):
+        self.app = app
+        self.max_bytes = max_bytes
+        self.max_body_bytes = max_bytes + MULTIPART_OVERHEAD
+
+    def _too_large(self) -> JSONResponse:
+        return JSONResponse({"detail": f"Request body exceeds the {self.max_bytes} byte limit"}, status_code=413)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        content_length = dict(scope["headers"]).get(b"content-length")
+        if content_length is not None and content_length.isdigit() and int(content_length) > self.max_body_bytes:
+            await self._too_large()(scope, receive, send)
+            return
+
+        received = 0
+        exceeded = False
+
+        async def limited_receive():
+            nonlocal received, exceeded
+            message = await receive()
+            received += len(message.get("body", b""))
+            if received > self.max_body_bytes:
+                exceeded = True
+                raise _UploadTooLarge()
+            return message
+
+        async def guarded_send(message):
+            # The app turns the aborted read into its own error response; drop it
+            if not exceeded:
+                await send(message)
+
+        try:
+            await self.app(scope, limited_receive, guarded_send)
+        except _UploadTooLarge:
+            pass
+        if exceeded:
+            await self._too_large()(scope, receive, send)
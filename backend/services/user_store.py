@@ -0,0 +1,152 @@
+# User Store
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from config import Config
+from .shared_db import SharedDatabase
+
+
+class UserRepository(ABC):
+    """
+    Where user records live. A record is a dict with "username", "email",
+    "hashed_password" and "created_at". Supports the read side of a dict
+    (`get`, `in`, `[]`) so existing lookups keep working, plus an atomic
+    `add` for signup. Backends implement `get`, `add` and `delete`.
+    """
+
+    @abstractmethod
+    def get(self, username: str, default=None):
+        """
+        The user's record, or `default` if there is no such user.
+        """
+
+    @abstractmethod
+    def add(self, record: dict) -> bool:
+        """
+        Store a new user. Returns False, storing nothing, if the username is
+        taken.
+        """
+
+    @abstractmethod
+    def delete(self, username: str):
+        """
+        Remove the user, if there is one.
+        """
+
+    def __contains__(self, username: str) -> bool:
+        return self.get(username) is not None
+
+    def __getitem__(self, username: str) -> dict:
+        record = self.get(username)
+        if record is None:
+            raise KeyError(username)
+        return record
+
+
+class InMemoryUserRepository(UserRepository):
+    """
+    Users in a dict: fine for a single process, lost on restart.
+    """
+
+    def __init__(self):
+        self._records = {}
+        self._lock = threading.Lock()
+
+    def get(self, username: str, default=None):
+        return self._records.get(username, default)
+
+    def add(self, record: dict) -> bool:
+        with self._lock:
+            if record["username"] in self._records:
+                return False
+            self._records[record["username"]] = {"created_at": time.time(), **record}
+            return True
+
+    def delete(self, username: str):
+        with self._lock:
+            self._records.pop(username, None)
+
+
+class SQLiteUserRepository(UserRepository):
+    """
+    Users in a SQLite database (WAL mode, username primary key) that every
+    worker process of a deployment opens, so a signup on one worker can log
+    in on any other. Each process keeps an LRU cache of the records it has
+    read; an entry is trusted for `cache_ttl_seconds`, which bounds how long
+    another worker may take to notice a deleted user. Misses are never
+    cached, so a new signup is visible everywhere at once.
+    """
+
+    def __init__(self, path: str, cache_size: int, cache_ttl_seconds: float):
+        self.db = SharedDatabase(path, schema=(
+            "CREATE TABLE IF NOT EXISTS users ("
+            "username TEXT PRIMARY KEY, email TEXT, hashed_password TEXT NOT NULL, "
+            "created_at REAL NOT NULL)",
+        ))
+        self.cache_size = cache_size
+        self.cache_ttl_seconds = cache_ttl_seconds
+        self._cache = OrderedDict()  # username -> (fetched_at, record)
+
+    def get(self, username: str, default=None):
+        now = time.monotonic()
+        with self.db.lock:
+            cached = self._cache.get(username)
+            if cached is not None and now - cached[0] < self.cache_ttl_seconds:
+                self._cache.move_to_end(username)
+                return cached[1]
+            row = self.db.conn.execute(
+                "SELECT username, email, hashed_password, created_at FROM users WHERE username = ?", (username,)
+            ).fetchone()
+            if row is None:
+                self._cache.pop(username, None)
+                return default
+            record = dict(row)
+            # Keep handing out the same object while the record is unchanged
+            if cached is not None and cached[1] == record:
+                record = cached[1]
+            self._cache[username] = (now, record)
+            self._cache.move_to_end(username)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+            return record
+
+    def add(self, record: dict) -> bool:
+        with self.db.lock:
+            conn = self.db.conn
+            try:
+                conn.execute(
+                    "INSERT INTO users (username, email, hashed_password, created_at) VALUES (?, ?, ?, ?)",
+                    (record["username"], record.get("email"), record["hashed_password"],
+                     record.get("created_at", time.time())),
+                )
+                conn.commit()
+            except sqlite3.IntegrityError:
+                conn.rollback()
+                return False
+            return True
+
+    def delete(self, username: str):
+        with self.db.lock:
+            self.db.execute("DELETE FROM users WHERE username = ?", (username,))
+            self._cache.pop(username, None)
+
+    def clear_cache(self):
+        with self.db.lock:
+            self._cache.clear()
+
+
+def create_repository() -> UserRepository:
+    """
+    The repository selected by USER_STORE ("sqlite" or "memory").
+    """
+    if Config.USER_STORE == "memory":
+        return InMemoryUserRepository()
+    if Config.USER_STORE == "sqlite":
+        return SQLiteUserRepository(
+            Config.USER_DB_PATH,
+            cache_size=Config.USER_CACHE_SIZE,
+            cache_ttl_seconds=Config.USER_CACHE_TTL_SECONDS,
+        )
+    raise ValueError(f"Unknown USER_STORE: {Config.USER_STORE}")
@@ -4,6 +4,7 @@ import { useRouter } from "next/navigation";
 
 export default function Home() {
   const [text, setText] = useState("");
+  const [documentId, setDocumentId] = useState("");
   const [clauses, setClauses] = useState<any[]>([]);
   const [summary, setSummary] = useState<any>(null);
   const [loading, setLoading] = useState(false);
@@ -63,11 +64,13 @@ export default function Home() {
       
       const data = await res.json();
       setText(data.content);
+      setDocumentId(data.document_id || "");
       setSuccess("File uploaded and processed successfully!");
     } catch (err: any) {
       console.error("Upload error:", err);
       setError(err.message || "An error occurred while uploading the file");
       setText("");
+      setDocumentId("");
     } finally {
       setLoading(false);
     }
@@ -92,7 +95,8 @@ export default function Home() {
           "Content-Type": "application/json",
           "Authorization": `Bearer ${token}`
         },
-        body: JSON.stringify({ text }),
+        // The backend kept the full text at upload; the preview may be truncated
+        body: JSON.stringify(documentId ? { document_id: documentId } : { text }),
       });
 
       if (!res.ok) {
@@ -134,7 +138,8 @@ export default function Home() {
           "Content-Type": "application/json",
           "Authorization": `Bearer ${token}`
         },
-        body: JSON.stringify({ text }),
+        // The backend kept the full text at upload; the preview may be truncated
+        body: JSON.stringify(documentId ? { document_id: documentId } : { text }),
       });
 
       if (!res.ok) {
@@ -215,7 +220,7 @@ export default function Home() {
                 onChange={handleUpload} 
                 className="hidden" 
                 id="file-upload"
-                accept=".pdf,.txt" 
+                accept=".pdf,.docx,.txt" 
                 ref={fileInputRef}
               />
               <div className="flex flex-col items-center justify-center">